@@ -3,6 +3,7 @@ from langchain_openai import ChatOpenAI
 
 from langgraph.graph import START, StateGraph, MessagesState
 from langgraph.prebuilt import tools_condition, ToolNode
+from tracing import traced
 
 def add(a: int, b: int) -> int:
     """Adds a and b.
@@ -62,6 +63,7 @@ When calling tools, always pass parameters as integers, not strings.
 For example, call add with parameters: {"a": 8, "b": 5} (integers), NOT {"a": "8", "b": "5"} (strings).
 """)
 # Node
+@traced
 def assistant(state: MessagesState):
    return {"messages": [llm_with_tools.invoke([sys_msg] + state["messages"])]}
 
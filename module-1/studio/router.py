@@ -1,6 +1,7 @@
 from langchain_community.chat_models import ChatOllama
 from langgraph.graph import MessagesState, StateGraph, START, END
 from langgraph.prebuilt import ToolNode, tools_condition
+from tracing import traced
 
 # Outil simple
 def multiply(a: int, b: int) -> int:
@@ -38,6 +39,7 @@ llm = ChatGroq(
 llm = ChatOllama(model=LLM_MODEL, temperature=0)"""
 
 # Node LLM (sans bind_tools)
+@traced
 def tool_calling_llm(state: MessagesState):
     # Ici, tu traites state["messages"] et appelles le LLM
     response = llm.invoke(state["messages"])
@@ -2,6 +2,7 @@ import random
 from typing import Literal
 from typing_extensions import TypedDict
 from langgraph.graph import StateGraph, START, END
+from tracing import traced
 
 # State
 class State(TypedDict):
@@ -23,14 +24,17 @@ def decide_mood(state) -> Literal["node_2", "node_3"]:
     return "node_3"
 
 # Nodes
+@traced
 def node_1(state):
     print("---Node 1---")
     return {"graph_state":state['graph_state'] +" I am"}
 
+@traced
 def node_2(state):
     print("---Node 2---")
     return {"graph_state":state['graph_state'] +" happy!"}
 
+@traced
 def node_3(state):
     print("---Node 3---")
     return {"graph_state":state['graph_state'] +" sad!"}
@@ -2,11 +2,13 @@ from typing import Literal
 from langchain_core.messages import HumanMessage, SystemMessage, RemoveMessage
 from langgraph.graph import MessagesState
 from langgraph.graph import StateGraph, START, END
+from tracing import traced
 
 # We will use this model for both the conversation and the summarization
 from dotenv import load_dotenv
 from langchain_groq import ChatGroq
 import os
+import llm_factory
 
 # Charge les variables d'environnement depuis le fichier .env
 load_dotenv()
@@ -14,18 +16,15 @@ load_dotenv()
 # Récupère ta clé d'API Groq
 api_key = os.getenv("GROQ_API_KEY")
 
-# Initialisation du modèle ChatGroq avec ton modèle préféré
-model = ChatGroq(
-    model="meta-llama/llama-4-scout-17b-16e-instruct",
-    temperature=0,
-    api_key=api_key
-)
+# Modèle partagé (pool HTTP et rate limit communs aux graphes du serveur)
+model = llm_factory.get_llm()
 
 # State class to store messages and summary
 class State(MessagesState):
     summary: str
     
 # Define the logic to call the model
+@traced
 def call_model(state: State):
     
     # Get summary if it exists
@@ -60,6 +59,7 @@ def should_continue(state: State) -> Literal["summarize_conversation", "__end__"
     # Otherwise we can just end
     return END
 
+@traced
 def summarize_conversation(state: State):
     
     # First get the summary if it exists
@@ -3,6 +3,7 @@ from langchain_openai import ChatOpenAI
 
 from langgraph.graph import START, StateGraph, MessagesState
 from langgraph.prebuilt import tools_condition, ToolNode
+from tracing import traced
 
 def add(a: float, b: float) -> float:
     """Adds a and b.
@@ -53,6 +54,7 @@ llm_with_tools = llm.bind_tools(tools)
 sys_msg = SystemMessage(content="You are a helpful assistant tasked with writing performing arithmetic on a set of inputs.")
 
 # Node
+@traced
 def assistant(state: MessagesState):
    return {"messages": [llm_with_tools.invoke([sys_msg] + state["messages"])]}
 
@@ -1,14 +1,17 @@
 from typing_extensions import TypedDict
 from langgraph.errors import NodeInterrupt
 from langgraph.graph import START, END, StateGraph
+from tracing import traced
 
 class State(TypedDict):
     input: str
 
+@traced
 def step_1(state: State) -> State:
     print("---Step 1---")
     return state
 
+@traced
 def step_2(state: State) -> State:
     # Let's optionally raise a NodeInterrupt if the length of the input is longer than 5 characters
     if len(state['input']) > 5:
@@ -17,6 +20,7 @@ def step_2(state: State) -> State:
     print("---Step 2---")
     return state
 
+@traced
 def step_3(state: State) -> State:
     print("---Step 3---")
     return state
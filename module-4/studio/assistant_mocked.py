@@ -5,6 +5,7 @@ import operator
 from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, get_buffer_string
 from langgraph.types import Send
 from langgraph.graph import START, END, StateGraph
+from tracing import traced
 
 # --- Mock LLM (juste pour simuler le comportement) ---
 class MockLLM:
@@ -47,6 +48,7 @@ class InterviewState(TypedDict):
     context: list
 
 # --- Nœuds mocks ---
+@traced
 def create_analysts(state: ResearchGraphState):
     USE_MOCK_DATA = True
     retry_count = state.get("retry_count", 0)
@@ -61,6 +63,7 @@ def create_analysts(state: ResearchGraphState):
         return {"analysts": mock_analysts, "retry_count": retry_count + 1}
     return {"analysts": []}
 
+@traced
 def human_feedback(state: ResearchGraphState):
     feedback = (state.get("human_analyst_feedback") or "").lower()
     if feedback == "approve":
@@ -71,6 +74,7 @@ def human_feedback(state: ResearchGraphState):
 def route_after_feedback(state: ResearchGraphState):
     return state.get("next", "create_analysts")
 
+@traced
 def launch_interviews(state: ResearchGraphState):
     analysts = state.get("analysts", [])
     topic = state.get("topic", "")
@@ -83,29 +87,35 @@ def launch_interviews(state: ResearchGraphState):
     }) for analyst in analysts]
 
 # --- Nœuds interview mocks ---
+@traced
 def conduct_interview(state: InterviewState):
     print(f"📋 MOCK: Interview pour {state['analyst'].name}")
     mock_transcript = f"Interview simulée pour {state['analyst'].name} sur le sujet."
     return {"interview": mock_transcript, "sections": [f"Section simulée pour {state['analyst'].name}"]}
 
+@traced
 def write_section(state: InterviewState):
     print(f"📋 MOCK: Écriture de section pour {state['analyst'].name}")
     return {"sections": [f"Résumé simulé pour {state['analyst'].name}"]}
 
 # --- Rapport mocks ---
+@traced
 def write_report(state: ResearchGraphState):
     print("📋 MOCK: Rapport final")
     sections = "\n".join(state.get("sections", []))
     return {"content": f"## Insights\n{sections}\n\n## Sources\n[1] Source simulée"}
 
+@traced
 def write_introduction(state: ResearchGraphState):
     print("📋 MOCK: Introduction générée")
     return {"introduction": "## Introduction\nCeci est une introduction simulée."}
 
+@traced
 def write_conclusion(state: ResearchGraphState):
     print("📋 MOCK: Conclusion générée")
     return {"conclusion": "## Conclusion\nCeci est une conclusion simulée."}
 
+@traced
 def finalize_report(state: ResearchGraphState):
     final_report = state["introduction"] + "\n\n---\n\n" + state["content"] + "\n\n---\n\n" + state["conclusion"]
     return {"final_report": final_report}
@@ -0,0 +1,233 @@
+"""Graph engine overhead benchmark on the studio graphs.
+
+Runs graphs whose nodes do no model or network work, so every millisecond
+measured is LangGraph itself:
+
+- simple          module-1/studio/simple.py
+- breakpoints     module-3/studio/dynamic_breakpoints.py
+- sub_graphs      module-4/studio/sub_graphs.py
+
+For each graph it reports p50 / p95 of:
+
+- run_ms          one invoke() without checkpointer
+- superstep_ms    time between two consecutive supersteps (stream "values")
+- state_copy_ms   deepcopy of the state after a superstep
+- serialize_ms    checkpoint serializer round trip of that state
+- checkpoint_ms   MemorySaver put + put_writes time of one invoke()
+- run_checkpointed_ms  one invoke() with MemorySaver
+
+and compares them with stored baselines (fixtures/bench_baselines.json).
+Subtracting these from a real run's node spans (see tracing.summary()) leaves
+the model and tool latency.
+
+Absolute timings depend on the machine, so every run first times a fixed
+pure-Python workload (deepcopy and serializer round trips of a sample state).
+The baselines are scaled by the ratio of this run's calibration time to the
+one stored with them before being compared.
+
+Usage:
+    python bench_graphs.py                     # report against the baselines
+    python bench_graphs.py --check             # exit 1 on a p50 regression beyond --tolerance
+    python bench_graphs.py --save-baseline     # store this run as the baselines
+    python bench_graphs.py --graphs simple,sub_graphs --runs 500
+"""
+import argparse
+import contextlib
+import copy
+import importlib.util
+import io
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from typing import Callable, Optional
+
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(os.path.dirname(HERE))
+BASELINES_PATH = os.path.join(HERE, "fixtures", "bench_baselines.json")
+
+LOG = {"id": "1", "question": "How do I use Chroma?", "docs": None, "answer": "See the docs.", "grade": 1, "grader": "human", "feedback": "Wrong"}
+
+# name -> (path from the repo root, builder attribute, input factory)
+GRAPHS: dict[str, tuple[str, str, Callable[[], dict]]] = {
+    "simple": ("module-1/studio/simple.py", "builder", lambda: {"graph_state": "Hi, this is Lance."}),
+    # Inputs longer than 5 characters raise the dynamic breakpoint
+    "breakpoints": ("module-3/studio/dynamic_breakpoints.py", "builder", lambda: {"input": "hi"}),
+    "sub_graphs": ("module-4/studio/sub_graphs.py", "entry_builder", lambda: {"raw_logs": [dict(LOG, id=str(i)) for i in range(10)]}),
+}
+CALIBRATION = "_calibration"
+
+class TimedSaver(MemorySaver):
+    """MemorySaver that accumulates the time spent writing checkpoints."""
+
+    def __init__(self):
+        super().__init__()
+        self.write_seconds = 0.0
+
+    def put(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return super().put(*args, **kwargs)
+        finally:
+            self.write_seconds += time.perf_counter() - start
+
+    def put_writes(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return super().put_writes(*args, **kwargs)
+        finally:
+            self.write_seconds += time.perf_counter() - start
+
+def load_builder(name: str):
+    """Import a studio graph module by path and return its StateGraph builder."""
+    path, attr, _ = GRAPHS[name]
+    path = os.path.join(ROOT, path)
+    # Graph modules import their studio neighbours (tracing, ...) by name
+    sys.path.insert(0, os.path.dirname(path))
+    try:
+        spec = importlib.util.spec_from_file_location(f"bench_{name}", path)
+        module = importlib.util.module_from_spec(spec)
+        with contextlib.redirect_stdout(io.StringIO()):
+            spec.loader.exec_module(module)
+    finally:
+        sys.path.pop(0)
+    return getattr(module, attr)
+
+def percentiles(values: list[float]) -> dict[str, float]:
+    values = sorted(values)
+    if not values:
+        return {"p50": 0.0, "p95": 0.0}
+    return {
+        "p50": round(values[int(0.5 * (len(values) - 1))], 4),
+        "p95": round(values[int(0.95 * (len(values) - 1))], 4),
+    }
+
+def calibrate(runs: int = 200, warmup: int = 20) -> list[float]:
+    """Timings (ms) of a fixed workload, the speed of this machine for the metrics below."""
+    serde = JsonPlusSerializer()
+    state = {"raw_logs": [dict(LOG, id=str(i)) for i in range(10)], "summary": "x" * 1000}
+    samples = []
+    for i in range(warmup + runs):
+        start = time.perf_counter()
+        for _ in range(20):
+            serde.loads_typed(serde.dumps_typed(copy.deepcopy(state)))
+        if i >= warmup:
+            samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+def bench_graph(name: str, runs: int, warmup: int) -> dict[str, dict[str, float]]:
+    builder = load_builder(name)
+    make_input = GRAPHS[name][2]
+    graph = builder.compile()
+    serde = JsonPlusSerializer()
+    samples: dict[str, list[float]] = {
+        "run_ms": [], "superstep_ms": [], "state_copy_ms": [], "serialize_ms": [],
+        "checkpoint_ms": [], "run_checkpointed_ms": [],
+    }
+
+    # Nodes print progress; keep it out of the report and off the timings
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(warmup + runs):
+            record = i >= warmup
+            random.seed(i)
+
+            start = time.perf_counter()
+            graph.invoke(make_input())
+            if record:
+                samples["run_ms"].append((time.perf_counter() - start) * 1000)
+
+            states, previous = [], time.perf_counter()
+            for state in graph.stream(make_input(), stream_mode="values"):
+                now = time.perf_counter()
+                if record:
+                    samples["superstep_ms"].append((now - previous) * 1000)
+                states.append(state)
+                previous = time.perf_counter()
+
+            if record:
+                for state in states:
+                    start = time.perf_counter()
+                    copy.deepcopy(state)
+                    samples["state_copy_ms"].append((time.perf_counter() - start) * 1000)
+                    start = time.perf_counter()
+                    serde.loads_typed(serde.dumps_typed(state))
+                    samples["serialize_ms"].append((time.perf_counter() - start) * 1000)
+
+            saver = TimedSaver()
+            checkpointed = builder.compile(checkpointer=saver)
+            start = time.perf_counter()
+            checkpointed.invoke(make_input(), {"configurable": {"thread_id": str(uuid.uuid4())}})
+            if record:
+                samples["run_checkpointed_ms"].append((time.perf_counter() - start) * 1000)
+                samples["checkpoint_ms"].append(saver.write_seconds * 1000)
+
+    return {metric: percentiles(values) for metric, values in samples.items()}
+
+def compare(results: dict, calibration: dict, baselines: dict, tolerance: float) -> list[str]:
+    """Print the report; return the metrics whose p50 regressed beyond `tolerance`.
+
+    Baseline p50s are scaled by this machine's calibration time over theirs.
+    """
+    base_calibration = baselines.get(CALIBRATION, {}).get("p50")
+    scale = calibration["p50"] / base_calibration if base_calibration else 1.0
+    print(f"calibration p50 {calibration['p50']:.4f} ms, baselines scaled by {scale:.2f}")
+    regressions = []
+    print(f"{'graph':<16} {'metric':<20} {'p50 ms':>9} {'p95 ms':>9} {'base p50':>9} {'delta':>8}")
+    for graph, metrics in results.items():
+        for metric, value in metrics.items():
+            base = baselines.get(graph, {}).get(metric)
+            if base:
+                base = {"p50": base["p50"] * scale}
+            delta = ""
+            if base and base["p50"] > 0:
+                change = value["p50"] / base["p50"] - 1
+                delta = f"{change:+.0%}"
+                if change > tolerance:
+                    regressions.append(f"{graph}.{metric}")
+                    delta += " !"
+            base_p50 = f"{base['p50']:.4f}" if base else "-"
+            print(f"{graph:<16} {metric:<20} {value['p50']:>9.4f} {value['p95']:>9.4f} {base_p50:>9} {delta:>8}")
+    return regressions
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--graphs", default=",".join(GRAPHS), help="comma-separated graph names")
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--baselines", default=BASELINES_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--check", action="store_true", help="exit with status 1 when a p50 regresses beyond --tolerance")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p50 slowdown, after calibration (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    # Calibrated before and after the graphs, so that a machine getting busier during the run evens out
+    samples = calibrate()
+    results = {name: bench_graph(name, args.runs, args.warmup) for name in args.graphs.split(",")}
+    calibration = percentiles(samples + calibrate())
+
+    baselines = {}
+    if os.path.exists(args.baselines):
+        with open(args.baselines, encoding="utf-8") as f:
+            baselines = json.load(f)
+    regressions = compare(results, calibration, baselines, args.tolerance)
+
+    if args.save_baseline:
+        baselines.update(results)
+        baselines[CALIBRATION] = calibration
+        os.makedirs(os.path.dirname(args.baselines), exist_ok=True)
+        with open(args.baselines, "w", encoding="utf-8") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+        print(f"Baselines saved to {args.baselines}")
+        return 0
+    if regressions:
+        print(f"Regressions beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+        return 1 if args.check else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
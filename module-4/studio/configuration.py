@@ -0,0 +1,132 @@
+import os
+from dataclasses import dataclass, field, fields
+from typing import Any, Optional, get_args
+
+from langchain_core.runnables import RunnableConfig
+from typing_extensions import Annotated
+
+# Model of each tier; None is the run's model (`model`, else the llm_factory default).
+# Runs that set `model` or `llm_base_url` only get the tiers they set in `model_tiers`
+MODEL_TIERS: dict[str, Optional[str]] = {
+    "small": "llama-3.1-8b-instant",
+    "large": None,
+}
+# Tier of each graph node calling a model; nodes not listed use "large"
+NODE_TIERS: dict[str, str] = {
+    "create_analysts": "large",
+    "ask_question": "large",
+    "plan_search": "small",
+    "answer_question": "large",
+    "write_section": "large",
+    "write_report": "large",
+    "write_introduction": "large",
+    "write_conclusion": "large",
+}
+
+def parse_mapping(value: Any) -> dict[str, str]:
+    """Parse "key=value;other=value" (env / studio input) into a dict; dicts pass through."""
+    if not value:
+        return {}
+    if isinstance(value, dict):
+        return dict(value)
+    mapping = {}
+    for entry in str(value).split(";"):
+        key, _, target = entry.partition("=")
+        if key.strip() and target.strip():
+            mapping[key.strip()] = target.strip()
+    return mapping
+
+def _coerce(value: Any, annotation: Any) -> Any:
+    """Cast env / configurable strings to the field type (the X of Optional[X])."""
+    if not isinstance(value, str):
+        return value
+    target = next((t for t in get_args(annotation) if t is not type(None)), annotation)
+    if target is bool:
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    if target in (int, float):
+        return target(value)
+    return value
+
+def _lookup(configurable: dict, name: str) -> Any:
+    """The run's configurable value, else the NAME environment variable."""
+    value = configurable.get(name)
+    return value if value is not None else os.environ.get(name.upper())
+
+@dataclass(kw_only=True)
+class Configuration:
+    """The configurable fields for the research assistant."""
+    # "parallel" fans interviews out with Send(), "serial" runs them one by one
+    interview_mode: str = "parallel"
+    max_concurrent_interviews: int = 4
+    max_num_turns: int = 2
+    # Reuse the sections of analysts whose persona, topic, models (and base URLs),
+    # retrieval / packing settings and retrieval snapshot are unchanged; the
+    # snapshot defaults to today's date
+    section_cache: bool = True
+    retrieval_snapshot: Optional[str] = None
+    # Plan and run first-turn retrieval for the proposed analysts while the graph
+    # waits at the human_feedback interrupt (see prefetch.py)
+    speculative_prefetch: bool = False
+    # Queries written per interview turn by plan_search, each sent to every retriever
+    num_search_queries: int = 1
+    # Answer from the best local passages (see passage_index), fetching only when
+    # the top passage covers less than passage_min_coverage of the query (idf-weighted
+    # content terms, stopwords excluded)
+    use_passage_index: bool = True
+    passage_top_k: int = 4
+    passage_min_coverage: float = 0.6
+    # Token budgets for the retrieved documents sent to the expert / section writer
+    context_token_budget: int = 3000
+    section_token_budget: int = 6000
+    # Use the ainvoke-based node variants when the graph runs async (langgraph server)
+    async_nodes: bool = True
+    # Forward report tokens on the custom stream while intro / body / conclusion are written.
+    # Streamed calls bypass the LLM response cache (LangChain only consults it on
+    # invoke), so turn this off for the report writers to hit llm_cache as well
+    stream_report: bool = True
+    # Model overrides for this run, unset fields keep the graph defaults (see llm_factory)
+    model: Optional[str] = None
+    temperature: Optional[float] = None
+    max_tokens: Optional[int] = None
+    max_retries: Optional[int] = None
+    llm_timeout: Optional[float] = None
+    llm_cache: Optional[str] = None # "memory", "sqlite" or "off"
+    llm_base_url: Optional[str] = None # e.g. a local model_standin.py for capacity tests
+    # Second model ("groq:<model>" or "mistral:<model>") called when the first has not
+    # answered after its rolling p95 latency, once it has hedge_min_samples calls (see model_router)
+    hedge_model: Optional[str] = None
+    hedge_min_samples: int = 20
+    # Per-run changes to MODEL_TIERS ("small=llama-3.1-8b-instant") and
+    # NODE_TIERS ("plan_search=large;write_section=small"), see model_for
+    model_tiers: Optional[Any] = None
+    node_tiers: Optional[Any] = None
+
+    def model_for(self, node: Optional[str]) -> Optional[str]:
+        """Model of `node`'s tier, None when the node uses the run's model.
+
+        The run's `model_tiers` win; otherwise a run that sets `model` or
+        `llm_base_url` uses that model everywhere, since the default tier
+        models are Groq model names.
+        """
+        run_tiers = parse_mapping(self.model_tiers)
+        defaults = {} if self.model or self.llm_base_url else MODEL_TIERS
+        tiers = {**MODEL_TIERS, **run_tiers}
+        tier = {**NODE_TIERS, **parse_mapping(self.node_tiers)}.get(node, "large")
+        if tier not in tiers:
+            raise ValueError(f"Unknown model tier for node {node}: {tier}")
+        return run_tiers.get(tier, defaults.get(tier))
+
+    @classmethod
+    def from_runnable_config(
+        cls, config: Optional[RunnableConfig] = None
+    ) -> "Configuration":
+        """Create a Configuration instance from a RunnableConfig."""
+        configurable = (
+            config["configurable"] if config and "configurable" in config else {}
+        )
+        values: dict[str, Any] = {
+            f.name: _coerce(_lookup(configurable, f.name), f.type)
+            for f in fields(cls)
+            if f.init
+        }
+        return cls(**{k: v for k, v in values.items() if v is not None})
@@ -0,0 +1,127 @@
+"""Token-budgeted assembly of the interview context.
+
+`InterviewState.context` is a list of formatted retrieval results that grows
+on every search turn (web and Wikipedia alike), so the same page often shows
+up several times. `pack_context` splits those strings back into documents,
+drops repeats by source, ranks what is left by term overlap with the current
+question and keeps the best documents that fit in a token budget.
+
+Token counts are estimated as characters / 4, which is close enough for the
+English prompts used here and needs no tokenizer.
+"""
+import hashlib
+import html
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Iterable
+
+from wikipedia_retrieval import normalize_query
+
+CHARS_PER_TOKEN = 4
+# Smallest truncated document worth sending (tokens)
+MIN_TRUNCATED_TOKENS = 64
+SEPARATOR = "\n\n---\n\n"
+
+_DOCUMENT = re.compile(r"<Document([^>]*?)/?>(.*?)</Document>", re.DOTALL)
+_ATTRIBUTE = re.compile(r'(\w+)="([^"]*)"')
+
+def document_tag(**attributes) -> str:
+    """Opening `<Document .../>` tag; values are escaped so a quote in a title cannot break it."""
+    return "<Document " + " ".join(f'{k}="{html.escape(str(v), quote=True)}"' for k, v in attributes.items()) + "/>"
+
+def estimate_tokens(text: str) -> int:
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+@dataclass
+class ContextDocument:
+    source: str
+    attributes: dict[str, str]
+    content: str
+    position: int
+
+    def render(self, content: str | None = None) -> str:
+        return f"{document_tag(**self.attributes)}\n{(content if content is not None else self.content).strip()}\n</Document>"
+
+@dataclass
+class PackedContext:
+    text: str
+    kept: int = 0
+    dropped: int = 0
+    duplicates: int = 0
+    truncated: int = 0
+    tokens: int = 0
+    sources: list[str] = field(default_factory=list)
+
+def parse_documents(context: Iterable[str]) -> list[ContextDocument]:
+    """Split formatted retrieval results into documents, in retrieval order."""
+    docs = []
+    for chunk in context:
+        matches = list(_DOCUMENT.finditer(chunk))
+        if not matches and chunk.strip():
+            # Free text that was not produced by a retriever: keep it as one document
+            matches = [None]
+        for match in matches:
+            attributes = {k: html.unescape(v) for k, v in _ATTRIBUTE.findall(match.group(1))} if match else {}
+            content = (match.group(2) if match else chunk).strip()
+            if not content or (not attributes and content.startswith("No results for")):
+                continue
+            source = attributes.get("href") or attributes.get("source") or hashlib.sha1(content.encode("utf-8")).hexdigest()
+            if "passage" in attributes:
+                # Passages of one page are distinct documents
+                source += f"#{attributes['passage']}"
+            docs.append(ContextDocument(source, attributes, content, len(docs)))
+    return docs
+
+def _score(query_terms: set[str], doc: ContextDocument) -> float:
+    terms = normalize_query(doc.content).split()
+    if not terms or not query_terms:
+        return 0.0
+    overlap = sum(1 for term in terms if term in query_terms)
+    distinct = len(query_terms & set(terms))
+    # Distinct query terms matter most; frequency breaks ties without favouring long pages
+    return distinct + overlap / len(terms)
+
+_stats_lock = threading.Lock()
+packing_stats = {"calls": 0, "kept": 0, "dropped": 0, "duplicates": 0, "truncated": 0, "tokens": 0}
+
+def pack_context(context: Iterable[str], query: str, token_budget: int) -> PackedContext:
+    """Deduplicate, rank and pack `context` into at most `token_budget` tokens."""
+    docs, seen = [], set()
+    parsed = parse_documents(context)
+    for doc in parsed:
+        if doc.source in seen:
+            continue
+        seen.add(doc.source)
+        docs.append(doc)
+    packed = PackedContext(text="", duplicates=len(parsed) - len(docs))
+
+    query_terms = set(normalize_query(query).split())
+    ranked = sorted(docs, key=lambda d: (-_score(query_terms, d), d.position))
+    separator_tokens = estimate_tokens(SEPARATOR)
+    parts, remaining = [], token_budget
+    for doc in ranked:
+        cost = estimate_tokens(doc.render()) + (separator_tokens if parts else 0)
+        if cost <= remaining:
+            parts.append(doc.render())
+        elif not parts and remaining - estimate_tokens(doc.render("")) >= MIN_TRUNCATED_TOKENS:
+            # The best document alone is over budget: send its beginning rather than nothing.
+            # The room left after its tag (title, URL, ...) must hold a useful excerpt
+            room = remaining - estimate_tokens(doc.render(""))
+            parts.append(doc.render(doc.content[: room * CHARS_PER_TOKEN]))
+            packed.truncated += 1
+            cost = remaining
+        else:
+            packed.dropped += 1
+            continue
+        remaining -= cost
+        packed.kept += 1
+        packed.sources.append(doc.source)
+
+    packed.text = SEPARATOR.join(parts)
+    packed.tokens = token_budget - remaining
+    with _stats_lock:
+        packing_stats["calls"] += 1
+        for key in ("kept", "dropped", "duplicates", "truncated", "tokens"):
+            packing_stats[key] += getattr(packed, key)
+    return packed
@@ -0,0 +1,174 @@
+"""Cleaning stage for web search results.
+
+Tavily `content` often carries navigation text, cookie banners, markdown or
+HTML markup and the same paragraph repeated from several pages. The stage
+below runs on each result before it is indexed or formatted into `context`:
+
+1. markup removal (HTML tags and entities, markdown links / images / emphasis),
+2. Unicode (NFKC) and whitespace normalization,
+3. boilerplate line removal (menus, banners, share / subscribe prompts),
+4. near-duplicate paragraph removal by word-shingle Jaccard similarity,
+   across all the results of one search.
+
+Everything is a generator, so a result is cleaned line by line and yielded as
+soon as it is done. Per-document byte and token savings are logged at DEBUG
+level on the "doc_cleaning" logger and summed in `cleaning_stats`.
+"""
+import html
+import logging
+import re
+import threading
+import unicodedata
+import zlib
+from typing import Iterable, Iterator
+
+from context_packing import estimate_tokens
+
+logger = logging.getLogger("doc_cleaning")
+
+SHINGLE_WORDS = 5
+# Banner / prompt patterns only apply to lines this short (words)
+BOILERPLATE_MAX_WORDS = 12
+# Paragraphs whose shingles overlap an earlier paragraph this much are dropped
+DUPLICATE_JACCARD = 0.8
+
+_SCRIPT = re.compile(r"<(script|style)\b.*?</\1>", re.IGNORECASE | re.DOTALL)
+_TAG = re.compile(r"<[^>]+>")
+_MD_IMAGE = re.compile(r"!\[[^\]]*\]\([^)]*\)")
+_MD_LINK = re.compile(r"\[([^\]]*)\]\([^)]*\)")
+_MD_MARKERS = re.compile(r"^\s*(#{1,6}|>|[-*+]|\d+\.)\s+|[*`]+")
+_URL = re.compile(r"https?://\S+")
+_MENU_SEPARATORS = re.compile(r"\s[|•»›·]\s")
+# Whole-line banners and prompts (with trailing punctuation or arrows); a line
+# that merely starts with one of these words ("Registered voters rose...") is kept
+_BOILERPLATE = re.compile(
+    r"(skip to (main )?content|"
+    r"sign (in|up|out)( (now|here|today|for (free|an account|our newsletter)))?|log ?(in|out)|"
+    r"register( (now|here|today|for free))?|create (an|your) account|"
+    r"subscribe( (now|today|here))?( to (our|the) (newsletter|channel|podcast|mailing list))?|"
+    r"(sign up for|join|get) our newsletter|newsletter|"
+    r"accept (all )?cookies|cookie (policy|settings|preferences)|"
+    r"privacy policy|terms (of (use|service)|(and|&) conditions)|"
+    r"(copyright\s*)?(©|\(c\)).*|copyright \d{4}\b.*|.*\ball rights reserved|"
+    r"share (this( (article|story|post|page))?|on \w+)|follow us( on \w+)?|"
+    r"advertisement|sponsored( (content|links?|post))?|read (more|the full (article|story))|click here\b.*|"
+    r"back to top|related (articles|posts|stories)|you (may|might) also like)"
+    r"[\s.:!»›→>…-]*",
+    re.IGNORECASE,
+)
+# Cookie banners run longer than BOILERPLATE_MAX_WORDS but always open the same way
+_COOKIE_BANNER = re.compile(r"(we|this (site|website)) uses? cookies\b", re.IGNORECASE)
+# Lone navigation entries; other short lines ("AI Act") are headings and kept
+_MENU_ITEM = re.compile(
+    r"(home|about( us)?|contact( us)?|menu|search|blog|news|careers|jobs|faq|help|shop|"
+    r"events|press|login|log in|sign in|more|next|previous|top)[\s.:»›→>-]*",
+    re.IGNORECASE,
+)
+
+def strip_markup(line: str) -> str:
+    line = _MD_IMAGE.sub(" ", line)
+    line = _MD_LINK.sub(r"\1", line)
+    line = _TAG.sub(" ", line)
+    line = _MD_MARKERS.sub(" ", html.unescape(line))
+    return _URL.sub(" ", line)
+
+def normalize_line(line: str) -> str:
+    line = unicodedata.normalize("NFKC", line)
+    return " ".join(line.split())
+
+def is_boilerplate(line: str) -> bool:
+    if len(line.split()) <= BOILERPLATE_MAX_WORDS and _BOILERPLATE.fullmatch(line):
+        return True
+    if _COOKIE_BANNER.match(line):
+        return True
+    # Menus and breadcrumbs: several short items joined by separators
+    if len(_MENU_SEPARATORS.findall(f" {line} ")) >= 2:
+        return True
+    return bool(_MENU_ITEM.fullmatch(line))
+
+def clean_lines(text: str) -> Iterator[str]:
+    """Markup-free, normalized, non-boilerplate lines; "" marks a paragraph break."""
+    for raw in _SCRIPT.sub(" ", text).splitlines():
+        line = normalize_line(strip_markup(raw))
+        if not line:
+            yield ""
+        elif not is_boilerplate(line):
+            yield line
+
+def paragraphs(lines: Iterable[str]) -> Iterator[str]:
+    current = []
+    for line in lines:
+        if line:
+            current.append(line)
+        elif current:
+            yield " ".join(current)
+            current = []
+    if current:
+        yield " ".join(current)
+
+def shingles(paragraph: str) -> set[int]:
+    words = paragraph.lower().split()
+    if len(words) < SHINGLE_WORDS:
+        return {zlib.crc32(" ".join(words).encode("utf-8"))}
+    return {
+        zlib.crc32(" ".join(words[i : i + SHINGLE_WORDS]).encode("utf-8"))
+        for i in range(len(words) - SHINGLE_WORDS + 1)
+    }
+
+class NearDuplicateFilter:
+    """Remembers the shingles of kept paragraphs and rejects near copies."""
+
+    def __init__(self, threshold: float = DUPLICATE_JACCARD):
+        self.threshold = threshold
+        self.seen: list[set[int]] = []
+
+    def is_duplicate(self, paragraph: str) -> bool:
+        current = shingles(paragraph)
+        for previous in self.seen:
+            if len(current & previous) / len(current | previous) >= self.threshold:
+                return True
+        self.seen.append(current)
+        return False
+
+_stats_lock = threading.Lock()
+cleaning_stats = {"documents": 0, "bytes_in": 0, "bytes_out": 0, "tokens_saved": 0, "paragraphs_dropped": 0}
+
+def clean_text(text: str, duplicates: NearDuplicateFilter) -> tuple[str, int]:
+    """Cleaned text and the number of near-duplicate paragraphs removed."""
+    kept, dropped = [], 0
+    for paragraph in paragraphs(clean_lines(text)):
+        if duplicates.is_duplicate(paragraph):
+            dropped += 1
+        else:
+            kept.append(paragraph)
+    return "\n\n".join(kept), dropped
+
+def clean_web_results(results: Iterable[dict]) -> Iterator[dict]:
+    """Yield Tavily-style results with cleaned `content`, dropping those left empty.
+
+    Items that are not result dicts are skipped; a bare string (Tavily's error
+    report) is rejected rather than cleaned character by character.
+    """
+    if isinstance(results, (str, bytes)):
+        raise TypeError(f"Expected a list of search results, got {type(results).__name__}: {results[:200]!r}")
+    duplicates = NearDuplicateFilter()
+    for result in results:
+        if not isinstance(result, dict):
+            logger.debug("skipped a search result of type %s", type(result).__name__)
+            continue
+        raw = result.get("content") or ""
+        content, dropped = clean_text(raw, duplicates)
+        bytes_in, bytes_out = len(raw.encode("utf-8")), len(content.encode("utf-8"))
+        tokens_saved = estimate_tokens(raw) - estimate_tokens(content)
+        logger.debug(
+            "cleaned %s: %d -> %d bytes, %d tokens saved, %d duplicate paragraphs",
+            result.get("url", "?"), bytes_in, bytes_out, tokens_saved, dropped,
+        )
+        with _stats_lock:
+            cleaning_stats["documents"] += 1
+            cleaning_stats["bytes_in"] += bytes_in
+            cleaning_stats["bytes_out"] += bytes_out
+            cleaning_stats["tokens_saved"] += tokens_saved
+            cleaning_stats["paragraphs_dropped"] += dropped
+        if content:
+            yield {**result, "content": content}
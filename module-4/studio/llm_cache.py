@@ -0,0 +1,163 @@
+"""Content-addressed cache for deterministic (temperature=0) model calls.
+
+The cache plugs into LangChain's `BaseCache` hook, so it is consulted by
+`invoke` and by `with_structured_output` alike. LangChain hands us the prompt
+(the serialized messages) and the llm string (model parameters plus the bound
+tools / structured-output schema); both are hashed into the cache key.
+Streamed calls (`stream` / `astream`, e.g. the report writers with
+`stream_report` on) do not go through the hook and are never cached.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.load import dumps, loads
+
+class InMemoryLRUBackend:
+    """Bounded in-process key/value store with per-entry expiry."""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._data: OrderedDict[str, tuple[Optional[float], str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at is not None and expires_at < time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+class SQLiteBackend:
+    """On-disk key/value store with per-entry expiry, shared across processes."""
+
+    def __init__(self, path: str, table: str = "cache"):
+        self.path = path
+        self.table = table
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+            )
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+            if expires_at is not None and expires_at < time.time():
+                with self._conn:
+                    self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                return None
+            return value
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, expires_at),
+            )
+
+    def delete(self, key: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(f"DELETE FROM {self.table}")
+
+def cache_key(prompt: str, llm_string: str) -> str:
+    """Hash of the model parameters, tools / schema and messages of one call."""
+    return hashlib.sha256(f"{llm_string}\x00{prompt}".encode("utf-8")).hexdigest()
+
+class ResponseCache(BaseCache):
+    """LangChain cache storing model generations in a pluggable backend."""
+
+    def __init__(self, backend, ttl: Optional[float] = None):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        value = self.backend.get(cache_key(prompt, llm_string))
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return loads(value)
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        self.backend.set(cache_key(prompt, llm_string), dumps(list(return_val)), self.ttl)
+
+    def clear(self, **kwargs: Any) -> None:
+        self.backend.clear()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            }
+
+_caches: dict[str, ResponseCache] = {}
+_caches_lock = threading.Lock()
+
+def get_response_cache(backend: str = "memory") -> Optional[ResponseCache]:
+    """Process-wide cache for `backend` ("memory", "sqlite" or "off")."""
+    if backend in (None, "", "off", "none"):
+        return None
+    with _caches_lock:
+        if backend not in _caches:
+            ttl = float(os.getenv("LLM_CACHE_TTL", "86400")) or None
+            if backend == "sqlite":
+                store = SQLiteBackend(os.getenv("LLM_CACHE_PATH", ".cache/llm_cache.sqlite"))
+            elif backend == "memory":
+                store = InMemoryLRUBackend(int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1024")))
+            else:
+                raise ValueError(f"Unknown LLM cache backend: {backend}")
+            _caches[backend] = ResponseCache(store, ttl=ttl)
+        return _caches[backend]
+
+def cache_stats() -> dict[str, dict[str, Any]]:
+    with _caches_lock:
+        return {name: cache.stats() for name, cache in _caches.items()}
@@ -0,0 +1,176 @@
+"""Shared chat model factory for the studio graphs.
+
+All graphs served by one langgraph process get their models from here, so they
+share a single keep-alive HTTP connection pool (and, when LLM_REQUESTS_PER_SECOND
+is set, one rate-limit budget per model) instead of each module opening its own
+client at import time.
+"""
+import os
+import threading
+from typing import Any, Optional
+
+import httpx
+from dotenv import load_dotenv
+from langchain_core.rate_limiters import InMemoryRateLimiter
+from langchain_groq import ChatGroq
+
+from llm_cache import get_response_cache
+from replay import get_replay
+from resilience import MAX_RETRIES_HEADER, AsyncResilientTransport, Resilience, ResilientTransport, RetryBudget, parse_fallbacks
+
+# Charge les variables d'environnement depuis le fichier .env
+load_dotenv()
+
+DEFAULT_MODEL = "meta-llama/llama-4-scout-17b-16e-instruct"
+
+# Settings every graph starts from; graphs and runs override them
+DEFAULTS: dict[str, Any] = {
+    "model": DEFAULT_MODEL,
+    "temperature": 0.0,
+    "max_tokens": None,
+    "max_retries": 5,
+    "timeout": 60.0,
+    # OpenAI-compatible endpoint to call instead of the Groq API (e.g. model_standin.py)
+    "base_url": os.getenv("LLM_BASE_URL"),
+    # Response cache backend for deterministic calls: "memory", "sqlite" or "off"
+    "cache": os.getenv("LLM_CACHE", "memory"),
+}
+
+# Configuration attribute read for each setting (per-run override)
+CONFIG_FIELDS = {
+    "model": "model",
+    "temperature": "temperature",
+    "max_tokens": "max_tokens",
+    "max_retries": "max_retries",
+    "timeout": "llm_timeout",
+    "base_url": "llm_base_url",
+    "cache": "llm_cache",
+}
+
+_CASTS = {"temperature": float, "max_tokens": int, "max_retries": int, "timeout": float}
+
+_lock = threading.Lock()
+_http_client: Optional[httpx.Client] = None
+_http_async_client: Optional[httpx.AsyncClient] = None
+_rate_limiters: dict[str, InMemoryRateLimiter] = {}
+_models: dict[tuple, ChatGroq] = {}
+
+# Retries, backoff, circuit breakers and fallbacks of every model call (see
+# resilience.py); the SDK's own retries are turned off in get_llm
+_resilience = Resilience(
+    max_retries=DEFAULTS["max_retries"],
+    base_delay=float(os.getenv("LLM_RETRY_BASE_DELAY", "0.5")),
+    max_delay=float(os.getenv("LLM_RETRY_MAX_DELAY", "20")),
+    budget=RetryBudget(
+        ratio=float(os.getenv("LLM_RETRY_BUDGET_RATIO", "0.2")),
+        min_per_second=float(os.getenv("LLM_RETRY_MIN_PER_SECOND", "1")),
+    ),
+    failure_threshold=int(os.getenv("LLM_BREAKER_FAILURES", "5")),
+    reset_seconds=float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30")),
+    fallbacks=parse_fallbacks(os.getenv("LLM_FALLBACK_MODELS", f"{DEFAULT_MODEL}=llama-3.3-70b-versatile")),
+)
+
+def _pool_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=int(os.getenv("LLM_MAX_CONNECTIONS", "20")),
+        max_keepalive_connections=int(os.getenv("LLM_MAX_KEEPALIVE", "10")),
+        keepalive_expiry=float(os.getenv("LLM_KEEPALIVE_EXPIRY", "30")),
+    )
+
+def http_client() -> httpx.Client:
+    """Process-wide pooled client reused by every sync model call."""
+    global _http_client
+    with _lock:
+        if _http_client is None:
+            _http_client = httpx.Client(
+                transport=ResilientTransport(httpx.HTTPTransport(limits=_pool_limits()), _resilience),
+                timeout=DEFAULTS["timeout"],
+            )
+        return _http_client
+
+def http_async_client() -> httpx.AsyncClient:
+    """Process-wide pooled client reused by every async model call."""
+    global _http_async_client
+    with _lock:
+        if _http_async_client is None:
+            _http_async_client = httpx.AsyncClient(
+                transport=AsyncResilientTransport(httpx.AsyncHTTPTransport(limits=_pool_limits()), _resilience),
+                timeout=DEFAULTS["timeout"],
+            )
+        return _http_async_client
+
+def resilience() -> Resilience:
+    """Retry / circuit breaker policy shared by every model call, with its stats."""
+    return _resilience
+
+def rate_limiter(model: str) -> Optional[InMemoryRateLimiter]:
+    """Rate-limit budget shared by every graph calling `model`.
+
+    None (no client-side limit) unless LLM_REQUESTS_PER_SECOND is set.
+    """
+    requests_per_second = os.getenv("LLM_REQUESTS_PER_SECOND")
+    if not requests_per_second:
+        return None
+    with _lock:
+        if model not in _rate_limiters:
+            _rate_limiters[model] = InMemoryRateLimiter(
+                requests_per_second=float(requests_per_second),
+                check_every_n_seconds=0.1,
+                max_bucket_size=int(os.getenv("LLM_MAX_BURST", "5")),
+            )
+        return _rate_limiters[model]
+
+def resolve_settings(configurable: Any = None, **overrides) -> dict[str, Any]:
+    """Merge defaults, per-graph overrides and the per-run Configuration."""
+    settings = {**DEFAULTS, **{k: v for k, v in overrides.items() if v is not None}}
+    for key, attr in CONFIG_FIELDS.items():
+        value = getattr(configurable, attr, None)
+        if value is not None:
+            settings[key] = value
+    for key, cast in _CASTS.items():
+        if settings.get(key) is not None:
+            settings[key] = cast(settings[key])
+    return settings
+
+def get_llm(configurable: Any = None, **overrides) -> ChatGroq:
+    """Return a ChatGroq bound to the shared pool, reused for identical settings.
+
+    `overrides` are the per-graph settings, `configurable` is a Configuration
+    whose non-empty model fields take precedence for the current run.
+    """
+    settings = resolve_settings(configurable, **overrides)
+    replay = get_replay()
+    key = (*sorted(settings.items()), replay.mode if replay else None)
+    with _lock:
+        model = _models.get(key)
+    if model is not None:
+        return model
+
+    model_kwargs = dict(settings)
+    cache_backend = model_kwargs.pop("cache")
+    # Only temperature=0 calls are deterministic enough to be replayed from cache
+    cache = get_response_cache(cache_backend) if model_kwargs["temperature"] == 0 else None
+    api_key = os.getenv("GROQ_API_KEY")
+    if replay is not None:
+        # Record / replay goes through the cache hook, whatever the temperature;
+        # streaming would bypass it, so calls are made whole
+        cache = replay.llm_cache
+        model_kwargs["disable_streaming"] = True
+        if replay.mode == "replay":
+            api_key = api_key or "replay"
+
+    # Retries happen in the shared transport; the count travels as a header
+    max_retries = model_kwargs.pop("max_retries")
+
+    model = ChatGroq(
+        api_key=api_key,
+        http_client=http_client(),
+        http_async_client=http_async_client(),
+        max_retries=0,
+        default_headers={MAX_RETRIES_HEADER: str(max_retries)},
+        rate_limiter=rate_limiter(model_kwargs["model"]),
+        cache=cache if cache is not None else False,
+        **model_kwargs,
+    )
+    with _lock:
+        return _models.setdefault(key, model)
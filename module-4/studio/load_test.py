@@ -0,0 +1,193 @@
+"""Concurrent load generator for a running LangGraph server.
+
+Drives N research workflows at once through `AdvancedGraphRunner`
+(test_streaming.py), with scripted feedback instead of `input()`, and reports:
+
+- throughput (completed workflows per second),
+- time to first event (first streamed chunk after the run starts),
+- time to interrupt (the analysts are ready for feedback),
+- end-to-end time of a workflow,
+
+as p50 / p95 / p99 over all sessions.
+
+Point it at a local server whose model calls have a controlled latency, for
+example a replayed recording:
+
+    LLM_REPLAY_MODE=replay LLM_REPLAY_LATENCY=lognormal:800,0.4 langgraph dev
+    python load_test.py --concurrency 20 --sessions 100 --script "regenerate;keep 1;approve"
+
+Each `--script` entry answers one feedback cycle ("approve", "keep 1,3",
+"reject 2: more economists", any other text to regenerate); once the script
+is exhausted the session approves.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import sys
+import time
+from typing import Optional
+
+from langgraph_sdk import get_client
+
+from test_streaming import AdvancedGraphRunner
+
+class TimedRuns:
+    """Proxy of `client.runs` that timestamps the first and last chunk of each stream.
+
+    AdvancedGraphRunner prints stream failures and carries on, so they are also
+    recorded in `errors`: exceptions and the server's "error" events.
+    """
+
+    def __init__(self, runs, marks: list[tuple[str, float, float, float]], errors: list[str]):
+        self._runs = runs
+        self.marks = marks
+        self.errors = errors
+
+    def __getattr__(self, name):
+        return getattr(self._runs, name)
+
+    async def _timed(self, stream, kind: str):
+        start, first = time.perf_counter(), None
+        try:
+            async for chunk in stream:
+                if first is None:
+                    first = time.perf_counter()
+                if chunk.event == "error":
+                    self.errors.append(f"{kind} run error: {chunk.data}")
+                yield chunk
+        except Exception as e:
+            self.errors.append(f"{kind} stream failed: {e!r}")
+            raise
+        finally:
+            end = time.perf_counter()
+            self.marks.append((kind, start, first if first is not None else end, end))
+
+    def stream(self, *args, **kwargs):
+        kind = "start" if kwargs.get("input") is not None else "resume"
+        return self._timed(self._runs.stream(*args, **kwargs), kind)
+
+class TimedClient:
+    def __init__(self, client, marks: list, errors: list):
+        self._client = client
+        self.runs = TimedRuns(client.runs, marks, errors)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+class ScriptedGraphRunner(AdvancedGraphRunner):
+    """AdvancedGraphRunner answering feedback from a script and recording timings."""
+
+    def __init__(self, client, script: list[str]):
+        self.marks: list[tuple[str, float, float, float]] = []
+        self.errors: list[str] = []
+        super().__init__(TimedClient(client, self.marks, self.errors))
+        self.script = list(script)
+        self.feedback_cycles = 0
+        self.outcome: Optional[str] = None
+
+    async def get_and_display_state(self, thread_id: str):
+        # The base class prints a failure and returns {}; let it fail the session
+        state = await self.client.threads.get_state(thread_id)
+        return state.get("values", {})
+
+    async def get_user_feedback(self, current_state: dict, cycle_number: int):
+        self.feedback_cycles += 1
+        return self.script.pop(0) if self.script else "approve"
+
+    async def continue_execution(self, thread_id: str, assistant_id: str):
+        self.outcome = await super().continue_execution(thread_id, assistant_id)
+        return self.outcome
+
+    async def display_final_results(self, thread_id: str):
+        pass
+
+async def run_session(client, topic: str, assistant_id: str, script: list[str]) -> dict:
+    runner = ScriptedGraphRunner(client, script)
+    start = time.perf_counter()
+    try:
+        await runner.run_complete_workflow(topic, assistant_id)
+    except Exception as e:
+        runner.errors.append(repr(e))
+    end = time.perf_counter()
+    first_start = next((m for m in runner.marks if m[0] == "start"), None)
+    return {
+        "completed": runner.outcome == "completed",
+        "errors": runner.errors,
+        "feedback_cycles": runner.feedback_cycles,
+        "ttfe_s": first_start[2] - start if first_start else None,
+        "time_to_interrupt_s": first_start[3] - start if first_start else None,
+        "e2e_s": end - start,
+    }
+
+def percentiles(values: list[float]) -> dict[str, float]:
+    values = sorted(v for v in values if v is not None)
+    if not values:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0}
+    return {f"p{q}": round(values[int(q / 100 * (len(values) - 1))], 3) for q in (50, 95, 99)}
+
+async def run_load(url: str, assistant_id: str, topic: str, concurrency: int, sessions: int, script: list[str]) -> dict:
+    client = get_client(url=url)
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one() -> dict:
+        async with slots:
+            return await run_session(client, topic, assistant_id, script)
+
+    start = time.perf_counter()
+    # The runner prints its progress; with many sessions it is only noise
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        results = await asyncio.gather(*(one() for _ in range(sessions)))
+    wall = time.perf_counter() - start
+
+    completed = [r for r in results if r["completed"]]
+    return {
+        "sessions": sessions,
+        "concurrency": concurrency,
+        "completed": len(completed),
+        "failed": sum(1 for r in results if r["errors"]),
+        "errors": sorted({error for r in results for error in r["errors"]}),
+        "wall_s": round(wall, 3),
+        "throughput_per_s": round(len(completed) / wall, 3) if wall else 0.0,
+        "avg_feedback_cycles": round(sum(r["feedback_cycles"] for r in results) / sessions, 2),
+        "ttfe_s": percentiles([r["ttfe_s"] for r in results]),
+        "time_to_interrupt_s": percentiles([r["time_to_interrupt_s"] for r in results]),
+        "e2e_s": percentiles([r["e2e_s"] for r in completed]),
+    }
+
+def print_report(report: dict) -> None:
+    print(f"sessions: {report['sessions']} (concurrency {report['concurrency']}), "
+          f"completed: {report['completed']}, failed: {report['failed']}")
+    print(f"wall: {report['wall_s']} s, throughput: {report['throughput_per_s']} workflows/s, "
+          f"feedback cycles/session: {report['avg_feedback_cycles']}")
+    print(f"{'metric':<22} {'p50 s':>9} {'p95 s':>9} {'p99 s':>9}")
+    for metric in ("ttfe_s", "time_to_interrupt_s", "e2e_s"):
+        values = report[metric]
+        print(f"{metric:<22} {values['p50']:>9.3f} {values['p95']:>9.3f} {values['p99']:>9.3f}")
+    for error in report["errors"]:
+        print(f"error: {error}")
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:2024")
+    parser.add_argument("--assistant", default="research_assistant")
+    parser.add_argument("--topic", default="Intelligence Artificielle et Éthique dans la Société")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--sessions", type=int, help="total workflows to run (default: --concurrency)")
+    parser.add_argument("--script", default="approve", help="feedback for each cycle, separated by ';'")
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args(argv)
+
+    script = [s.strip() for s in args.script.split(";") if s.strip()]
+    report = asyncio.run(run_load(
+        args.url, args.assistant, args.topic, args.concurrency, args.sessions or args.concurrency, script,
+    ))
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0 if report["completed"] else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
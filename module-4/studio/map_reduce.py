@@ -8,6 +8,7 @@ from langchain_openai import ChatOpenAI
 
 from langgraph.constants import Send
 from langgraph.graph import END, StateGraph, START
+from tracing import traced
 
 # Prompts we will use
 subjects_prompt = """Generate a list of 3 sub-topics that are all related to this overall topic: {topic}."""
@@ -25,18 +26,16 @@ from dotenv import load_dotenv
 from langchain_groq import ChatGroq
 import os
 
+import llm_factory
+
 # Charge les variables d'environnement depuis le fichier .env
 load_dotenv()
 
 # Récupère ta clé d'API Groq
 api_key = os.getenv("GROQ_API_KEY")
 
-# Initialisation du modèle ChatGroq avec ton modèle préféré
-model = ChatGroq(
-    model="meta-llama/llama-4-scout-17b-16e-instruct",
-    temperature=0,
-    api_key=api_key
-)
+# Modèle partagé (pool HTTP et rate limit communs aux graphes du serveur)
+model = llm_factory.get_llm()
 
 # Define the state
 class Subjects(BaseModel):
@@ -60,6 +59,7 @@ class OverallState(TypedDict):
     jokes: Annotated[list, operator.add]
     best_selected_joke: str
 
+@traced
 def generate_topics(state: OverallState):
     prompt = subjects_prompt.format(topic=state["topic"])
     response = model.with_structured_output(Subjects).invoke(prompt)
@@ -71,11 +71,13 @@ class JokeState(TypedDict):
 class Joke(BaseModel):
     joke: str
 
+@traced
 def generate_joke(state: JokeState):
     prompt = joke_prompt.format(subject=state["subject"])
     response = model.with_structured_output(Joke).invoke(prompt)
     return {"jokes": [response.joke]}
 
+@traced
 def best_joke(state: OverallState):
     jokes = "\n\n".join(state["jokes"])
     prompt = best_joke_prompt.format(topic=state["topic"], jokes=jokes)
@@ -0,0 +1,290 @@
+"""Hedged model calls across providers, to cut tail latency.
+
+A few slow generations (queueing at the provider, a long retry) can set the
+pace of a whole report. `HedgedChatModel` sends each call to its primary
+model and, if no answer has arrived after the primary's rolling p95 latency,
+sends the same call to a secondary model (another Groq model or Mistral).
+The first answer wins and the other call is cancelled (async) or its result
+dropped (sync). A failed primary call goes to the secondary right away.
+
+Latencies are kept per provider and call kind (the graph node) in a rolling
+window (`get_latency_tracker`), so short query-planning calls do not set the
+hedge delay of long report-writing calls. Until a provider has `min_samples`
+calls of a kind, those calls are not hedged. An async primary cancelled
+because the secondary won is recorded with the time it had run so far, so
+slow calls still weigh on the p95.
+
+Tools and structured output work as usual: `bind_tools` binds both models.
+Streaming calls go to the primary only.
+"""
+import asyncio
+import contextvars
+import dataclasses
+import os
+import threading
+import time
+from collections import deque
+from urllib.parse import urlparse
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, AsyncIterator, Iterator, Optional
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+import llm_factory
+
+class LatencyTracker:
+    """Rolling window of call latencies per provider / call kind key."""
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self._lock = threading.Lock()
+        self._latencies: dict[str, deque] = {}
+        self.stats = {"calls": 0, "hedged": 0, "hedge_wins": 0, "primary_errors": 0}
+
+    def count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] += 1
+
+    def record(self, provider: str, seconds: float) -> None:
+        with self._lock:
+            self._latencies.setdefault(provider, deque(maxlen=self.window)).append(seconds)
+
+    def quantile(self, provider: str, q: float, min_samples: int = 1) -> Optional[float]:
+        with self._lock:
+            values = sorted(self._latencies.get(provider, ()))
+        if len(values) < max(1, min_samples):
+            return None
+        return values[int(q * (len(values) - 1))]
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        with self._lock:
+            providers = list(self._latencies)
+        return {
+            provider: {
+                "count": len(self._latencies[provider]),
+                "p50_s": round(self.quantile(provider, 0.5), 3),
+                "p95_s": round(self.quantile(provider, 0.95), 3),
+            }
+            for provider in providers
+        }
+
+_tracker: Optional[LatencyTracker] = None
+_executor: Optional[ThreadPoolExecutor] = None
+_lock = threading.Lock()
+
+def get_latency_tracker() -> LatencyTracker:
+    """Process-wide latency statistics, window size HEDGE_WINDOW."""
+    global _tracker
+    with _lock:
+        if _tracker is None:
+            _tracker = LatencyTracker(int(os.getenv("HEDGE_WINDOW", "200")))
+        return _tracker
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=int(os.getenv("HEDGE_WORKERS", "8")), thread_name_prefix="hedge")
+        return _executor
+
+def _as_result(message: BaseMessage) -> ChatResult:
+    return ChatResult(generations=[ChatGeneration(message=message)])
+
+def latency_key(provider: str, kind: Optional[str]) -> str:
+    return f"{provider}/{kind}" if kind else provider
+
+class HedgedChatModel(BaseChatModel):
+    primary: Any
+    secondary: Any
+    primary_name: str
+    secondary_name: str
+    # Call kind (graph node) the latencies are kept for
+    kind: Optional[str] = None
+    min_samples: int = 20
+    quantile: float = 0.95
+
+    @property
+    def _llm_type(self) -> str:
+        return "hedged"
+
+    @property
+    def _identifying_params(self) -> dict[str, Any]:
+        return {"primary": self.primary_name, "secondary": self.secondary_name, "kind": self.kind, "quantile": self.quantile}
+
+    def bind_tools(self, tools, *, tool_choice=None, **kwargs) -> "HedgedChatModel":
+        return self.model_copy(update={
+            "primary": self.primary.bind_tools(tools, tool_choice=tool_choice, **kwargs),
+            "secondary": self.secondary.bind_tools(tools, tool_choice=tool_choice, **kwargs),
+        })
+
+    def _hedge_delay(self) -> Optional[float]:
+        return get_latency_tracker().quantile(latency_key(self.primary_name, self.kind), self.quantile, self.min_samples)
+
+    def _call(self, model: Any, provider: str, messages: list[BaseMessage], stop: Optional[list[str]], kwargs: dict) -> BaseMessage:
+        # A losing sync call keeps running in its thread, so it is recorded when it ends
+        start = time.perf_counter()
+        message = model.invoke(messages, stop=stop, **kwargs)
+        get_latency_tracker().record(latency_key(provider, self.kind), time.perf_counter() - start)
+        return message
+
+    async def _acall(self, model: Any, provider: str, messages: list[BaseMessage], stop: Optional[list[str]], kwargs: dict) -> BaseMessage:
+        start = time.perf_counter()
+        try:
+            message = await model.ainvoke(messages, stop=stop, **kwargs)
+        except asyncio.CancelledError:
+            # Lost the race: the time so far is a lower bound of its latency
+            get_latency_tracker().record(latency_key(provider, self.kind), time.perf_counter() - start)
+            raise
+        get_latency_tracker().record(latency_key(provider, self.kind), time.perf_counter() - start)
+        return message
+
+    def _submit(self, model: Any, provider: str, messages, stop, kwargs):
+        # Each call runs in its own copy of the context (callbacks, tracing)
+        context = contextvars.copy_context()
+        return _get_executor().submit(context.run, self._call, model, provider, messages, stop, kwargs)
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        tracker = get_latency_tracker()
+        tracker.count("calls")
+        primary = self._submit(self.primary, self.primary_name, messages, stop, kwargs)
+        try:
+            return _as_result(primary.result(timeout=self._hedge_delay()))
+        except FutureTimeoutError:
+            tracker.count("hedged")
+        except Exception:
+            tracker.count("primary_errors")
+
+        # The primary stays in the race: it may still answer first
+        pending = {primary, self._submit(self.secondary, self.secondary_name, messages, stop, kwargs)}
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    error = future.exception()
+                    continue
+                if future is not primary:
+                    tracker.count("hedge_wins")
+                # A running call cannot be interrupted; its answer is dropped
+                for other in pending:
+                    other.cancel()
+                return _as_result(future.result())
+        raise error
+
+    async def _agenerate(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        tracker = get_latency_tracker()
+        tracker.count("calls")
+        primary = asyncio.ensure_future(self._acall(self.primary, self.primary_name, messages, stop, kwargs))
+        done, _ = await asyncio.wait({primary}, timeout=self._hedge_delay())
+        if primary in done:
+            if primary.exception() is None:
+                return _as_result(primary.result())
+            tracker.count("primary_errors")
+        else:
+            tracker.count("hedged")
+
+        secondary = asyncio.ensure_future(self._acall(self.secondary, self.secondary_name, messages, stop, kwargs))
+        pending = {primary, secondary}
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is not None:
+                    error = task.exception()
+                    continue
+                if task is secondary:
+                    tracker.count("hedge_wins")
+                for other in pending:
+                    other.cancel()
+                return _as_result(task.result())
+        raise error
+
+    def _stream(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        for chunk in self.primary.stream(messages, stop=stop, **kwargs):
+            yield ChatGenerationChunk(message=chunk if isinstance(chunk, AIMessageChunk) else AIMessageChunk(content=chunk.content))
+
+    async def _astream(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        async for chunk in self.primary.astream(messages, stop=stop, **kwargs):
+            yield ChatGenerationChunk(message=chunk if isinstance(chunk, AIMessageChunk) else AIMessageChunk(content=chunk.content))
+
+_secondaries: dict[tuple, Any] = {}
+
+def provider_name(model: Any) -> str:
+    """Latency label of a llm_factory model: "groq:<model>", or "<host>:<model>" for another base URL."""
+    base_url = getattr(model, "groq_api_base", None)
+    host = (urlparse(base_url).netloc or base_url) if base_url else "groq"
+    return f"{host}:{model.model_name}"
+
+def secondary_model(spec: str, configurable: Any = None, **overrides) -> tuple[str, Any]:
+    """Provider name and model for a "provider:model" spec ("groq:..." or "mistral:...")."""
+    provider, _, model = spec.partition(":") if ":" in spec else ("groq", "", spec)
+    name = f"{provider}:{model}"
+    if provider == "groq":
+        if configurable is not None:
+            configurable = dataclasses.replace(configurable, model=model)
+        secondary = llm_factory.get_llm(configurable, **{**overrides, "model": model})
+        return provider_name(secondary), secondary
+    if provider != "mistral":
+        raise ValueError(f"Unknown hedge provider: {provider}")
+
+    settings = llm_factory.resolve_settings(configurable, **overrides)
+    key = (name, settings["temperature"], settings["max_tokens"], settings["timeout"])
+    with _lock:
+        if key in _secondaries:
+            return name, _secondaries[key]
+    try:
+        from langchain_mistralai import ChatMistralAI
+    except ImportError as e:
+        raise ImportError("Hedging to Mistral needs the langchain-mistralai package") from e
+    secondary = ChatMistralAI(
+        model=model,
+        api_key=os.getenv("MISTRAL_API_KEY"),
+        temperature=settings["temperature"],
+        max_tokens=settings["max_tokens"],
+        timeout=settings["timeout"],
+        max_retries=settings["max_retries"],
+    )
+    with _lock:
+        return name, _secondaries.setdefault(key, secondary)
+
+def hedged(
+    primary: Any, spec: str, configurable: Any = None, min_samples: int = 20, kind: Optional[str] = None, **overrides
+) -> HedgedChatModel:
+    """Wrap a llm_factory model so that slow `kind` calls are hedged to the `spec` model."""
+    secondary_name, secondary = secondary_model(spec, configurable, **overrides)
+    return HedgedChatModel(
+        primary=primary,
+        secondary=secondary,
+        primary_name=provider_name(primary),
+        secondary_name=secondary_name,
+        kind=kind,
+        min_samples=min_samples,
+    )
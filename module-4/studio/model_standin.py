@@ -0,0 +1,333 @@
+"""Local stand-in for the Groq / OpenAI chat-completions API.
+
+Answers POST .../chat/completions like the real service, so the graphs can be
+load-tested without an API key or quota:
+
+- forced tool calls (`with_structured_output`, trustcall) return arguments
+  generated from the tool's JSON schema, so `Perspectives`, `SearchQueries`,
+  `Subjects`, `BestJoke`, `Profile`, `ToDo`, ... all validate,
+- `response_format` json_schema requests get JSON content for the schema,
+- everything else gets filler text of --completion-tokens tokens,
+- `stream: true` is answered with server-sent events, one token per chunk.
+
+Latency is a time to first token (--latency, same specs as LLM_REPLAY_LATENCY
+in replay.py: "fixed:300", "uniform:100,400", "lognormal:400,0.5") plus the
+completion length divided by --tokens-per-second. Requests beyond --rpm per
+model, and a random --error-rate fraction, get a 429 with Retry-After.
+
+    python model_standin.py --port 8765 --latency lognormal:400,0.5 --rpm 300
+    LLM_BASE_URL=http://127.0.0.1:8765 langgraph dev
+
+or set `llm_base_url` in the run configuration.
+"""
+import argparse
+import itertools
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Optional
+
+from replay import LatencyModel
+
+FILLER = (
+    "The evidence points to a consistent pattern across sources with practical "
+    "implications for design, cost and adoption that deserve closer study"
+).split()
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+class SchemaExample:
+    """Builds a value that validates against a JSON schema (pydantic / OpenAI tool flavour)."""
+
+    def __init__(self, schema: dict):
+        self.defs = {**schema.get("definitions", {}), **schema.get("$defs", {})}
+        self.counter = itertools.count(1)
+
+    def build(self, schema: dict, key: str = "value") -> Any:
+        if "$ref" in schema:
+            return self.build(self.defs[schema["$ref"].rsplit("/", 1)[-1]], key)
+        if "default" in schema and schema["default"] is not None:
+            return schema["default"]
+        if "const" in schema:
+            return schema["const"]
+        if "enum" in schema:
+            return schema["enum"][0]
+        for combinator in ("anyOf", "oneOf", "allOf"):
+            if combinator in schema:
+                options = [s for s in schema[combinator] if s.get("type") != "null"] or schema[combinator]
+                return self.build(options[0], key)
+        kind = schema.get("type", "object" if "properties" in schema else "string")
+        if isinstance(kind, list):
+            kind = next((k for k in kind if k != "null"), "null")
+        if kind == "object":
+            return {name: self.build(prop, name) for name, prop in schema.get("properties", {}).items()}
+        if kind == "array":
+            count = max(schema.get("minItems", 0), min(schema.get("maxItems", 2), 2))
+            return [self.build(schema.get("items", {}), key) for _ in range(count)]
+        if kind == "integer":
+            return int(schema.get("minimum", 0))
+        if kind == "number":
+            return float(schema.get("minimum", 0))
+        if kind == "boolean":
+            return False
+        if kind == "null":
+            return None
+        if schema.get("format") == "date-time":
+            return time.strftime("%Y-%m-%dT%H:%M:%S")
+        return f"{key.replace('_', ' ')} {next(self.counter)}"
+
+class RateLimiter:
+    """Requests-per-minute token bucket per model."""
+
+    def __init__(self, rpm: float):
+        self.rpm = rpm
+        self._lock = threading.Lock()
+        self._buckets: dict[str, tuple[float, float]] = {}
+
+    def acquire(self, model: str) -> Optional[float]:
+        """None if the request may proceed, else the seconds to wait."""
+        if self.rpm <= 0:
+            return None
+        rate, now = self.rpm / 60, time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.get(model, (self.rpm, now))
+            tokens = min(self.rpm, tokens + (now - last) * rate)
+            if tokens >= 1:
+                self._buckets[model] = (tokens - 1, now)
+                return None
+            self._buckets[model] = (tokens, now)
+            return (1 - tokens) / rate
+
+class StandIn:
+    def __init__(
+        self,
+        latency: LatencyModel,
+        tokens_per_second: float = 200.0,
+        completion_tokens: int = 120,
+        rpm: float = 0,
+        error_rate: float = 0.0,
+        seed: int = 0,
+    ):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.completion_tokens = completion_tokens
+        self.limiter = RateLimiter(rpm)
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "rate_limited": 0, "tool_calls": 0, "streamed": 0}
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] += 1
+
+    def throttle(self, model: str) -> Optional[float]:
+        wait = self.limiter.acquire(model)
+        if wait is None:
+            with self._lock:
+                if self._random.random() < self.error_rate:
+                    wait = 1.0
+        if wait is not None:
+            self._count("rate_limited")
+        return wait
+
+    def _text(self, request: dict) -> str:
+        question = next(
+            (m.get("content") for m in reversed(request.get("messages", [])) if m.get("role") == "user" and isinstance(m.get("content"), str)),
+            "",
+        )
+        words = [f"Stand-in answer to: {' '.join(question.split()[:12])}."]
+        words += list(itertools.islice(itertools.cycle(FILLER), max(0, self.completion_tokens - len(words[0].split()))))
+        return " ".join(words)
+
+    def complete(self, request: dict) -> dict:
+        """The assistant message (content / tool_calls) for a chat-completions request."""
+        self._count("requests")
+        tools = {t["function"]["name"]: t["function"] for t in request.get("tools") or [] if t.get("type") == "function"}
+        choice = request.get("tool_choice")
+        forced = None
+        if isinstance(choice, dict):
+            forced = choice.get("function", {}).get("name")
+        elif choice in ("required", "any") and tools:
+            forced = next(iter(tools))
+        if forced in tools:
+            self._count("tool_calls")
+            parameters = tools[forced].get("parameters", {})
+            arguments = SchemaExample(parameters).build(parameters)
+            return {
+                "role": "assistant",
+                "content": None,
+                "tool_calls": [{
+                    "id": f"call_{uuid.uuid4().hex[:24]}",
+                    "type": "function",
+                    "function": {"name": forced, "arguments": json.dumps(arguments)},
+                }],
+            }
+        response_format = request.get("response_format") or {}
+        if response_format.get("type") == "json_schema":
+            schema = response_format.get("json_schema", {}).get("schema", {})
+            return {"role": "assistant", "content": json.dumps(SchemaExample(schema).build(schema))}
+        if response_format.get("type") == "json_object":
+            return {"role": "assistant", "content": json.dumps({"answer": self._text(request)})}
+        return {"role": "assistant", "content": self._text(request)}
+
+    def first_token_delay(self) -> float:
+        return self.latency.seconds(0.0)
+
+    def token_delay(self) -> float:
+        return 1 / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+
+def usage(request: dict, message: dict) -> dict:
+    prompt = estimate_tokens(json.dumps(request.get("messages", [])))
+    completion = estimate_tokens(message.get("content") or json.dumps(message.get("tool_calls")))
+    return {"prompt_tokens": prompt, "completion_tokens": completion, "total_tokens": prompt + completion}
+
+class Handler(BaseHTTPRequestHandler):
+    server: "StandInServer"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+    def _json(self, status: int, body: dict, headers: Optional[dict] = None) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self) -> None:
+        if self.path.rstrip("/").endswith("/models"):
+            self._json(200, {"object": "list", "data": []})
+        elif self.path.rstrip("/").endswith("/stats"):
+            self._json(200, self.server.standin.stats)
+        else:
+            self._json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        request = json.loads(self.rfile.read(length) or b"{}")
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._json(404, {"error": {"message": f"Unknown path {self.path}"}})
+            return
+        standin = self.server.standin
+        model = request.get("model", "stand-in")
+
+        wait = standin.throttle(model)
+        if wait is not None:
+            self._json(
+                429,
+                {"error": {"message": f"Rate limit reached for model `{model}`. Please try again in {wait:.2f}s.",
+                           "type": "requests", "code": "rate_limit_exceeded"}},
+                {"Retry-After": str(math.ceil(wait)), "x-ratelimit-remaining-requests": "0"},
+            )
+            return
+
+        message = standin.complete(request)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+        finish_reason = "tool_calls" if message.get("tool_calls") else "stop"
+        time.sleep(standin.first_token_delay())
+
+        if request.get("stream"):
+            standin._count("streamed")
+            self._stream(request, message, completion_id, created, model, finish_reason)
+            return
+
+        tokens = estimate_tokens(message.get("content") or json.dumps(message["tool_calls"]))
+        time.sleep(tokens * standin.token_delay())
+        self._json(200, {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "message": message, "logprobs": None, "finish_reason": finish_reason}],
+            "usage": usage(request, message),
+            "system_fingerprint": "stand-in",
+            "x_groq": {"id": completion_id},
+        })
+
+    def _stream(self, request: dict, message: dict, completion_id: str, created: int, model: str, finish_reason: str) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        def send(delta: dict, finish: Optional[str] = None, extra: Optional[dict] = None) -> None:
+            chunk = {
+                "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                "choices": [{"index": 0, "delta": delta, "logprobs": None, "finish_reason": finish}],
+                **(extra or {}),
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        send({"role": "assistant", "content": ""})
+        if message.get("tool_calls"):
+            call = message["tool_calls"][0]
+            time.sleep(estimate_tokens(call["function"]["arguments"]) * self.server.standin.token_delay())
+            send({"tool_calls": [{"index": 0, **call}]})
+        else:
+            words = message["content"].split(" ")
+            for i, word in enumerate(words):
+                time.sleep(self.server.standin.token_delay())
+                send({"content": word if i == 0 else " " + word})
+        send({}, finish_reason, {"x_groq": {"id": completion_id, "usage": usage(request, message)}})
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], standin: StandIn):
+        super().__init__(address, Handler)
+        self.standin = standin
+
+def serve(standin: StandIn, host: str = "127.0.0.1", port: int = 8765) -> StandInServer:
+    """Start the stand-in on a background thread and return the server (call shutdown() to stop)."""
+    server = StandInServer((host, port), standin)
+    threading.Thread(target=server.serve_forever, name="model-standin", daemon=True).start()
+    return server
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", default="fixed:300", help="time to first token, e.g. lognormal:400,0.5")
+    parser.add_argument("--tokens-per-second", type=float, default=200.0)
+    parser.add_argument("--completion-tokens", type=int, default=120, help="length of text answers")
+    parser.add_argument("--rpm", type=float, default=0, help="requests per minute per model before 429 (0: unlimited)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with a 429")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    standin = StandIn(
+        LatencyModel(args.latency, args.seed),
+        tokens_per_second=args.tokens_per_second,
+        completion_tokens=args.completion_tokens,
+        rpm=args.rpm,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    server = StandInServer((args.host, args.port), standin)
+    print(f"Model stand-in listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"Stand-in stats: {standin.stats}")
+
+if __name__ == "__main__":
+    main()
@@ -16,31 +16,33 @@ from dotenv import load_dotenv
 from langchain_groq import ChatGroq
 import os
 
+import llm_factory
+from doc_cleaning import clean_web_results
+from web_search import get_web_search
+from wikipedia_retrieval import get_wikipedia_retriever
+from tracing import traced
+
 # Charge les variables d'environnement depuis le fichier .env
 load_dotenv()
 
 # Récupère ta clé d'API Groq
 api_key = os.getenv("GROQ_API_KEY")
 
-# Initialisation du modèle ChatGroq avec ton modèle préféré
-llm = ChatGroq(
-    model="meta-llama/llama-4-scout-17b-16e-instruct",
-    temperature=0,
-    api_key=api_key
-) 
+# Modèle partagé (pool HTTP et rate limit communs aux graphes du serveur)
+llm = llm_factory.get_llm()
 
 class State(TypedDict):
     question: str
     answer: str
     context: Annotated[list, operator.add]
 
+@traced
 def search_web(state):
     
     """ Retrieve docs from web search """
 
-    # Search
-    tavily_search = TavilySearchResults(max_results=3)
-    search_docs = tavily_search.invoke(state['question'])
+    # Search, then strip markup, boilerplate and repeated paragraphs
+    search_docs = list(clean_web_results(get_web_search().search(state['question'])))
 
      # Format
     formatted_search_docs = "\n\n---\n\n".join(
@@ -52,13 +54,13 @@ def search_web(state):
 
     return {"context": [formatted_search_docs]} 
 
+@traced
 def search_wikipedia(state):
     
     """ Retrieve docs from wikipedia """
 
     # Search
-    search_docs = WikipediaLoader(query=state['question'], 
-                                  load_max_docs=2).load()
+    search_docs = get_wikipedia_retriever().search(state['question'])
 
      # Format
     formatted_search_docs = "\n\n---\n\n".join(
@@ -70,6 +72,7 @@ def search_wikipedia(state):
 
     return {"context": [formatted_search_docs]} 
 
+@traced
 def generate_answer(state):
     
     """ Node to answer a question """
@@ -0,0 +1,371 @@
+"""Local passage index over every document the research graphs have fetched.
+
+Pages and web results are split into passages of a few sentences. Each
+passage is scored against a query with BM25 over hashed terms plus the cosine
+similarity of signed hashed term vectors, so the nodes can send the best few
+passages instead of whole pages, and a question already covered by the
+corpus needs no network call.
+
+The index directory holds one subdirectory per segment, named after the
+range of passage ids it holds ("000000000000-000000000042"):
+
+- passages.jsonl   one {"id", "kind", "source", "title", "text"} object per passage
+- post_terms.npy   hashed term of each posting, sorted
+- post_docs.npy    passage (position in the segment) of each posting
+- post_tfs.npy     term frequency of each posting
+- doc_lens.npy     passage lengths in terms
+- vectors.npy      L2-normalised hashed term vectors, one row per passage
+
+`add` writes new passages as a new segment rather than rewriting the corpus.
+The newest segments are merged while a segment is no larger than the one
+after it, so a passage is rewritten O(log n) times and a search visits
+O(log n) segments. Segments stop growing at max_passages / 8 passages; past
+max_passages the oldest segments are dropped, and their sources can be
+fetched again.
+
+Each passage has a kind ("web", "wikipedia", ...) so a retriever only gets
+back passages of its own kind. The arrays are opened with `mmap_mode="r"`,
+so a large corpus is paged in on demand rather than loaded at startup.
+"""
+import json
+import os
+import re
+import shutil
+import threading
+import zlib
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+import numpy as np
+
+from context_packing import document_tag
+from sources import source_id
+from wikipedia_retrieval import normalize_query
+
+TERM_BUCKETS = 1 << 20
+VECTOR_DIM = 256
+# Target passage size in words
+PASSAGE_WORDS = 120
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Weight of the hashed-vector similarity next to the normalised BM25 score
+VECTOR_WEIGHT = 0.3
+
+ARRAYS = ("post_terms", "post_docs", "post_tfs", "doc_lens", "vectors")
+# Segments hold at most this share of max_passages, the unit of eviction
+SEGMENTS_PER_CORPUS = 8
+_SEGMENT_NAME = re.compile(r"(\d{12})-(\d{12})")
+
+# Left out of queries (English and French, the languages of the research topics):
+# a passage matching only these says nothing about the question
+STOPWORDS = frozenset("""
+a about above after again all also am an and any are as at be because been before being between both but by
+can could did do does doing down during each few for from further had has have having he her here hers him his
+how i if in into is it its itself just me more most my no nor not now of off on once only or other our ours out
+over own same she should so some such than that the their theirs them then there these they this those through
+to too under until up very was we were what when where which while who whom why will with would you your yours
+au aux avec ce ces cette dans de des du elle en est et eux il ils je la le les leur leurs lui ma mais me mes moi
+mon ne nos notre nous on ou par pas pour qu que qui sa se ses son sont sur ta te tes toi ton tu un une vos votre
+vous y à été être d l s c n j
+""".split())
+
+def _hash(term: str) -> int:
+    return zlib.crc32(term.encode("utf-8"))
+
+def tokenize(text: str) -> list[str]:
+    return normalize_query(text).split()
+
+def query_terms(query: str) -> list[str]:
+    """Distinct content terms of a query, stopwords removed."""
+    return sorted(set(tokenize(query)) - STOPWORDS)
+
+def split_passages(text: str, words: int = PASSAGE_WORDS) -> list[str]:
+    """Group paragraphs (then sentences) into passages of about `words` words."""
+    units = []
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = " ".join(paragraph.split())
+        if not paragraph:
+            continue
+        if len(paragraph.split()) <= words:
+            units.append(paragraph)
+        else:
+            units.extend(s for s in re.split(r"(?<=[.!?])\s+", paragraph) if s)
+    passages, current, size = [], [], 0
+    for unit in units:
+        n = len(unit.split())
+        if current and size + n > words:
+            passages.append(" ".join(current))
+            current, size = [], 0
+        current.append(unit)
+        size += n
+    if current:
+        passages.append(" ".join(current))
+    return passages
+
+def _encode(terms: list[str]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Hashed term ids with their counts, and the signed hashed vector of a passage."""
+    hashes = np.fromiter((_hash(t) for t in terms), dtype=np.uint32, count=len(terms))
+    ids, counts = np.unique(hashes % TERM_BUCKETS, return_counts=True)
+    vector = np.zeros(VECTOR_DIM, dtype=np.float32)
+    signs = np.where((hashes >> 31) & 1, -1.0, 1.0).astype(np.float32)
+    np.add.at(vector, hashes % VECTOR_DIM, signs)
+    norm = np.linalg.norm(vector)
+    return ids.astype(np.int32), counts.astype(np.float32), vector / norm if norm else vector
+
+def _postings(passages: list[dict]) -> dict[str, np.ndarray]:
+    """Arrays of a segment holding `passages`, postings sorted by term."""
+    terms, docs, tfs, lens, vectors = [], [], [], [], []
+    for i, passage in enumerate(passages):
+        tokens = tokenize(passage["title"] + " " + passage["text"])
+        ids, counts, vector = _encode(tokens)
+        terms.append(ids)
+        docs.append(np.full(len(ids), i, dtype=np.int32))
+        tfs.append(counts)
+        lens.append(len(tokens))
+        vectors.append(vector)
+    return _sorted({
+        "post_terms": np.concatenate(terms),
+        "post_docs": np.concatenate(docs),
+        "post_tfs": np.concatenate(tfs),
+        "doc_lens": np.asarray(lens, dtype=np.float32),
+        "vectors": np.asarray(vectors, dtype=np.float32).reshape(len(passages), VECTOR_DIM),
+    })
+
+def _merged_postings(segments: list["Segment"]) -> dict[str, np.ndarray]:
+    """Arrays of the concatenation of `segments`, without tokenizing again."""
+    offsets = np.cumsum([0] + [len(segment) for segment in segments[:-1]])
+    return _sorted({
+        "post_terms": np.concatenate([s.arrays["post_terms"] for s in segments]),
+        "post_docs": np.concatenate([s.arrays["post_docs"] + offset for s, offset in zip(segments, offsets)]),
+        "post_tfs": np.concatenate([s.arrays["post_tfs"] for s in segments]),
+        "doc_lens": np.concatenate([s.arrays["doc_lens"] for s in segments]),
+        "vectors": np.vstack([s.arrays["vectors"] for s in segments]),
+    })
+
+def _sorted(arrays: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+    order = np.argsort(arrays["post_terms"], kind="stable")
+    for name in ("post_terms", "post_docs", "post_tfs"):
+        arrays[name] = arrays[name][order]
+    return arrays
+
+class Segment:
+    """Immutable slice of the corpus with its own postings."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        with open(os.path.join(directory, "passages.jsonl"), encoding="utf-8") as f:
+            self.passages = [json.loads(line) for line in f if line.strip()]
+        self.arrays = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r") for name in ARRAYS}
+        self.kinds = np.asarray([p["kind"] for p in self.passages])
+
+    def __len__(self) -> int:
+        return len(self.passages)
+
+    @classmethod
+    def write(cls, parent: str, passages: list[dict], arrays: dict[str, np.ndarray]) -> "Segment":
+        """Write a segment directory in one step: a crash leaves either all of it or a .tmp."""
+        directory = os.path.join(parent, f"{passages[0]['id']:012d}-{passages[-1]['id'] + 1:012d}")
+        tmp = directory + ".tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        with open(os.path.join(tmp, "passages.jsonl"), "w", encoding="utf-8") as f:
+            for passage in passages:
+                f.write(json.dumps(passage, ensure_ascii=False) + "\n")
+        for name, array in arrays.items():
+            np.save(os.path.join(tmp, f"{name}.npy"), array)
+        os.replace(tmp, directory)
+        return cls(directory)
+
+    def postings(self, bucket: int) -> tuple[int, int]:
+        post_terms = self.arrays["post_terms"]
+        return int(np.searchsorted(post_terms, bucket, side="left")), int(np.searchsorted(post_terms, bucket, side="right"))
+
+@dataclass
+class Passage:
+    id: int
+    source: str
+    title: str
+    text: str
+    score: float
+    coverage: float # idf-weighted share of the query's content terms found in the passage
+
+class PassageIndex:
+    """BM25 + hashed-vector passage index persisted as memory-mapped segments."""
+
+    def __init__(self, directory: str, max_passages: int = 200_000):
+        self.directory = directory
+        self.max_passages = max_passages
+        self.max_segment_passages = max(1, max_passages // SEGMENTS_PER_CORPUS)
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        # Replaced, never mutated, so a search can keep using the list it started with
+        self.segments: list[Segment] = []
+        self.sources: set[tuple[str, str]] = set()
+        self.next_id = 0
+        self.stats = {
+            "documents_added": 0, "documents_skipped": 0, "searches": 0, "strong_hits": 0,
+            "segments_merged": 0, "passages_evicted": 0,
+        }
+        self._load()
+
+    def _load(self) -> None:
+        found = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            match = _SEGMENT_NAME.fullmatch(name)
+            if match:
+                found.append((int(match.group(1)), int(match.group(2)), path))
+            elif name.endswith(".tmp") or name.endswith(".npy") or name == "passages.jsonl":
+                # Interrupted segment writes, and the former single-array layout
+                shutil.rmtree(path) if os.path.isdir(path) else os.remove(path)
+        # A merge interrupted before its inputs were deleted leaves them next to the
+        # merged segment: keep the widest segment of each id range
+        found.sort(key=lambda item: (item[0], -item[1]))
+        end = 0
+        for first, last, path in found:
+            if first < end:
+                shutil.rmtree(path)
+                continue
+            self.segments.append(Segment(path))
+            end = last
+        self.next_id = end
+        self.sources = {(p["kind"], p["source"]) for segment in self.segments for p in segment.passages}
+
+    def __len__(self) -> int:
+        return sum(len(segment) for segment in self.segments)
+
+    def add(self, documents: Iterable[dict], kind: str = "") -> int:
+        """Index documents {"source", "title", "content"} of `kind` not seen before; return passages added."""
+        with self._lock:
+            new = []
+            for doc in documents:
+                source = doc.get("source") or ""
+                if not source or (kind, source) in self.sources:
+                    self.stats["documents_skipped"] += 1
+                    continue
+                self.sources.add((kind, source))
+                self.stats["documents_added"] += 1
+                title = doc.get("title") or ""
+                for text in split_passages(doc.get("content") or ""):
+                    new.append({"id": self.next_id, "kind": kind, "source": source, "title": title, "text": text})
+                    self.next_id += 1
+            if not new:
+                return 0
+            self.segments = self.segments + [Segment.write(self.directory, new, _postings(new))]
+            self._merge()
+            self._evict()
+            return len(new)
+
+    def _merge(self) -> None:
+        while len(self.segments) >= 2:
+            older, newer = self.segments[-2:]
+            if len(older) > len(newer) or len(older) + len(newer) > self.max_segment_passages:
+                return
+            merged = Segment.write(self.directory, older.passages + newer.passages, _merged_postings([older, newer]))
+            self.segments = self.segments[:-2] + [merged]
+            # Searches still reading the old arrays keep their (unlinked) mappings
+            shutil.rmtree(older.directory)
+            shutil.rmtree(newer.directory)
+            self.stats["segments_merged"] += 1
+
+    def _evict(self) -> None:
+        total = len(self)
+        while total > self.max_passages and len(self.segments) > 1:
+            oldest, self.segments = self.segments[0], self.segments[1:]
+            total -= len(oldest)
+            # A document's passages are always in one segment
+            self.sources -= {(p["kind"], p["source"]) for p in oldest.passages}
+            shutil.rmtree(oldest.directory)
+            self.stats["passages_evicted"] += len(oldest)
+
+    def search(self, query: str, k: int = 4, kind: Optional[str] = None) -> list[Passage]:
+        """Top `k` passages for `query` (of `kind` only, when given), best first."""
+        with self._lock:
+            segments = self.segments
+            self.stats["searches"] += 1
+        terms = query_terms(query)
+        n = sum(len(segment) for segment in segments)
+        if not n or not terms:
+            return []
+
+        avg_len = sum(float(np.sum(s.arrays["doc_lens"])) for s in segments) / n or 1.0
+        buckets = [_hash(term) % TERM_BUCKETS for term in terms]
+        spans = [[segment.postings(bucket) for bucket in buckets] for segment in segments]
+        # Corpus statistics are over every kind; only the candidates are filtered
+        idfs = []
+        for t in range(len(terms)):
+            df = sum(segment_spans[t][1] - segment_spans[t][0] for segment_spans in spans)
+            idfs.append(float(np.log(1.0 + (n - df + 0.5) / (df + 0.5))))
+        # Coverage weighs each query term by its idf; a term absent from the corpus
+        # gets the highest idf, so a question about something unseen is never covered
+        total_idf = sum(idfs)
+        _, _, query_vector = _encode(terms)
+
+        found = []
+        for segment, segment_spans in zip(segments, spans):
+            doc_lens = np.asarray(segment.arrays["doc_lens"])
+            bm25 = np.zeros(len(segment), dtype=np.float32)
+            matched = np.zeros(len(segment), dtype=np.float32)
+            for (lo, hi), idf in zip(segment_spans, idfs):
+                if lo == hi:
+                    continue
+                docs = np.asarray(segment.arrays["post_docs"][lo:hi])
+                tf = np.asarray(segment.arrays["post_tfs"][lo:hi])
+                bm25[docs] += idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * doc_lens[docs] / avg_len))
+                matched[docs] += idf
+            hit = matched > 0
+            if kind is not None:
+                hit &= segment.kinds == kind
+            candidates = np.flatnonzero(hit)
+            if len(candidates):
+                similarity = np.asarray(segment.arrays["vectors"][candidates]) @ query_vector
+                found.append((segment, candidates, bm25[candidates], matched[candidates], similarity))
+        if not found:
+            return []
+
+        best_bm25 = max(float(bm25.max()) for _, _, bm25, _, _ in found)
+        ranked = [
+            (float(b) / best_bm25 + VECTOR_WEIGHT * float(sim), segment.passages[int(i)], float(m))
+            for segment, candidates, bm25, matched, similarity in found
+            for i, b, m, sim in zip(candidates, bm25, matched, similarity)
+        ]
+        ranked.sort(key=lambda item: (-item[0], item[1]["id"]))
+        return [
+            Passage(
+                id=passage["id"],
+                source=passage["source"],
+                title=passage["title"],
+                text=passage["text"],
+                score=round(score, 4),
+                coverage=round(matched / total_idf, 3),
+            )
+            for score, passage, matched in ranked[:k]
+        ]
+
+    def is_strong(self, hits: list[Passage], k: int, min_coverage: float) -> bool:
+        """Whether `hits` answer the query well enough to skip the network."""
+        strong = len(hits) >= k and hits[0].coverage >= min_coverage
+        if strong:
+            with self._lock:
+                self.stats["strong_hits"] += 1
+        return strong
+
+def format_passages(passages: list[Passage]) -> str:
+    return "\n\n---\n\n".join(
+        f"{document_tag(source=p.source, title=p.title, passage=p.id, id=source_id(p.source))}\n{p.text}\n</Document>"
+        for p in passages
+    )
+
+_index: Optional[PassageIndex] = None
+_index_lock = threading.Lock()
+
+def get_passage_index() -> PassageIndex:
+    """Process-wide index stored in PASSAGE_INDEX_DIR, capped at PASSAGE_INDEX_MAX_PASSAGES."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = PassageIndex(
+                os.getenv("PASSAGE_INDEX_DIR", ".cache/passages"),
+                max_passages=int(os.getenv("PASSAGE_INDEX_MAX_PASSAGES", "200000")),
+            )
+        return _index
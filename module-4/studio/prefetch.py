@@ -0,0 +1,96 @@
+"""Speculative background work started while the graph waits for a human.
+
+The research graph stops at `interrupt_before=['human_feedback']` while a
+reviewer reads the proposed analysts. `Prefetcher` runs retrieval for those
+analysts on a small thread pool during that pause and keeps the results by
+key until the interview asks for them (`take`), or until the analysts are
+rejected (`discard`).
+
+Work is best effort: a failed or cancelled prefetch simply means the
+interview fetches cold, as it would without prefetching.
+"""
+import asyncio
+import os
+import threading
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Iterable, Optional
+
+class Prefetcher:
+    def __init__(self, max_workers: int = 2, wait_seconds: float = 30.0):
+        self.wait_seconds = wait_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch")
+        self._lock = threading.Lock()
+        self._futures: dict[str, Future] = {}
+        self.stats = {"scheduled": 0, "used": 0, "discarded": 0, "failed": 0}
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] += 1
+
+    def schedule(self, key: str, fn: Callable[[], Any]) -> None:
+        """Run `fn` in the background unless `key` is already pending or done."""
+        with self._lock:
+            if key in self._futures:
+                return
+            self._futures[key] = self._executor.submit(fn)
+            self.stats["scheduled"] += 1
+
+    def discard(self, keys: Iterable[str]) -> None:
+        """Drop (and cancel, if not started) the prefetches of rejected work."""
+        with self._lock:
+            futures = [self._futures.pop(key) for key in keys if key in self._futures]
+            self.stats["discarded"] += len(futures)
+        for future in futures:
+            future.cancel()
+
+    def _pop(self, key: str) -> Optional[Future]:
+        with self._lock:
+            return self._futures.pop(key, None)
+
+    def _result(self, future: Future) -> Any:
+        try:
+            result = future.result(timeout=0)
+        except (CancelledError, FutureTimeoutError):
+            return None
+        except Exception:
+            self._count("failed")
+            return None
+        self._count("used")
+        return result
+
+    def take(self, key: str) -> Any:
+        """Result of the prefetch for `key`, waiting up to `wait_seconds`; None if unavailable."""
+        future = self._pop(key)
+        if future is None:
+            return None
+        try:
+            future.result(timeout=self.wait_seconds)
+        except Exception:
+            pass
+        return self._result(future)
+
+    async def atake(self, key: str) -> Any:
+        """Async variant of take."""
+        future = self._pop(key)
+        if future is None:
+            return None
+        try:
+            await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), self.wait_seconds)
+        except Exception:
+            pass
+        return self._result(future)
+
+_prefetcher: Optional[Prefetcher] = None
+_prefetcher_lock = threading.Lock()
+
+def get_prefetcher() -> Prefetcher:
+    """Process-wide prefetcher sized by PREFETCH_WORKERS / PREFETCH_WAIT_SECONDS."""
+    global _prefetcher
+    with _prefetcher_lock:
+        if _prefetcher is None:
+            _prefetcher = Prefetcher(
+                max_workers=int(os.getenv("PREFETCH_WORKERS", "2")),
+                wait_seconds=float(os.getenv("PREFETCH_WAIT_SECONDS", "30")),
+            )
+        return _prefetcher
@@ -1,6 +1,12 @@
+import asyncio
+import dataclasses
+import functools
+import hashlib
 import json
+import logging
 import operator
 import re
+import threading
 from langchain_mistralai import ChatMistralAI
 from pydantic import BaseModel, Field
 from typing import Annotated, List
@@ -9,12 +15,34 @@ from typing_extensions import TypedDict
 from langchain_community.document_loaders import WikipediaLoader
 from langchain_community.tools.tavily_search import TavilySearchResults
 from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, get_buffer_string
+from langchain_core.runnables import RunnableConfig, RunnableLambda
 from langchain_openai import ChatOpenAI
 
 from langgraph.constants import Send
 # from langgraph.graph import Send
+from langgraph.config import get_stream_writer
 from langgraph.graph import END, MessagesState, START, StateGraph
 
+import configuration
+import llm_factory
+import model_router
+from context_packing import document_tag, pack_context, packing_stats
+from doc_cleaning import clean_web_results, cleaning_stats
+from graph_registry import compiled_graphs
+from llm_cache import cache_stats
+from passage_index import format_passages, get_passage_index
+from prefetch import get_prefetcher
+from replay import ReplayMiss
+from section_cache import get_section_cache, persona_hash, section_key
+from sources import collect_sources, format_source_list, renumber, source_id
+import tracing
+from tracing import annotate, traced
+from web_search import get_web_search
+from wikipedia_retrieval import get_wikipedia_retriever, normalize_query
+
+# Run counters go to this logger at DEBUG level (see run_stats)
+logger = logging.getLogger("research_assistant")
+
 ### LLM
 
 from dotenv import load_dotenv
@@ -35,29 +63,39 @@ api_key3 = os.getenv("SK_API_KEY")
 #     temperature=0,
 #     api_key=api_key
 # ) 
-llm = ChatGroq(
-    model="meta-llama/llama-4-scout-17b-16e-instruct",#llama-3.1-8b-instant",#
-    temperature=0,
-    api_key=api_key,
+# Réglages propres à ce graphe, le client HTTP et le rate limit sont partagés (llm_factory)
+LLM_OVERRIDES = dict(
     max_retries=5,           # Plus de retries
     timeout=60.0,            # Timeout plus long
     max_tokens=1000,         # Limiter les tokens
-    request_timeout=30.0,    # Timeout de requête
 )
-
-def trace_node(func):
-    def wrapper(state, *args, **kwargs):
-        node_name = func.__name__
-        print(f"\n➡️ Entering node: {node_name}")
-        # Affiche les clés importantes de l'état
-        keys_to_show = ['analyst', 'analysts', 'completed_interviews', 'human_analyst_feedback']
-        for key in keys_to_show:
-            if key in state:
-                print(f"   {key}: {state[key]}")
-        result = func(state, *args, **kwargs)
-        print(f"✅ Exiting node: {node_name}\n")
-        return result
-    return wrapper
+llm = llm_factory.get_llm(**LLM_OVERRIDES) # llama-3.1-8b-instant
+
+def node_configurable(configurable: configuration.Configuration, node: str | None) -> configuration.Configuration:
+    """The run's Configuration with `model` set to the model of the node's tier."""
+    tier_model = configurable.model_for(node)
+    return dataclasses.replace(configurable, model=tier_model) if tier_model else configurable
+
+def get_model(config: RunnableConfig | None = None, node: str | None = None):
+    """Model for `node` in the current run, with the Configuration overrides applied."""
+    configurable = node_configurable(configuration.Configuration.from_runnable_config(config), node)
+    model = llm_factory.get_llm(configurable, **LLM_OVERRIDES)
+    if configurable.hedge_model:
+        return model_router.hedged(
+            model, configurable.hedge_model, configurable, configurable.hedge_min_samples, kind=node, **LLM_OVERRIDES
+        )
+    return model
+
+def async_node(func, afunc):
+    """Node running `afunc` under ainvoke/astream when `async_nodes` is set, `func` otherwise.
+
+    Sync invocations (graph.invoke) always use `func`.
+    """
+    async def dispatch(state, config: RunnableConfig):
+        if configuration.Configuration.from_runnable_config(config).async_nodes:
+            return await afunc(state, config)
+        return await asyncio.to_thread(func, state, config)
+    return RunnableLambda(func, afunc=dispatch, name=func.__name__)
 
 # from langchain_mistralai import ChatMistralAI
 
@@ -106,22 +144,36 @@ class InterviewState(MessagesState):
     analyst: Analyst # Analyst asking questions
     interview: str # Interview transcript
     sections: list # Final key we duplicate in outer state for Send() API
-
-class SearchQuery(BaseModel):
-    search_query: str = Field(None, description="Search query for retrieval.")
+    search_queries: list # Queries planned for the current turn, shared by the retrievers
+    sources: Annotated[dict, operator.or_] # Citation id -> {url, title} of every retrieved document
+    prefetched: bool # First-turn retrieval was done during the feedback interrupt (see prefetch.py)
+
+class SearchQueries(BaseModel):
+    search_queries: List[str] = Field(
+        default_factory=list,
+        description="Search queries for retrieval, one per distinct angle of the question.",
+    )
 
 class ResearchGraphState(TypedDict):
     topic: str # Research topic
     max_analysts: int # Number of analysts
     human_analyst_feedback: str # Human feedback
     analysts: List[Analyst] # Analyst asking questions
+    kept_analysts: List[Analyst] # Analysts the reviewer kept, only the other slots are regenerated
+    feedback_notes: str # Free-text guidance from the last rejected feedback
+    rejected_analysts: List[Analyst] # Analysts the reviewer rejected by number, never proposed again
     sections: Annotated[list, operator.add] # Send() API key
+    section_digest: str # Sections joined once, shared by the three report writers
+    sources: Annotated[dict, operator.or_] # Citation id -> {url, title}, merged from all interviews
+    source_list: str # Numbered sources cited in the sections, appended to the final report
     introduction: str # Introduction for the final report
     content: str # Content for the final report
     conclusion: str # Conclusion for the final report
     final_report: str # Final report
     retry_count: int 
     next: str # Next step in the process
+    completed_interviews: int # Serial mode progress counter
+    failed_interviews: Annotated[list, operator.add] # Analysts whose interview raised
     # messages: List
 
 ### Nodes and edges
@@ -141,6 +193,51 @@ analyst_instructions="""You are tasked with creating a set of AI analyst persona
 
 5. Assign one analyst to each theme."""
 
+kept_analysts_instructions = """
+
+The reviewer kept these analysts, they are already part of the team:
+
+{kept}
+
+Create only {missing} new analyst(s). Do not repeat the kept analysts and cover themes they do not already cover."""
+
+rejected_analysts_instructions = """
+
+The reviewer rejected these analysts. Do not propose them again, nor analysts with the same name, role or theme:
+
+{rejected}"""
+
+def parse_feedback(feedback: str, count: int) -> tuple[list[int] | None, str]:
+    """Indices (0-based) of the analysts to keep and the free-text guidance.
+
+    Accepted forms: "keep 1,3", "reject 2" (1-based, optionally followed by
+    guidance after a newline, ":" or ";") and JSON such as
+    {"keep": [1, 3], "feedback": "..."} or {"reject": [2]}. Anything else
+    rejects every analyst (None) and is used as guidance as is.
+    """
+    text = (feedback or "").strip()
+    action, numbers, notes = None, [], text
+    if text.startswith("{"):
+        try:
+            data = json.loads(text)
+        except ValueError:
+            data = None
+        if isinstance(data, dict):
+            action = "keep" if "keep" in data else "reject" if "reject" in data else None
+            numbers = [int(n) for n in data.get(action, [])] if action else []
+            notes = str(data.get("feedback", ""))
+    else:
+        match = re.match(r"^(keep|reject)\s+(\d+(?:\s*,\s*\d+)*)\s*[:;\n]?\s*(.*)$", text, re.IGNORECASE | re.DOTALL)
+        if match:
+            action = match.group(1).lower()
+            numbers = [int(n) for n in re.findall(r"\d+", match.group(2))]
+            notes = match.group(3).strip()
+    if action is None:
+        return None, notes
+    selected = {n - 1 for n in numbers if 1 <= n <= count}
+    keep = selected if action == "keep" else set(range(count)) - selected
+    return sorted(keep), notes
+
 from groq import APIError
 from langchain.schema import SystemMessage
 
@@ -172,74 +269,150 @@ from langchain.schema import SystemMessage
 #         print(f"Unexpected error generating analysts: {e}")
 #         return {"analysts": []}
 
-@trace_node
-def create_analysts(state: ResearchGraphState):
+USE_MOCK_DATA = False
+
+def mock_analysts(retry_count: int) -> List[Analyst]:
+    """Canned analysts for offline runs, varied with retry_count to test the feedback loop."""
+    if retry_count == 0:
+        return [
+            Analyst(
+                name="Dr. Sarah Chen",
+                role="AI Ethics Researcher", 
+                affiliation="Stanford University",
+                description="Expert en éthique de l'IA, se concentre sur les biais algorithmiques."
+            ),
+            Analyst(
+                name="Prof. James Wilson",
+                role="Machine Learning Security Specialist",
+                affiliation="MIT",
+                description="Spécialiste de la sécurité des modèles de ML."
+            )
+        ]
+    # Analystes différents pour les tentatives suivantes
+    return [
+        Analyst(
+            name="Dr. Maria Rodriguez",
+            role="AI Governance Expert",
+            affiliation="Oxford University", 
+            description="Experte en gouvernance et régulation de l'IA."
+        ),
+        Analyst(
+            name="Dr. Kevin Liu",
+            role="Algorithmic Fairness Researcher",
+            affiliation="Berkeley",
+            description="Recherche sur l'équité algorithmique et la discrimination."
+        )
+    ]
+
+def analysts_messages(state: ResearchGraphState) -> list:
+    kept = state.get('kept_analysts') or []
+    system_message = analyst_instructions.format(
+        topic=state['topic'],
+        human_analyst_feedback=state.get('human_analyst_feedback') or state.get('feedback_notes') or '',
+        max_analysts=state['max_analysts']
+    )
+    if kept:
+        system_message += kept_analysts_instructions.format(
+            kept="\n\n".join(analyst.persona for analyst in kept),
+            missing=state['max_analysts'] - len(kept),
+        )
+    rejected = state.get('rejected_analysts') or []
+    if rejected:
+        system_message += rejected_analysts_instructions.format(
+            rejected="\n\n".join(analyst.persona for analyst in rejected),
+        )
+    system_message += "\nImportant: RETURN ONLY JSON. DO NOT CALL TOOLS."
+    return [SystemMessage(content=system_message)]
+
+def merge_analysts(state: ResearchGraphState, new: List[Analyst]) -> List[Analyst]:
+    """Kept analysts first, then new ones for the remaining slots."""
+    kept = state.get('kept_analysts') or []
+    return kept + list(new)[: max(0, state['max_analysts'] - len(kept))]
+
+def prefetch_key(topic: str, analyst: Analyst) -> str:
+    return f"{normalize_query(topic)}:{persona_hash(analyst)}"
+
+def prefetch_interview(analyst: Analyst, topic: str, config: RunnableConfig) -> dict:
+    """First-turn query planning and retrieval for one analyst, run during the feedback interrupt."""
+    state = {
+        "analyst": analyst,
+        "messages": [HumanMessage(content=f"Research topic: {topic}"), AIMessage(content=analyst.description)],
+    }
+    state["search_queries"] = plan_search(state, config)["search_queries"]
+    web, wikipedia = search_web(state, config), search_wikipedia(state, config)
+    return {"context": web["context"] + wikipedia["context"], "sources": {**web["sources"], **wikipedia["sources"]}}
+
+def schedule_prefetch(topic: str, analysts: List[Analyst], config: RunnableConfig) -> None:
+    if not configuration.Configuration.from_runnable_config(config).speculative_prefetch:
+        return
+    # Only the run settings: callbacks and graph internals belong to the node that has returned
+    configurable = {k: v for k, v in (config or {}).get("configurable", {}).items() if not k.startswith("__")}
+    background = {"configurable": configurable}
+    for analyst in analysts:
+        get_prefetcher().schedule(
+            prefetch_key(topic, analyst),
+            lambda analyst=analyst: prefetch_interview(analyst, topic, background),
+        )
+
+def prefetches_interviews(func):
+    """Start speculative retrieval for the analysts a create_analysts variant returns."""
+    if asyncio.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(state, config: RunnableConfig | None = None):
+            result = await func(state, config)
+            schedule_prefetch(state["topic"], result.get("analysts", []), config)
+            return result
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(state, config: RunnableConfig | None = None):
+        result = func(state, config)
+        schedule_prefetch(state["topic"], result.get("analysts", []), config)
+        return result
+    return wrapper
+
+@traced
+@prefetches_interviews
+def create_analysts(state: ResearchGraphState, config: RunnableConfig | None = None):
     """Create analysts safely, prevent any tool calls."""
     
-    topic = state['topic']
-    max_analysts = state['max_analysts']
-    human_analyst_feedback = state.get('human_analyst_feedback', '')
     retry_count = state.get('retry_count', 0)
+    kept = state.get('kept_analysts') or []
+    # Analystes conservés: seuls les emplacements rejetés sont régénérés
+    done = {"kept_analysts": [], "retry_count": retry_count + 1}
+
+    if len(kept) >= state['max_analysts']:
+        return {"analysts": kept, **done}
 
-    USE_MOCK_DATA = False
-    
     if USE_MOCK_DATA:
         print(f"📋 MODE TEST: Création d'analystes (tentative {retry_count + 1})")
-        
-        # Varier les analystes selon le retry_count pour tester le feedback
-        if retry_count == 0:
-            mock_analysts = [
-                Analyst(
-                    name="Dr. Sarah Chen",
-                    role="AI Ethics Researcher", 
-                    affiliation="Stanford University",
-                    description="Expert en éthique de l'IA, se concentre sur les biais algorithmiques."
-                ),
-                Analyst(
-                    name="Prof. James Wilson",
-                    role="Machine Learning Security Specialist",
-                    affiliation="MIT",
-                    description="Spécialiste de la sécurité des modèles de ML."
-                )
-            ]
-        else:
-            # Analystes différents pour les tentatives suivantes
-            mock_analysts = [
-                Analyst(
-                    name="Dr. Maria Rodriguez",
-                    role="AI Governance Expert",
-                    affiliation="Oxford University", 
-                    description="Experte en gouvernance et régulation de l'IA."
-                ),
-                Analyst(
-                    name="Dr. Kevin Liu",
-                    role="Algorithmic Fairness Researcher",
-                    affiliation="Berkeley",
-                    description="Recherche sur l'équité algorithmique et la discrimination."
-                )
-            ]
-        
-        return {"analysts": mock_analysts, "retry_count": retry_count + 1}
+        return {"analysts": merge_analysts(state, mock_analysts(retry_count)), **done}
     
-    else:
-        # Mode réel avec LLM
-        try:
-            structured_llm = llm.with_structured_output(Perspectives)
-            system_message = analyst_instructions.format(
-                topic=topic,
-                human_analyst_feedback=human_analyst_feedback,
-                max_analysts=max_analysts
-            ) + "\nImportant: RETURN ONLY JSON. DO NOT CALL TOOLS."
+    # Mode réel avec LLM. Retries and model fallback happen in the shared transport
+    # (resilience.py): an error reaching this node is final and fails the run rather
+    # than sending the reviewer round the feedback loop with the kept analysts only
+    structured_llm = get_model(config, "create_analysts").with_structured_output(Perspectives)
+    analysts = structured_llm.invoke(analysts_messages(state))
+    print("💬 Réponse brute Mistral:", analysts)
+    return {"analysts": merge_analysts(state, analysts.analysts), **done}
+
+@traced
+@prefetches_interviews
+async def acreate_analysts(state: ResearchGraphState, config: RunnableConfig | None = None):
+    """Async variant of create_analysts."""
 
-            analysts = structured_llm.invoke([SystemMessage(content=system_message)])
-            print("💬 Réponse brute Mistral:", analysts)
-            return {"analysts": analysts.analysts, "retry_count": retry_count + 1}
+    retry_count = state.get('retry_count', 0)
+    kept = state.get('kept_analysts') or []
+    done = {"kept_analysts": [], "retry_count": retry_count + 1}
 
-        except Exception as e:
-            print(f"❌ Erreur LLM: {e}")
-            return {"analysts": [], "retry_count": retry_count + 1}
+    if USE_MOCK_DATA or len(kept) >= state['max_analysts']:
+        return create_analysts(state, config)
+
+    structured_llm = get_model(config, "create_analysts").with_structured_output(Perspectives)
+    analysts = await structured_llm.ainvoke(analysts_messages(state))
+    return {"analysts": merge_analysts(state, analysts.analysts), **done}
 
-# @trace_node
+# @traced
 # def create_analysts(state: ResearchGraphState):
 #     """Create analysts safely, prevent any tool calls."""
     
@@ -300,7 +473,7 @@ def create_analysts(state: ResearchGraphState):
 
 #         return {"analysts": response.analysts, "retry_count": retry_count + 1}
 
-@trace_node
+@traced
 def human_feedback(state: ResearchGraphState):
     feedback = (state.get("human_analyst_feedback") or "").strip().lower()
 
@@ -308,13 +481,27 @@ def human_feedback(state: ResearchGraphState):
         print("DEBUG human_feedback: Approbation -> launch_interviews")
         return {"next": "launch_interviews"}  # ⚡ retour partiel
     else:
-        print("DEBUG human_feedback: Refus -> create_analysts + reset feedback")
+        analysts = state.get("analysts", [])
+        keep, notes = parse_feedback(state.get("human_analyst_feedback") or "", len(analysts))
+        kept = [analysts[i] for i in keep] if keep is not None else []
+        # Analysts rejected by number are excluded from every later proposal; free-text
+        # feedback regenerates the whole team with the guidance instead
+        rejected = list(state.get("rejected_analysts") or [])
+        if keep is not None:
+            rejected += [a for a in analysts if a not in kept and a not in rejected]
+        # Speculative retrieval for the rejected analysts is no longer useful
+        topic = state.get("topic", "")
+        get_prefetcher().discard(prefetch_key(topic, a) for a in analysts if a not in kept)
+        print(f"DEBUG human_feedback: Refus -> create_analysts ({len(kept)} conservé(s)) + reset feedback")
         return {
             "next": "create_analysts",
-            "human_analyst_feedback": None
+            "human_analyst_feedback": None,
+            "kept_analysts": kept,
+            "feedback_notes": notes,
+            "rejected_analysts": rejected,
         }
 
-@trace_node
+@traced
 def route_after_feedback(state: ResearchGraphState):
     next_step = state.get("next")
     if next_step:
@@ -323,7 +510,7 @@ def route_after_feedback(state: ResearchGraphState):
     print("DEBUG route_after_feedback: aucun 'next' trouvé -> défaut create_analysts")
     return "create_analysts"
 
-@trace_node
+@traced
 def launch_interviews(state: dict):
     """
     Nœud qui initialise et lance les interviews.
@@ -403,7 +590,7 @@ When you are satisfied with your understanding, complete the interview with: "Th
 
 Remember to stay in character throughout your response, reflecting the persona and goals provided to you."""
 
-@trace_node
+@traced
 def ask_question(state: dict, topic: str):
     """
     Nœud qui génère et envoie une question à l'analyste.
@@ -444,81 +631,176 @@ Pay particular attention to the final question posed by the analyst.
 
 Convert this final question into a well-structured web search query""")
 
-@trace_node
-def search_web(state: InterviewState):
-    """Retrieve docs from web search with robust structured output handling."""
-    from langchain_core.messages import get_buffer_string
-    from groq import APIError
-    from langchain_community.tools.tavily_search import TavilySearchResults
-
+def search_query_messages(state: InterviewState, num_queries: int = 1) -> list:
     # Convert messages list to simple text
     conversation_text = get_buffer_string(state['messages'])
-
-    # Prepare structured LLM
-    structured_llm = llm.with_structured_output(SearchQuery)
-
-    # Prepare system + human messages
-    prompt_messages = [
-        SystemMessage(content=str(search_instructions.content)),
+    instructions = str(search_instructions.content)
+    if num_queries > 1:
+        instructions += (
+            f"\n\nWrite {num_queries} different queries covering distinct angles of that question "
+            "(e.g. definitions, recent developments, comparisons)."
+        )
+    return [
+        SystemMessage(content=instructions),
         HumanMessage(content=conversation_text)
     ]
 
-    try:
-        # Invoke LLM with structured output
-        search_query = structured_llm.invoke(prompt_messages)
-    except APIError as e:
-        print("Groq structured output failed:", e)
-        if hasattr(e, "failed_generation"):
-            print("Failed generation details:", e.failed_generation)
-        # Fallback: empty search query
-        search_query = SearchQuery(search_query="")
-
-    # Perform web search with Tavily
-    tavily_search = TavilySearchResults(max_results=3)
-    search_docs = tavily_search.invoke(search_query.search_query or "")
-
-    # Inspect what search_docs contient
-    # print(search_docs)
-
-    # Formatte correctement les documents
-    formatted_search_docs = "\n\n---\n\n".join(
+def format_web_docs(search_docs) -> str:
+    # Tavily renvoie des dicts, mais on tolère aussi des objets
+    def field(doc, key, default=""):
+        return doc.get(key, default) if isinstance(doc, dict) else getattr(doc, key, default)
+    return "\n\n---\n\n".join(
         [
-            f'<Document href="{getattr(doc, "url", "")}"/>\n{getattr(doc, "content", str(doc))}\n</Document>'
+            f'{document_tag(href=field(doc, "url"), id=source_id(field(doc, "url")))}\n{field(doc, "content", str(doc))}\n</Document>'
             for doc in search_docs
         ]
     )
 
-    return {"context": [formatted_search_docs]}
-
-@trace_node
-def search_wikipedia(state: InterviewState):
-    from langchain_core.messages import get_buffer_string
-    from groq import APIError
-
-    conversation_text = get_buffer_string(state['messages'])
-    structured_llm = llm.with_structured_output(SearchQuery)
-    prompt = [SystemMessage(content=str(search_instructions.content)),
-              HumanMessage(content=conversation_text)]
+def format_wikipedia_docs(docs, q: str) -> str:
+    if not docs:
+        return f"<Document>No results for {q}</Document>"
+    return "\n\n---\n\n".join(
+        f'{document_tag(source=d.metadata.get("source",""), page=d.metadata.get("page",""), title=d.metadata.get("title",""), id=source_id(d.metadata.get("source","")))}\n{d.page_content}\n</Document>'
+        for d in docs
+    )
 
+# Failures of the structured planning call that fall back to the retrievers' defaults:
+# API errors, and answers that do not parse as SearchQueries (more frequent on the
+# small tier), raised as OutputParserException, ValidationError or plain ValueError
+QUERY_PLANNING_ERRORS = (APIError, ValueError)
+
+def report_query_error(e: Exception) -> SearchQueries:
+    print("⚠️ Groq structured output failed:", e)
+    if hasattr(e, "failed_generation"):
+        print("Failed generation details:", e.failed_generation)
+    # Fallback: no planned query, the retrievers use their defaults
+    return SearchQueries(search_queries=[])
+
+def plan_queries(planned: SearchQueries | None, n: int) -> list[str]:
+    queries, seen = [], set()
+    # None: the model answered without calling the SearchQueries tool
+    for query in (planned.search_queries if planned else None) or []:
+        key = normalize_query(query or "")
+        if key and key not in seen:
+            seen.add(key)
+            queries.append(query.strip())
+    return queries[:n]
+
+@traced
+def plan_search(state: InterviewState, config: RunnableConfig):
+    """Write the search queries once per turn, shared by every retriever."""
+    n = max(1, configuration.Configuration.from_runnable_config(config).num_search_queries)
+    structured_llm = get_model(config, "plan_search").with_structured_output(SearchQueries)
     try:
-        search_query = structured_llm.invoke(prompt)
-    except APIError as e:
-        print("⚠️ Groq structured output failed:", e)
-        search_query = SearchQuery(search_query="")
-
-    q = (search_query.search_query or "").strip() or state["analyst"].description
-    docs = WikipediaLoader(query=q, load_max_docs=2).load()
-
-    if not docs:
-        return {"context": [f"<Document>No results for {q}</Document>"]}
+        planned = structured_llm.invoke(search_query_messages(state, n))
+    except QUERY_PLANNING_ERRORS as e:
+        planned = report_query_error(e)
+    return {"search_queries": plan_queries(planned, n)}
+
+@traced
+async def aplan_search(state: InterviewState, config: RunnableConfig):
+    """Async variant of plan_search."""
+    n = max(1, configuration.Configuration.from_runnable_config(config).num_search_queries)
+    structured_llm = get_model(config, "plan_search").with_structured_output(SearchQueries)
+    try:
+        planned = await structured_llm.ainvoke(search_query_messages(state, n))
+    except QUERY_PLANNING_ERRORS as e:
+        planned = report_query_error(e)
+    return {"search_queries": plan_queries(planned, n)}
+
+def web_records(results) -> list[dict]:
+    return [
+        {"source": r.get("url", ""), "title": r.get("title", ""), "content": r.get("content", "")}
+        for r in results if isinstance(r, dict)
+    ]
 
-    formatted = "\n\n---\n\n".join(
-        f'<Document source="{d.metadata.get("source","")}" page="{d.metadata.get("page","")}"/>\n{d.page_content}\n</Document>'
+def wikipedia_records(docs) -> list[dict]:
+    return [
+        {"source": d.metadata.get("source", ""), "title": d.metadata.get("title", ""), "content": d.page_content}
         for d in docs
-    )
-    return {"context": [formatted]}
+    ]
 
+def retrieve(query: str, config: RunnableConfig, kind: str, fetch, to_records, format_results) -> str:
+    """Top `kind` passages for `query` from the local index, fetching only when it has no strong match."""
+    cfg = configuration.Configuration.from_runnable_config(config)
+    if not cfg.use_passage_index:
+        return format_results(fetch(query), query)
+    index = get_passage_index()
+    hits = index.search(query, cfg.passage_top_k, kind)
+    if index.is_strong(hits, cfg.passage_top_k, cfg.passage_min_coverage):
+        return format_passages(hits)
+    results = fetch(query)
+    index.add(to_records(results), kind)
+    hits = index.search(query, cfg.passage_top_k, kind)
+    return format_passages(hits) if hits else format_results(results, query)
+
+async def aretrieve(query: str, config: RunnableConfig, kind: str, afetch, to_records, format_results) -> str:
+    """Async variant of retrieve."""
+    cfg = configuration.Configuration.from_runnable_config(config)
+    if not cfg.use_passage_index:
+        return format_results(await afetch(query), query)
+    index = get_passage_index()
+    hits = index.search(query, cfg.passage_top_k, kind)
+    if index.is_strong(hits, cfg.passage_top_k, cfg.passage_min_coverage):
+        return format_passages(hits)
+    results = await afetch(query)
+    # Indexing writes the arrays to disk, keep it off the event loop
+    await asyncio.to_thread(index.add, to_records(results), kind)
+    hits = index.search(query, cfg.passage_top_k, kind)
+    return format_passages(hits) if hits else format_results(results, query)
+
+def fetch_web(query: str) -> list[dict]:
+    # Cached, identical in-flight queries are coalesced; markup and boilerplate are stripped
+    return list(clean_web_results(get_web_search().search(query)))
+
+async def afetch_web(query: str) -> list[dict]:
+    return list(clean_web_results(await get_web_search().asearch(query)))
+
+@traced
+def search_web(state: InterviewState, config: RunnableConfig):
+    """Retrieve passages from web search for the planned queries."""
+
+    queries = state.get("search_queries") or [""]
+    context = [
+        retrieve(q, config, "web", fetch_web, web_records, lambda docs, q: format_web_docs(docs))
+        for q in queries
+    ]
+    return {"context": context, "sources": collect_sources(context)}
+
+@traced
+async def asearch_web(state: InterviewState, config: RunnableConfig):
+    """Async variant of search_web."""
+
+    queries = state.get("search_queries") or [""]
+    context = await asyncio.gather(*(
+        aretrieve(q, config, "web", afetch_web, web_records, lambda docs, q: format_web_docs(docs))
+        for q in queries
+    ))
+    return {"context": list(context), "sources": collect_sources(context)}
+
+@traced
+def search_wikipedia(state: InterviewState, config: RunnableConfig):
+    """Retrieve Wikipedia passages for the planned queries."""
+
+    retriever = get_wikipedia_retriever()
+    queries = state.get("search_queries") or [state["analyst"].description]
+    context = [
+        retrieve(q, config, "wikipedia", retriever.search, wikipedia_records, format_wikipedia_docs)
+        for q in queries
+    ]
+    return {"context": context, "sources": collect_sources(context)}
+
+@traced
+async def asearch_wikipedia(state: InterviewState, config: RunnableConfig):
+    """Async variant of search_wikipedia."""
 
+    retriever = get_wikipedia_retriever()
+    queries = state.get("search_queries") or [state["analyst"].description]
+    context = await asyncio.gather(*(
+        aretrieve(q, config, "wikipedia", retriever.asearch, wikipedia_records, format_wikipedia_docs)
+        for q in queries
+    ))
+    return {"context": list(context), "sources": collect_sources(context)}
 
 # Generate expert answer
 answer_instructions = """You are an expert being interviewed by an analyst.
@@ -549,7 +831,7 @@ When answering questions, follow these guidelines:
         
 And skip the addition of the brackets as well as the Document source preamble in your citation."""
 
-# @trace_node
+# @traced
 # def generate_answer_(state: InterviewState):
     
 #     """ Node to answer a question """
@@ -571,10 +853,24 @@ And skip the addition of the brackets as well as the Document source preamble in
 #     # Append it to state
 #     return {"messages": [answer]}
 
-@trace_node
-def generate_answer(state: InterviewState):
-    """Node to answer a question safely for Mistral (no assistant last message)"""
-    
+def current_question(state: InterviewState) -> str:
+    """Latest analyst turn, used to rank the retrieved documents."""
+    for message in reversed(state.get("messages", [])):
+        if message.name != "expert":
+            return str(message.content)
+    return ""
+
+def packed_context(state: InterviewState, query: str, token_budget: int) -> str:
+    packed = pack_context(state["context"], query, token_budget)
+    annotate(**{
+        "context.kept": packed.kept,
+        "context.dropped": packed.dropped,
+        "context.duplicates": packed.duplicates,
+        "context.tokens": packed.tokens,
+    })
+    return packed.text
+
+def answer_messages(state: InterviewState, config: RunnableConfig) -> list:
     analyst = state.get("analyst")
     if not analyst:
         raise ValueError("Missing 'analyst' in local state for this interview")
@@ -582,18 +878,32 @@ def generate_answer(state: InterviewState):
     # Filtrer uniquement les HumanMessage
     human_messages = [m for m in state["messages"] if isinstance(m, HumanMessage)]
     
-    # Préparer le message système
-    system_message = answer_instructions.format(goals=analyst.persona, context=state["context"])
+    # Préparer le message système (sources dédupliquées, classées et bornées en tokens)
+    budget = configuration.Configuration.from_runnable_config(config).context_token_budget
+    context = packed_context(state, current_question(state), budget)
+    system_message = answer_instructions.format(goals=analyst.persona, context=context)
+    return [SystemMessage(content=system_message)] + human_messages
+
+@traced
+def generate_answer(state: InterviewState, config: RunnableConfig):
+    """Node to answer a question safely for Mistral (no assistant last message)"""
     
     # Appel au LLM
-    answer = llm.invoke([SystemMessage(content=system_message)] + human_messages)
+    answer = get_model(config, "answer_question").invoke(answer_messages(state, config))
     
     # Nommer le message comme venant de l'expert
     answer.name = "expert"
     
     return {"messages": [answer]}
 
-@trace_node
+@traced
+async def agenerate_answer(state: InterviewState, config: RunnableConfig):
+    """Async variant of generate_answer."""
+    answer = await get_model(config, "answer_question").ainvoke(answer_messages(state, config))
+    answer.name = "expert"
+    return {"messages": [answer]}
+
+@traced
 def save_interview(state: InterviewState):
     
     """ Save interviews """
@@ -607,7 +917,14 @@ def save_interview(state: InterviewState):
     # Save to interviews key
     return {"interview": interview}
 
-@trace_node
+@traced
+def route_after_question(state: InterviewState, name: str = "expert"):
+    """Plan and run retrieval, except on the first turn of a prefetched interview."""
+    first_turn = not any(isinstance(m, AIMessage) and m.name == name for m in state["messages"])
+    if first_turn and state.get("prefetched"):
+        return "answer_question"
+    return "plan_search"
+
 def route_messages(state: InterviewState, 
                    name: str = "expert"):
 
@@ -640,7 +957,7 @@ section_writer_instructions = """You are an expert technical writer.
 Your task is to create a short, easily digestible section of a report based on a set of source documents.
 
 1. Analyze the content of the source documents: 
-- The name of each source document is at the start of the document, with the <Document tag.
+- Each source document starts with a <Document tag whose id attribute (e.g. id="src-1a2b3c4d") identifies the source.
         
 2. Create a report structure using markdown formatting:
 - Use ## for the section title
@@ -649,7 +966,6 @@ Your task is to create a short, easily digestible section of a report based on a
 3. Write the report following this structure:
 a. Title (## header)
 b. Summary (### header)
-c. Sources (### header)
 
 4. Make your title engaging based upon the focus area of the analyst: 
 {focus}
@@ -657,55 +973,45 @@ c. Sources (### header)
 5. For the summary section:
 - Set up summary with general background / context related to the focus area of the analyst
 - Emphasize what is novel, interesting, or surprising about insights gathered from the interview
-- Create a numbered list of source documents, as you use them
 - Do not mention the names of interviewers or experts
 - Aim for approximately 400 words maximum
-- Use numbered sources in your report (e.g., [1], [2]) based on information from source documents
+- Cite sources with their document id in brackets, e.g. [src-1a2b3c4d], right after the information they support
+- Do not write a list of sources, it is built from the ids you cite
         
-6. In the Sources section:
-- Include all sources used in your report
-- Provide full links to relevant websites or specific document paths
-- Separate each source by a newline. Use two spaces at the end of each line to create a newline in Markdown.
-- It will look like:
-
-### Sources
-[1] Link or Document name
-[2] Link or Document name
-
-7. Be sure to combine sources. For example this is not correct:
-
-[3] https://ai.meta.com/blog/meta-llama-3-1/
-[4] https://ai.meta.com/blog/meta-llama-3-1/
-
-There should be no redundant sources. It should simply be:
-
-[3] https://ai.meta.com/blog/meta-llama-3-1/
-        
-8. Final review:
+6. Final review:
 - Ensure the report follows the required structure
 - Include no preamble before the title of the report
 - Check that all guidelines have been followed"""
 
-@trace_node
-def write_section(state: InterviewState):
-
-    """ Node to write a section """
-
+def section_messages(state: InterviewState, config: RunnableConfig) -> list:
     # Get state
-    interview = state["interview"]
-    context = state["context"]
     analyst = state.get("analyst")
     if not analyst:
         raise ValueError("Missing 'analyst' in local state for this interview")
+    budget = configuration.Configuration.from_runnable_config(config).section_token_budget
+    context = packed_context(state, analyst.description, budget)
    
     # Write section using either the gathered source docs from interview (context) or the interview itself (interview)
     system_message = section_writer_instructions.format(focus=analyst.description)
-    section = llm.invoke([SystemMessage(content=system_message)]+[HumanMessage(content=f"Use this source to write your section: {context}")]) 
+    return [SystemMessage(content=system_message)]+[HumanMessage(content=f"Use this source to write your section: {context}")]
+
+@traced
+def write_section(state: InterviewState, config: RunnableConfig):
+
+    """ Node to write a section """
+
+    section = get_model(config, "write_section").invoke(section_messages(state, config)) 
                 
     # Append it to state
     return {"sections": [section.content]}
 
-# @trace_node
+@traced
+async def awrite_section(state: InterviewState, config: RunnableConfig):
+    """Async variant of write_section."""
+    section = await get_model(config, "write_section").ainvoke(section_messages(state, config))
+    return {"sections": [section.content]}
+
+# @traced
 # def generate_question_(state: InterviewState):
 #     """Node to generate a question with debug info"""
     
@@ -726,10 +1032,7 @@ def write_section(state: InterviewState):
         
 #     return {"messages": [question]}
 
-@trace_node
-def generate_question(state: InterviewState):
-    """Node to generate a question safely for Mistral"""
-    
+def question_messages(state: InterviewState) -> list:
     if "analyst" not in state:
         raise ValueError("Missing 'analyst' in InterviewState")
     
@@ -740,12 +1043,23 @@ def generate_question(state: InterviewState):
     
     # Préparer le message système
     system_message = question_instructions.format(goals=analyst.persona)
+    return [SystemMessage(content=system_message)] + human_messages
+
+@traced
+def generate_question(state: InterviewState, config: RunnableConfig):
+    """Node to generate a question safely for Mistral"""
     
-    question = llm.invoke([SystemMessage(content=system_message)] + human_messages)
+    question = get_model(config, "ask_question").invoke(question_messages(state))
     
     return {"messages": [question]}
 
-@trace_node
+@traced
+async def agenerate_question(state: InterviewState, config: RunnableConfig):
+    """Async variant of generate_question."""
+    question = await get_model(config, "ask_question").ainvoke(question_messages(state))
+    return {"messages": [question]}
+
+@traced
 def continue_interviews(state: dict):
     """
     Après avoir sauvegardé une interview, retourne vers launch_interviews
@@ -754,17 +1068,19 @@ def continue_interviews(state: dict):
     return launch_interviews(state)
 # Add nodes and edges 
 interview_builder = StateGraph(InterviewState)
-interview_builder.add_node("ask_question", generate_question)
-interview_builder.add_node("search_web", search_web)
-interview_builder.add_node("search_wikipedia", search_wikipedia)
-interview_builder.add_node("answer_question", generate_answer)
+interview_builder.add_node("ask_question", async_node(generate_question, agenerate_question))
+interview_builder.add_node("plan_search", async_node(plan_search, aplan_search))
+interview_builder.add_node("search_web", async_node(search_web, asearch_web))
+interview_builder.add_node("search_wikipedia", async_node(search_wikipedia, asearch_wikipedia))
+interview_builder.add_node("answer_question", async_node(generate_answer, agenerate_answer))
 interview_builder.add_node("save_interview", save_interview)
-interview_builder.add_node("write_section", write_section)
+interview_builder.add_node("write_section", async_node(write_section, awrite_section))
 
 # Flow
 interview_builder.add_edge(START, "ask_question")
-interview_builder.add_edge("ask_question", "search_web")
-interview_builder.add_edge("ask_question", "search_wikipedia")
+interview_builder.add_conditional_edges("ask_question", route_after_question, ["plan_search", "answer_question"])
+interview_builder.add_edge("plan_search", "search_web")
+interview_builder.add_edge("plan_search", "search_wikipedia")
 interview_builder.add_edge("search_web", "answer_question")
 interview_builder.add_edge("search_wikipedia", "answer_question")
 interview_builder.add_conditional_edges("answer_question", route_messages,['ask_question','save_interview'])
@@ -793,7 +1109,7 @@ interview_builder.add_edge("write_section", END)
 # 
 
 # 
-@trace_node
+@traced
 def conduct_interview_(state: ResearchGraphState):
     """Nœud qui gère UN SEUL interview à la fois"""
     analysts = state.get("analysts", [])
@@ -817,7 +1133,7 @@ def conduct_interview_(state: ResearchGraphState):
     }
     
     # Compiler le résultat du sous-graphe
-    interview_result = interview_builder.compile().invoke(interview_state)
+    interview_result = compiled_graphs.get("interview", interview_builder).invoke(interview_state)
     
     # Ajouter la section au rapport principal
     new_sections = state.get("sections", []) + interview_result.get("sections", [])
@@ -828,44 +1144,159 @@ def conduct_interview_(state: ResearchGraphState):
         "completed_interviews": completed_interviews + 1
     }
 
-@trace_node
-def conduct_interview(state: ResearchGraphState):
-    """Nœud qui gère UN SEUL interview à la fois"""
+# Bound the number of interviews running at once, whatever the fan-out width
+_interview_slots: dict[int, threading.BoundedSemaphore] = {}
+_interview_slots_lock = threading.Lock()
+
+def _interview_slot(limit: int) -> threading.BoundedSemaphore:
+    with _interview_slots_lock:
+        if limit not in _interview_slots:
+            _interview_slots[limit] = threading.BoundedSemaphore(max(1, limit))
+        return _interview_slots[limit]
+
+# asyncio variant, one semaphore per event loop and limit
+_async_interview_slots: dict[tuple[int, int], asyncio.Semaphore] = {}
+
+def _async_interview_slot(limit: int) -> asyncio.Semaphore:
+    key = (id(asyncio.get_running_loop()), limit)
+    if key not in _async_interview_slots:
+        _async_interview_slots[key] = asyncio.Semaphore(max(1, limit))
+    return _async_interview_slots[key]
+
+def interview_input(analyst: Analyst, topic: str, max_num_turns: int, warm: dict | None = None) -> dict:
+    """Initial interview state, seeded with prefetched context when there is some.
+
+    With warm context the first turn answers from it and skips its own retrieval.
+    """
+    warm = warm or {}
+    return {
+        "analyst": analyst,
+        "messages": [HumanMessage(content=f"Research topic: {topic}")],
+        "max_num_turns": max_num_turns,
+        "context": list(warm.get("context", [])),
+        "sources": dict(warm.get("sources", {})),
+        "prefetched": bool(warm.get("context")),
+        "interview": "",
+        "sections": []
+    }
+
+INTERVIEW_MODEL_NODES = ("ask_question", "plan_search", "answer_question", "write_section")
+# Editing an interview prompt invalidates the sections written with the old one
+INTERVIEW_PROMPT_VERSION = hashlib.sha256("\x00".join([
+    question_instructions, search_instructions.content, answer_instructions, section_writer_instructions,
+]).encode("utf-8")).hexdigest()[:12]
+# Configuration fields that change what an interview retrieves or writes
+INTERVIEW_SETTINGS = (
+    "max_num_turns", "num_search_queries", "use_passage_index", "passage_top_k",
+    "passage_min_coverage", "context_token_budget", "section_token_budget", "hedge_model",
+)
+
+def interview_cache_key(analyst: Analyst, topic: str, configurable: configuration.Configuration) -> str | None:
+    """Section cache key for this analyst, or None when the cache is disabled."""
+    if not configurable.section_cache:
+        return None
+    settings = {name: getattr(configurable, name) for name in INTERVIEW_SETTINGS}
+    # A section depends on the model of every interview node and on where it is served
+    # from: a run against model_standin.py must not fill the cache of real runs
+    for node in INTERVIEW_MODEL_NODES:
+        llm = llm_factory.resolve_settings(node_configurable(configurable, node), **LLM_OVERRIDES)
+        settings[node] = [llm["model"], llm["base_url"]]
+    settings["prompts"] = INTERVIEW_PROMPT_VERSION
+    return section_key(topic, analyst, configurable.retrieval_snapshot, settings)
+
+def run_interview(analyst: Analyst, topic: str, configurable: configuration.Configuration) -> dict:
+    """Run the interview subgraph for one analyst (or reuse its cached result) and return its sections."""
+    key = interview_cache_key(analyst, topic, configurable)
+    if key and (cached := get_section_cache().get(key)) is not None:
+        if configurable.speculative_prefetch:
+            # The interview will not run: its speculative retrieval would never be taken
+            get_prefetcher().discard([prefetch_key(topic, analyst)])
+        return cached
+    warm = get_prefetcher().take(prefetch_key(topic, analyst)) if configurable.speculative_prefetch else None
+    interview_state = interview_input(analyst, topic, configurable.max_num_turns, warm)
+    interview_result = compiled_graphs.get("interview", interview_builder).invoke(interview_state)
+    result = {"sections": interview_result.get("sections", []), "sources": interview_result.get("sources", {})}
+    if key:
+        get_section_cache().set(key, result)
+    return result
+
+async def arun_interview(analyst: Analyst, topic: str, configurable: configuration.Configuration) -> dict:
+    """Async variant of run_interview, the subgraph then runs its async nodes."""
+    key = interview_cache_key(analyst, topic, configurable)
+    if key and (cached := get_section_cache().get(key)) is not None:
+        if configurable.speculative_prefetch:
+            # The interview will not run: its speculative retrieval would never be taken
+            get_prefetcher().discard([prefetch_key(topic, analyst)])
+        return cached
+    warm = await get_prefetcher().atake(prefetch_key(topic, analyst)) if configurable.speculative_prefetch else None
+    interview_state = interview_input(analyst, topic, configurable.max_num_turns, warm)
+    interview_result = await compiled_graphs.get("interview", interview_builder).ainvoke(interview_state)
+    result = {"sections": interview_result.get("sections", []), "sources": interview_result.get("sources", {})}
+    if key:
+        get_section_cache().set(key, result)
+    return result
+
+@traced
+def conduct_interview(state: ResearchGraphState, config: RunnableConfig):
+    """Nœud qui gère UN SEUL interview à la fois (mode serial)"""
     analysts = state.get("analysts", [])
     completed_interviews = state.get("completed_interviews", 0)
     
     if completed_interviews >= len(analysts):
         # Tous les interviews sont terminés
-        return "write_report"
+        return {"completed_interviews": completed_interviews}
     
     # Analyste actuel
     current_analyst = analysts[completed_interviews]
-    
-    # Préparer l'état pour le sous-graphe d'interview
-    interview_state = {
-        "analyst": current_analyst,
-        "messages": [HumanMessage(content=f"Research topic: {state['topic']}")],
-        "max_num_turns": 2,
-        "context": [],
-        "interview": "",
-        "sections": []
-    }
+    configurable = configuration.Configuration.from_runnable_config(config)
     
     # Lancer le sous-graphe d'interview (ask_question → save_interview → write_section)
-    interview_result = interview_builder.compile().invoke(interview_state)
-    
-    # Ajouter la section au rapport principal
-    new_sections = state.get("sections", []) + interview_result.get("sections", [])
+    # Le reducer operator.add de `sections` se charge d'ajouter la section au rapport
+    try:
+        update = run_interview(current_analyst, state["topic"], configurable)
+    except ReplayMiss:
+        # A replayed run with missing fixtures must fail, not lose a section
+        raise
+    except Exception as e:
+        print(f"❌ Interview failed for {current_analyst.name}: {e}")
+        update = {"sections": [], "failed_interviews": [current_analyst.name]}
     
     # Mettre à jour le compteur pour passer au prochain analyste
-    return {
-        "sections": new_sections,
-        "completed_interviews": completed_interviews + 1
-    }
+    return {**update, "completed_interviews": completed_interviews + 1}
+
+@traced
+def interview_analyst(state: dict, config: RunnableConfig):
+    """Run one interview of the Send() fan-out; a failure only drops that analyst's section."""
+    analyst = state["analyst"]
+    configurable = configuration.Configuration.from_runnable_config(config)
+
+    with _interview_slot(configurable.max_concurrent_interviews):
+        try:
+            return run_interview(analyst, state["topic"], configurable)
+        except ReplayMiss:
+            raise
+        except Exception as e:
+            print(f"❌ Interview failed for {analyst.name}: {e}")
+            return {"sections": [], "failed_interviews": [analyst.name]}
+
+@traced
+async def ainterview_analyst(state: dict, config: RunnableConfig):
+    """Async variant of interview_analyst."""
+    analyst = state["analyst"]
+    configurable = configuration.Configuration.from_runnable_config(config)
+
+    async with _async_interview_slot(configurable.max_concurrent_interviews):
+        try:
+            return await arun_interview(analyst, state["topic"], configurable)
+        except ReplayMiss:
+            raise
+        except Exception as e:
+            print(f"❌ Interview failed for {analyst.name}: {e}")
+            return {"sections": [], "failed_interviews": [analyst.name]}
 
-@trace_node
-def initiate_all_interviews(state: ResearchGraphState):
-    """Fonction conditionnelle qui décide simplement du prochain nœud"""
+@traced
+def initiate_all_interviews(state: ResearchGraphState, config: RunnableConfig):
+    """Conditional edge: back to create_analysts, or kick off the interviews"""
     
     feedback = (state.get("human_analyst_feedback") or "").strip().lower()
     analysts = state.get("analysts", [])
@@ -874,9 +1305,15 @@ def initiate_all_interviews(state: ResearchGraphState):
     
     if not analysts or feedback != "approve":
         return "create_analysts"
-    else:
+
+    configurable = configuration.Configuration.from_runnable_config(config)
+    if configurable.interview_mode == "serial":
         return "conduct_interview"
 
+    # Run all interviews in parallel via Send() API, sections are merged by operator.add
+    topic = state["topic"]
+    return [Send("interview_analyst", {"analyst": analyst, "topic": topic}) for analyst in analysts]
+
     
 report_writer_instructions = """You are a technical writer creating a report on this overall topic: 
 
@@ -901,30 +1338,79 @@ To format your report:
 3. Use no sub-heading. 
 4. Start your report with a single title header: ## Insights
 5. Do not mention any analyst names in your report.
-6. Preserve any citations in the memos, which will be annotated in brackets, for example [1] or [2].
-7. Create a final, consolidated list of sources and add to a Sources section with the `## Sources` header.
-8. List your sources in order and do not repeat.
-
-[1] Source 1
-[2] Source 2
+6. Preserve the citations in the memos exactly as written, for example [1] or [2]. They are already numbered for the whole report.
+7. Do not add a list of sources, it is appended automatically.
 
 Here are the memos from your analysts to build your report from: 
 
 {context}"""
 
-@trace_node
-def write_report(state: ResearchGraphState):
-    # Full set of sections
-    sections = state["sections"]
-    topic = state["topic"]
+@traced
+def prepare_sections(state: ResearchGraphState):
+    """Join the sections once; intro, body and conclusion are then written in parallel from it.
 
+    Source ids cited by the sections are renumbered [1], [2], ... in order of
+    first use across all sections, and the matching source list is kept aside
+    for finalize_report.
+    """
+    sections, cited = renumber(state["sections"], state.get("sources", {}))
     # Concat all sections together
-    formatted_str_sections = "\n\n".join([f"{section}" for section in sections])
-    
+    return {
+        "section_digest": "\n\n".join([f"{section}" for section in sections]),
+        "source_list": format_source_list(cited),
+    }
+
+def report_messages(state: ResearchGraphState) -> list:
     # Summarize the sections into a final report
-    system_message = report_writer_instructions.format(topic=topic, context=formatted_str_sections)    
-    report = llm.invoke([SystemMessage(content=system_message)]+[HumanMessage(content=f"Write a report based upon these memos.")]) 
-    return {"content": report.content}
+    system_message = report_writer_instructions.format(topic=state["topic"], context=state["section_digest"])    
+    return [SystemMessage(content=system_message)]+[HumanMessage(content=f"Write a report based upon these memos.")]
+
+def write_report_part(messages: list, part: str, config: RunnableConfig) -> str:
+    """Generate one part of the final report.
+
+    With `stream_report`, tokens are forwarded on the custom stream as they are
+    produced, framed by start / end markers naming the part. The model call is
+    also tagged `report:<part>` so `messages` stream consumers can tell the
+    interleaved parts apart.
+    """
+    node = "write_report" if part == "content" else f"write_{part}"
+    model = get_model(config, node).with_config(tags=[f"report:{part}"])
+    if not configuration.Configuration.from_runnable_config(config).stream_report:
+        return model.invoke(messages).content
+
+    writer = get_stream_writer()
+    writer({"report_part": part, "event": "start"})
+    tokens = []
+    for chunk in model.stream(messages):
+        tokens.append(chunk.content)
+        writer({"report_part": part, "event": "token", "token": chunk.content})
+    writer({"report_part": part, "event": "end"})
+    return "".join(tokens)
+
+async def awrite_report_part(messages: list, part: str, config: RunnableConfig) -> str:
+    """Async variant of write_report_part."""
+    node = "write_report" if part == "content" else f"write_{part}"
+    model = get_model(config, node).with_config(tags=[f"report:{part}"])
+    if not configuration.Configuration.from_runnable_config(config).stream_report:
+        return (await model.ainvoke(messages)).content
+
+    writer = get_stream_writer()
+    writer({"report_part": part, "event": "start"})
+    tokens = []
+    async for chunk in model.astream(messages):
+        tokens.append(chunk.content)
+        writer({"report_part": part, "event": "token", "token": chunk.content})
+    writer({"report_part": part, "event": "end"})
+    return "".join(tokens)
+
+@traced
+def write_report(state: ResearchGraphState, config: RunnableConfig):
+    return {"content": write_report_part(report_messages(state), "content", config)}
+
+@traced
+async def awrite_report(state: ResearchGraphState, config: RunnableConfig):
+    """Async variant of write_report."""
+    return {"content": await awrite_report_part(report_messages(state), "content", config)}
 
 intro_conclusion_instructions = """You are a technical writer finishing a report on {topic}
 
@@ -948,39 +1434,52 @@ For your conclusion, use ## Conclusion as the section header.
 
 Here are the sections to reflect on for writing: {formatted_str_sections}"""
 
-@trace_node
-def write_introduction(state: ResearchGraphState):
-    # Full set of sections
-    sections = state["sections"]
-    topic = state["topic"]
-
-    # Concat all sections together
-    formatted_str_sections = "\n\n".join([f"{section}" for section in sections])
-    
-    # Summarize the sections into a final report
-    
-    instructions = intro_conclusion_instructions.format(topic=topic, formatted_str_sections=formatted_str_sections)    
-    intro = llm.invoke([instructions]+[HumanMessage(content=f"Write the report introduction")]) 
-    return {"introduction": intro.content}
-
-@trace_node
-def write_conclusion(state: ResearchGraphState):
-    # Full set of sections
-    sections = state["sections"]
-    topic = state["topic"]
-
-    # Concat all sections together
-    formatted_str_sections = "\n\n".join([f"{section}" for section in sections])
-    
-    # Summarize the sections into a final report
-    
-    instructions = intro_conclusion_instructions.format(topic=topic, formatted_str_sections=formatted_str_sections)    
-    conclusion = llm.invoke([instructions]+[HumanMessage(content=f"Write the report conclusion")]) 
-    return {"conclusion": conclusion.content}
+def intro_conclusion_messages(state: ResearchGraphState, part: str) -> list:
+    instructions = intro_conclusion_instructions.format(topic=state["topic"], formatted_str_sections=state["section_digest"])    
+    return [instructions]+[HumanMessage(content=f"Write the report {part}")]
+
+@traced
+def write_introduction(state: ResearchGraphState, config: RunnableConfig):
+    messages = intro_conclusion_messages(state, "introduction")
+    return {"introduction": write_report_part(messages, "introduction", config)}
+
+@traced
+async def awrite_introduction(state: ResearchGraphState, config: RunnableConfig):
+    """Async variant of write_introduction."""
+    messages = intro_conclusion_messages(state, "introduction")
+    return {"introduction": await awrite_report_part(messages, "introduction", config)}
+
+@traced
+def write_conclusion(state: ResearchGraphState, config: RunnableConfig):
+    messages = intro_conclusion_messages(state, "conclusion")
+    return {"conclusion": write_report_part(messages, "conclusion", config)}
+
+@traced
+async def awrite_conclusion(state: ResearchGraphState, config: RunnableConfig):
+    """Async variant of write_conclusion."""
+    messages = intro_conclusion_messages(state, "conclusion")
+    return {"conclusion": await awrite_report_part(messages, "conclusion", config)}
+
+def run_stats() -> dict:
+    """Counters of the shared caches, pools and retrievers, plus the node span summary."""
+    return {
+        "compiled_graphs": compiled_graphs.report(),
+        "llm_cache": cache_stats(),
+        "model_call_resilience": llm_factory.resilience().stats,
+        "hedged_calls": {**model_router.get_latency_tracker().stats, "latency": model_router.get_latency_tracker().summary()},
+        "wikipedia_retrieval": get_wikipedia_retriever().stats,
+        "web_search": get_web_search().stats,
+        "section_cache": get_section_cache().stats,
+        "speculative_prefetch": get_prefetcher().stats,
+        "web_result_cleaning": cleaning_stats,
+        "passage_index": get_passage_index().stats,
+        "context_packing": packing_stats,
+        "node_spans": tracing.summary(),
+    }
 
-@trace_node
+@traced
 def finalize_report(state: ResearchGraphState):
-    """ The is the "reduce" step where we gather all the sections, combine them, and reflect on them to write the intro/conclusion """
+    """ The is the "reduce" step: assemble the intro, body and conclusion written in parallel """
     # Save full final report
     content = state["content"]
     if content.startswith("## Insights"):
@@ -993,36 +1492,46 @@ def finalize_report(state: ResearchGraphState):
     else:
         sources = None
 
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("run stats: %s", run_stats())
     final_report = state["introduction"] + "\n\n---\n\n" + content + "\n\n---\n\n" + state["conclusion"]
+    # The numbered list built from the registry replaces any list the model wrote
+    if state.get("source_list"):
+        sources = state["source_list"]
     if sources is not None:
         final_report += "\n\n## Sources\n" + sources
     return {"final_report": final_report}
 
 # Add nodes and edges 
-builder = StateGraph(ResearchGraphState)
-builder.add_node("create_analysts", create_analysts)
+builder = StateGraph(ResearchGraphState, config_schema=configuration.Configuration)
+builder.add_node("create_analysts", async_node(create_analysts, acreate_analysts))
 builder.add_node("human_feedback", human_feedback)
 builder.add_node("launch_interviews", launch_interviews)
 builder.add_node("continue_interviews", continue_interviews)
 builder.add_node("conduct_interview", conduct_interview)
-builder.add_node("write_report",write_report)
-builder.add_node("write_introduction",write_introduction)
-builder.add_node("write_conclusion",write_conclusion)
+builder.add_node("interview_analyst", async_node(interview_analyst, ainterview_analyst))
+builder.add_node("prepare_sections", prepare_sections)
+builder.add_node("write_report", async_node(write_report, awrite_report))
+builder.add_node("write_introduction", async_node(write_introduction, awrite_introduction))
+builder.add_node("write_conclusion", async_node(write_conclusion, awrite_conclusion))
 builder.add_node("finalize_report",finalize_report)
 
 # Logic
 builder.add_edge(START, "create_analysts")
 builder.add_edge("create_analysts", "human_feedback")
 builder.add_conditional_edges("human_feedback", initiate_all_interviews, 
-                             ["create_analysts", "conduct_interview"])
+                             ["create_analysts", "conduct_interview", "interview_analyst"])
 builder.add_conditional_edges(
     "conduct_interview",
-    lambda state: "conduct_interview" if state.get("completed_interviews", 0) < len(state.get("analysts", [])) else "write_report",
-    ["conduct_interview", "write_report"]
+    lambda state: "conduct_interview" if state.get("completed_interviews", 0) < len(state.get("analysts", [])) else "prepare_sections",
+    ["conduct_interview", "prepare_sections"]
 )
-builder.add_edge("write_report", "write_introduction")
-builder.add_edge("write_report", "write_conclusion")
-builder.add_edge(["write_introduction", "write_conclusion"], "finalize_report")
+builder.add_edge("interview_analyst", "prepare_sections")
+# Introduction, body and conclusion only need the sections: write them concurrently
+builder.add_edge("prepare_sections", "write_report")
+builder.add_edge("prepare_sections", "write_introduction")
+builder.add_edge("prepare_sections", "write_conclusion")
+builder.add_edge(["write_report", "write_introduction", "write_conclusion"], "finalize_report")
 builder.add_edge("finalize_report", END)
 
 # Compile
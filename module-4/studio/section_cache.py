@@ -0,0 +1,75 @@
+"""Memoized interview results, so report refreshes only redo what changed.
+
+An interview's output (its sections and the sources they cite) depends on
+the topic, the analyst, what the retrievers return and the model writing it.
+The cache key hashes exactly those: the normalized topic, the analyst
+persona, a retrieval snapshot label and the interview settings (models and
+their endpoints, retrieval and packing options, prompt version). After a feedback
+loop or a rerun, analysts that are unchanged reuse their stored sections and
+only new or edited analysts are interviewed.
+
+The retrieval snapshot defaults to the current date, so cached sections are
+refreshed at most once a day unless a run pins `retrieval_snapshot`.
+"""
+import datetime
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Optional
+
+from llm_cache import SQLiteBackend
+from wikipedia_retrieval import normalize_query
+
+def persona_hash(analyst: Any) -> str:
+    data = analyst.model_dump() if hasattr(analyst, "model_dump") else analyst
+    return hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+
+def section_key(topic: str, analyst: Any, snapshot: Optional[str], settings: dict[str, Any]) -> str:
+    """`settings` holds everything else the section depends on (JSON-serializable)."""
+    parts = {
+        "topic": normalize_query(topic),
+        "persona": persona_hash(analyst),
+        "snapshot": snapshot or datetime.date.today().isoformat(),
+        "settings": settings,
+    }
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()
+
+class SectionCache:
+    def __init__(self, backend: SQLiteBackend, ttl: Optional[float] = None):
+        self.backend = backend
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "stored": 0}
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] += 1
+
+    def get(self, key: str) -> Optional[dict]:
+        value = self.backend.get(key)
+        if value is None:
+            self._count("misses")
+            return None
+        self._count("hits")
+        return json.loads(value)
+
+    def set(self, key: str, result: dict) -> None:
+        # Empty results (failed or cut-short interviews) are never reused
+        if not result.get("sections"):
+            return
+        stored = {"sections": result["sections"], "sources": result.get("sources", {})}
+        self.backend.set(key, json.dumps(stored), self.ttl)
+        self._count("stored")
+
+_cache: Optional[SectionCache] = None
+_cache_lock = threading.Lock()
+
+def get_section_cache() -> SectionCache:
+    """Process-wide cache stored in SECTION_CACHE_PATH."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            backend = SQLiteBackend(os.getenv("SECTION_CACHE_PATH", ".cache/sections.sqlite"), table="sections")
+            _cache = SectionCache(backend, ttl=float(os.getenv("SECTION_CACHE_TTL", str(7 * 24 * 3600))) or None)
+        return _cache
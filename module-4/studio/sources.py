@@ -0,0 +1,66 @@
+"""Source registry and deterministic citation numbering for the research report.
+
+Every document placed in `context` carries a stable id derived from its URL
+(`id="src-1a2b3c4d"`). Retrieval nodes record id -> {url, title} in the graph
+`sources` registry, section writers cite ids instead of numbering sources
+themselves, and `renumber` turns the ids of all sections into one global [n]
+sequence with the matching source list. The model never has to merge or
+deduplicate source lists.
+"""
+import hashlib
+import re
+from typing import Iterable
+from urllib.parse import urlsplit, urlunsplit
+
+from context_packing import parse_documents
+
+_CITATION = re.compile(r"\[\s*(src-[0-9a-f]{8}(?:\s*[,;]\s*src-[0-9a-f]{8})*)\s*\]")
+_ID = re.compile(r"src-[0-9a-f]{8}")
+
+def normalize_url(url: str) -> str:
+    url = (url or "").strip()
+    parts = urlsplit(url)
+    if not parts.scheme:
+        return url
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip("/"), parts.query, ""))
+
+def source_id(url: str) -> str:
+    """Stable citation id of a URL or page name."""
+    return "src-" + hashlib.sha1(normalize_url(url).encode("utf-8")).hexdigest()[:8]
+
+def collect_sources(context: Iterable[str]) -> dict[str, dict]:
+    """Registry entries {id: {url, title}} for the documents of formatted context strings."""
+    registry = {}
+    for doc in parse_documents(context):
+        sid = doc.attributes.get("id")
+        if sid and sid not in registry:
+            url = doc.attributes.get("href") or doc.attributes.get("source", "")
+            registry[sid] = {"url": url, "title": doc.attributes.get("title", "")}
+    return registry
+
+def renumber(sections: list[str], registry: dict[str, dict]) -> tuple[list[str], list[dict]]:
+    """Replace [src-...] citations with global [n] numbers in order of first use.
+
+    Returns the rewritten sections and the numbered source list. Ids missing
+    from the registry (e.g. invented by the model) are removed.
+    """
+    numbers: dict[str, int] = {}
+    cited: list[dict] = []
+
+    def replace(match: re.Match) -> str:
+        refs = []
+        for sid in _ID.findall(match.group(1)):
+            if sid not in registry:
+                continue
+            if sid not in numbers:
+                numbers[sid] = len(numbers) + 1
+                cited.append({"n": numbers[sid], "id": sid, **registry[sid]})
+            if f"[{numbers[sid]}]" not in refs:
+                refs.append(f"[{numbers[sid]}]")
+        return "".join(refs)
+
+    return [_CITATION.sub(replace, section) for section in sections], cited
+
+def format_source_list(cited: list[dict]) -> str:
+    # Two trailing spaces force markdown line breaks
+    return "\n".join(f"[{s['n']}] {s['url'] or s['title']}  " for s in cited)
@@ -2,6 +2,7 @@ from typing import List, Optional
 from typing_extensions import TypedDict, Annotated
 from langgraph.graph import StateGraph, START, END
 from operator import add
+from tracing import traced
 
 # ----- Types communs -----
 class Log(TypedDict):
@@ -24,6 +25,7 @@ class FailureAnalysisOutputState(TypedDict):
     fa_summary: str
     processed_logs: List[str]
 
+@traced
 def get_failures(state: FailureAnalysisState):
     cleaned_logs = state["cleaned_logs"]
     
@@ -38,6 +40,7 @@ def get_failures(state: FailureAnalysisState):
     
     return {"failures": failures}
 
+@traced
 def fa_generate_summary(state: FailureAnalysisState):
     failures = state["failures"]
     fa_summary = "Poor quality retrieval of Chroma documentation."
@@ -65,6 +68,7 @@ class QuestionSummarizationOutputState(TypedDict):
     report: str
     processed_logs: List[str]
 
+@traced
 def qs_generate_summary(state: QuestionSummarizationState):
     cleaned_logs = state["cleaned_logs"]
     
@@ -77,6 +81,7 @@ def qs_generate_summary(state: QuestionSummarizationState):
         "processed_logs": [f"summary-on-log-{log.get('id', 'unknown')}" for log in valid_logs]
     }
 
+@traced
 def send_to_slack(state: QuestionSummarizationState):
     qs_summary = state["qs_summary"]
     report = f"Slack report: {qs_summary}"
@@ -98,6 +103,7 @@ class EntryGraphState(TypedDict):
     report: str
     processed_logs: Annotated[List[str], add]  # Use Annotated to handle multiple updates
 
+@traced
 def clean_logs(state: EntryGraphState):
     raw_logs_input = state["raw_logs"]
     
@@ -1,3 +1,5 @@
+# Offline, from the committed fixtures (recorded against model_standin.py on port 8765):
+#   LLM_REPLAY_MODE=replay LLM_BASE_URL=http://127.0.0.1:8765 python test_isole.py
 from research_assistant import create_analysts
 import json
 
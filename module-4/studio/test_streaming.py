@@ -7,6 +7,7 @@ class AdvancedGraphRunner:
     
     def __init__(self, client):
         self.client = client
+        self.current_report_part = None
         
     async def run_complete_workflow(self, topic: str, assistant_id: str = "research_assistant"): #assistant_mocked
         """Exécute le workflow complet avec gestion des cycles feedback."""
@@ -133,14 +134,17 @@ class AdvancedGraphRunner:
                 thread_id=thread_id,
                 assistant_id=assistant_id,
                 input=None,  # Continuer avec l'état existant
-                stream_mode="values"
+                stream_mode=["values", "custom"]  # custom: tokens du rapport (stream_report)
             )
             
             final_data = None
             step_count = 0
+            self.current_report_part = None
             
             async for chunk in stream:
-                if chunk.event == "values":
+                if chunk.event == "custom":
+                    self.display_report_event(chunk.data)
+                elif chunk.event == "values":
                     step_count += 1
                     final_data = chunk.data
                     node_keys = list(final_data.keys())
@@ -175,6 +179,23 @@ class AdvancedGraphRunner:
             print(f"❌ Erreur continuation: {e}")
             return "error"
     
+    def display_report_event(self, event: dict):
+        """Affiche les tokens du rapport au fil de l'eau, avec les frontières de parties."""
+        part = event.get("report_part")
+        if part is None:
+            return
+        if event.get("event") == "start":
+            print(f"\n  ✍️  Début: {part}")
+        elif event.get("event") == "end":
+            print(f"\n  ✅ Fin: {part}")
+            self.current_report_part = None
+        elif event.get("event") == "token":
+            # Les trois parties sont écrites en parallèle: on signale chaque changement
+            if part != self.current_report_part:
+                print(f"\n  [{part}] ", end="")
+                self.current_report_part = part
+            print(event.get("token", ""), end="", flush=True)
+    
     async def get_and_display_state(self, thread_id: str):
         """Récupère et affiche l'état actuel."""
         
@@ -227,6 +248,7 @@ class AdvancedGraphRunner:
         print("\n" + "-" * 60)
         print("OPTIONS:")
         print("  ✅ Tapez 'approve' pour continuer avec ces analystes")
+        print("  ♻️  Tapez 'keep 1,3' ou 'reject 2' (+ ': consignes') pour ne régénérer que les analystes rejetés")
         print("  🔄 Tapez autre chose pour créer de nouveaux analystes")
         print("-" * 60)
         
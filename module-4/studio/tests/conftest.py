@@ -0,0 +1,10 @@
+import os
+import sys
+
+STUDIO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# The studio modules import each other by name, as under `langgraph dev`
+sys.path.insert(0, STUDIO)
+
+# Tests never reach the network: no real key, no shared caches on disk
+os.environ.setdefault("GROQ_API_KEY", "test")
+os.environ.setdefault("LLM_CACHE", "off")
@@ -0,0 +1,25 @@
+import json
+
+import bench_graphs
+
+BASELINES = {
+    bench_graphs.CALIBRATION: {"p50": 2.0, "p95": 2.2},
+    "simple": {"run_ms": {"p50": 1.0, "p95": 1.2}},
+}
+
+def results(run_ms: float) -> dict:
+    return {"simple": {"run_ms": {"p50": run_ms, "p95": run_ms}}}
+
+def test_baselines_are_scaled_to_this_machine():
+    # Twice as slow a machine, twice as slow a run: no regression
+    assert bench_graphs.compare(results(2.0), {"p50": 4.0}, BASELINES, tolerance=0.25) == []
+    assert bench_graphs.compare(results(2.0), {"p50": 2.0}, BASELINES, tolerance=0.25) == ["simple.run_ms"]
+
+def test_regressions_only_fail_the_run_with_check(monkeypatch, tmp_path):
+    monkeypatch.setattr(bench_graphs, "calibrate", lambda: [2.0])
+    monkeypatch.setattr(bench_graphs, "bench_graph", lambda name, runs, warmup: results(3.0)["simple"])
+    path = str(tmp_path / "baselines.json")
+    with open(path, "w") as f:
+        json.dump(BASELINES, f)
+    assert bench_graphs.main(["--graphs", "simple", "--baselines", path]) == 0
+    assert bench_graphs.main(["--graphs", "simple", "--baselines", path, "--check"]) == 1
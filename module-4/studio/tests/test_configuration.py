@@ -0,0 +1,41 @@
+import pytest
+
+from configuration import Configuration
+
+def test_configurable_wins_over_environment(monkeypatch):
+    monkeypatch.setenv("MODEL", "from-env")
+    config = Configuration.from_runnable_config({"configurable": {"model": "from-run"}})
+    assert config.model == "from-run"
+
+def test_environment_fills_unset_fields(monkeypatch):
+    monkeypatch.setenv("MODEL", "from-env")
+    assert Configuration.from_runnable_config({"configurable": {}}).model == "from-env"
+
+def test_strings_are_cast_to_the_field_type(monkeypatch):
+    monkeypatch.setenv("TEMPERATURE", "0")
+    config = Configuration.from_runnable_config({"configurable": {
+        "max_num_turns": "3", "section_cache": "false", "passage_min_coverage": "0.5",
+    }})
+    assert config.temperature == 0.0 and isinstance(config.temperature, float)
+    assert config.max_num_turns == 3
+    assert config.section_cache is False
+    assert config.passage_min_coverage == 0.5
+
+def test_plan_search_uses_the_small_tier_by_default():
+    assert Configuration().model_for("plan_search") == "llama-3.1-8b-instant"
+    assert Configuration().model_for("write_section") is None
+
+@pytest.mark.parametrize("overrides", [{"model": "qwen/qwen3-32b"}, {"llm_base_url": "http://127.0.0.1:8765"}])
+def test_run_model_or_endpoint_replaces_the_default_tiers(overrides):
+    assert Configuration(**overrides).model_for("plan_search") is None
+
+def test_run_model_tiers_win_over_the_run_model():
+    config = Configuration(model="qwen/qwen3-32b", model_tiers="small=gemma2-9b-it")
+    assert config.model_for("plan_search") == "gemma2-9b-it"
+    assert config.model_for("write_section") is None
+
+def test_run_node_tiers_pick_the_tier():
+    config = Configuration(node_tiers="write_section=small")
+    assert config.model_for("write_section") == "llama-3.1-8b-instant"
+    with pytest.raises(ValueError):
+        Configuration(node_tiers="plan_search=medium").model_for("plan_search")
@@ -0,0 +1,25 @@
+from context_packing import estimate_tokens, pack_context
+
+def web_doc(href: str, content: str) -> str:
+    return f'<Document href="{href}"/>\n{content}\n</Document>'
+
+def test_duplicates_are_dropped_and_relevant_documents_ranked_first():
+    context = [
+        web_doc("https://a.example", "Jazz history in New Orleans."),
+        web_doc("https://b.example", "Language models change the labour economy."),
+        web_doc("https://a.example", "Jazz history in New Orleans."),
+    ]
+    packed = pack_context(context, "impact of language models on the economy", 1000)
+    assert packed.duplicates == 1
+    assert packed.sources == ["https://b.example", "https://a.example"]
+
+def test_oversized_best_document_is_truncated_within_budget():
+    packed = pack_context([web_doc("https://a.example", "economy " * 2000)], "economy", 200)
+    assert packed.truncated == 1
+    assert estimate_tokens(packed.text) <= 200
+
+def test_document_whose_tag_exceeds_the_budget_is_dropped():
+    href = "https://example.com/" + "x" * 1200
+    packed = pack_context([web_doc(href, "economy " * 500)], "economy", 200)
+    assert packed.text == ""
+    assert packed.dropped == 1 and packed.truncated == 0
@@ -0,0 +1,92 @@
+import pytest
+
+from doc_cleaning import NearDuplicateFilter, clean_text, clean_web_results, is_boilerplate
+
+# Shaped like a Tavily `content` field for a news article
+ARTICLE = """[Skip to main content](#main)
+Home | World | Politics | Business | Tech
+Sign in
+We use cookies to improve your experience. By continuing you accept our use of cookies.
+Accept all cookies
+
+# AI Act
+
+The **European Union** adopted the [AI Act](https://example.com/ai-act) in 2024, the first comprehensive law on artificial intelligence.
+Registered voters rose by 4% in the member states that held consultations on the law.
+Subscribers doubled to 2 million on the Commission's AI newsletter after the vote.
+Sponsored trials at MIT tested how general-purpose models would be classified.
+
+## Obligations for providers
+
+Providers of high-risk systems must keep logs, document their training data and register the system in an EU database.
+
+Share this article
+Read more »
+Related articles
+Subscribe to our newsletter
+© 2024 Example Media Ltd. All rights reserved.
+"""
+
+@pytest.mark.parametrize("line", [
+    "Registered voters rose by 4% in the member states that held consultations on the law.",
+    "Subscribers doubled to 2 million on the Commission's AI newsletter after the vote.",
+    "Sponsored trials at MIT tested how general-purpose models would be classified.",
+    "Sign-language interpreters were present at every hearing.",
+    "Advertisement revenue fell for the third year.",
+    "AI Act",
+    "Key findings",
+    "GPT-4",
+])
+def test_factual_lines_and_headings_are_kept(line):
+    assert not is_boilerplate(line)
+
+@pytest.mark.parametrize("line", [
+    "Skip to main content",
+    "Sign in",
+    "Subscribe to our newsletter",
+    "Register now",
+    "We use cookies to improve your experience.",
+    "Accept all cookies",
+    "Privacy Policy",
+    "Terms & Conditions",
+    "© 2024 Example Media Ltd. All rights reserved.",
+    "Share this article",
+    "Read more »",
+    "Related articles",
+    "Advertisement",
+    "Home | World | Politics | Business | Tech",
+    "Home",
+    "About us",
+])
+def test_boilerplate_lines_are_dropped(line):
+    assert is_boilerplate(line)
+
+def test_article_keeps_its_facts_and_loses_its_chrome():
+    text, dropped = clean_text(ARTICLE, NearDuplicateFilter())
+    assert dropped == 0
+    assert text.split("\n\n")[0] == "AI Act"
+    for fact in ("Registered voters rose", "Subscribers doubled", "Sponsored trials at MIT", "Obligations for providers",
+                 "register the system in an EU database"):
+        assert fact in text
+    for chrome in ("Skip to", "cookies", "Sign in", "Share this", "Read more", "All rights reserved", "https://"):
+        assert chrome not in text
+    assert "European Union adopted the AI Act in 2024" in text
+
+def test_near_duplicate_paragraphs_are_dropped_across_results():
+    paragraph = "Providers of high-risk systems must keep logs and document their training data for ten years."
+    results = [
+        {"url": "https://a.example", "content": paragraph},
+        {"url": "https://b.example", "content": "**" + paragraph.replace(" for ten", "** for ten") + "\n\nA new paragraph about fines for breaches."},
+        {"url": "https://c.example", "content": "Home\nSign in"},
+    ]
+    cleaned = list(clean_web_results(results))
+    assert [r["url"] for r in cleaned] == ["https://a.example", "https://b.example"]
+    assert cleaned[1]["content"] == "A new paragraph about fines for breaches."
+
+def test_an_error_string_is_rejected():
+    with pytest.raises(TypeError):
+        list(clean_web_results("HTTPError('502 Server Error')"))
+
+def test_items_that_are_not_results_are_skipped():
+    results = ["stray text", None, {"url": "https://a.example", "content": "Fines reach seven percent of turnover."}]
+    assert [r["url"] for r in clean_web_results(results)] == ["https://a.example"]
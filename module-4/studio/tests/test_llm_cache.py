@@ -0,0 +1,75 @@
+import pytest
+from langchain_core.language_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+
+import llm_cache
+from llm_cache import InMemoryLRUBackend, ResponseCache, SQLiteBackend
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(llm_cache.time, "time", clock)
+    return clock
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return InMemoryLRUBackend()
+    return SQLiteBackend(str(tmp_path / "cache.sqlite"))
+
+def test_least_recently_used_entry_is_evicted():
+    lru = InMemoryLRUBackend(max_entries=2)
+    lru.set("a", "1")
+    lru.set("b", "2")
+    assert lru.get("a") == "1"  # "b" is now the least recently used
+    lru.set("c", "3")
+    assert lru.get("b") is None
+    assert (lru.get("a"), lru.get("c")) == ("1", "3")
+
+def test_entries_expire_after_their_ttl(backend, clock):
+    backend.set("k", "v", ttl=60)
+    backend.set("forever", "v")
+    clock.now += 59
+    assert backend.get("k") == "v"
+    clock.now += 2
+    assert backend.get("k") is None
+    assert backend.get("forever") == "v"
+
+def test_delete_and_clear(backend):
+    backend.set("a", "1")
+    backend.set("b", "2")
+    backend.delete("a")
+    assert backend.get("a") is None and backend.get("b") == "2"
+    backend.clear()
+    assert backend.get("b") is None
+
+def test_sqlite_entries_are_shared_across_connections(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    SQLiteBackend(path, table="t").set("k", "v")
+    assert SQLiteBackend(path, table="t").get("k") == "v"
+    assert SQLiteBackend(path, table="other").get("k") is None
+
+def model(cache: ResponseCache, *answers: str) -> GenericFakeChatModel:
+    return GenericFakeChatModel(messages=iter(AIMessage(content=a) for a in answers), cache=cache)
+
+def test_hits_and_misses_are_counted(backend):
+    cache = ResponseCache(backend)
+    chat = model(cache, "first", "second")
+    assert chat.invoke("hi").content == "first"
+    assert chat.invoke("hi").content == "first"
+    assert chat.invoke("other").content == "second"
+    assert cache.stats() == {"hits": 1, "misses": 2, "hit_rate": 0.333}
+
+def test_streamed_calls_bypass_the_cache():
+    cache = ResponseCache(InMemoryLRUBackend())
+    chat = model(cache, "first", "second")
+    chat.invoke("hi")
+    assert "".join(chunk.content for chunk in chat.stream("hi")) == "second"
+    assert cache.stats()["hits"] == 0
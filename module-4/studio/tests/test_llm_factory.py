@@ -0,0 +1,11 @@
+import llm_factory
+
+def test_no_rate_limit_by_default(monkeypatch):
+    monkeypatch.delenv("LLM_REQUESTS_PER_SECOND", raising=False)
+    assert llm_factory.rate_limiter("some-model") is None
+
+def test_rate_limit_shared_per_model_when_set(monkeypatch):
+    monkeypatch.setenv("LLM_REQUESTS_PER_SECOND", "4")
+    limiter = llm_factory.rate_limiter("limited-model")
+    assert limiter is llm_factory.rate_limiter("limited-model")
+    assert limiter.requests_per_second == 4.0
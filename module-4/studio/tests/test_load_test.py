@@ -0,0 +1,61 @@
+import asyncio
+
+from langgraph_sdk.schema import StreamPart
+
+import load_test
+
+ANALYSTS = {"analysts": [{"name": "Ada", "role": "Economist"}], "human_analyst_feedback": None}
+REPORT = {"final_report": "# Report", "sections": ["## Jobs"], "analysts": ANALYSTS["analysts"]}
+
+class FakeThreads:
+    def __init__(self, state_error=None):
+        self.state_error = state_error
+
+    async def create(self):
+        return {"thread_id": "t1"}
+
+    async def get_state(self, thread_id):
+        if self.state_error:
+            raise self.state_error
+        return {"values": ANALYSTS}
+
+    async def update_state(self, thread_id, values):
+        pass
+
+class FakeRuns:
+    """Streams `start` for the first run and `resume` for the ones after the interrupt."""
+
+    def __init__(self, start, resume):
+        self.start, self.resume = start, resume
+
+    async def stream(self, thread_id, assistant_id, input=None, stream_mode=None):
+        for part in (self.start if input is not None else self.resume):
+            if isinstance(part, Exception):
+                raise part
+            yield part
+
+class FakeClient:
+    def __init__(self, start, resume, state_error=None):
+        self.threads = FakeThreads(state_error)
+        self.runs = FakeRuns(start, resume)
+
+def run(client) -> dict:
+    return asyncio.run(load_test.run_session(client, "LLMs and jobs", "research_assistant", ["approve"]))
+
+def test_a_completed_session_has_no_errors():
+    result = run(FakeClient([StreamPart("values", ANALYSTS)], [StreamPart("values", REPORT)]))
+    assert result["completed"] and result["errors"] == []
+
+def test_a_failed_resume_stream_is_reported():
+    result = run(FakeClient([StreamPart("values", ANALYSTS)], [ConnectionError("server went away")]))
+    assert not result["completed"]
+    assert result["errors"] == ["resume stream failed: ConnectionError('server went away')"]
+
+def test_server_error_events_are_reported():
+    error = StreamPart("error", {"error": "GraphRecursionError"})
+    result = run(FakeClient([StreamPart("values", ANALYSTS), error], [StreamPart("values", REPORT)]))
+    assert result["errors"] == ["start run error: {'error': 'GraphRecursionError'}"]
+
+def test_a_failed_state_read_fails_the_session():
+    result = run(FakeClient([StreamPart("values", ANALYSTS)], [], state_error=RuntimeError("404")))
+    assert not result["completed"] and result["errors"] == ["RuntimeError('404')"]
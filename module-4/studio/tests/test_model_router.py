@@ -0,0 +1,97 @@
+import asyncio
+import time
+from typing import Any, Optional
+
+import pytest
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+import model_router
+from model_router import HedgedChatModel, LatencyTracker, latency_key
+
+class SlowModel(BaseChatModel):
+    """Answers `answer` after `delay` seconds, or raises `error`."""
+
+    answer: str = ""
+    delay: float = 0.0
+    error: Optional[str] = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "slow"
+
+    def _result(self) -> ChatResult:
+        if self.error:
+            raise RuntimeError(self.error)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.answer))])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        time.sleep(self.delay)
+        return self._result()
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(self.delay)
+        return self._result()
+
+@pytest.fixture
+def tracker(monkeypatch) -> LatencyTracker:
+    tracker = LatencyTracker()
+    monkeypatch.setattr(model_router, "_tracker", tracker)
+    return tracker
+
+def hedged(primary: SlowModel, secondary: SlowModel, tracker: LatencyTracker, p95: float = 0.05) -> HedgedChatModel:
+    # Enough fast history for the primary that its p95 is `p95`
+    for _ in range(5):
+        tracker.record(latency_key("groq:primary", "plan_search"), p95)
+    return HedgedChatModel(primary=primary, secondary=secondary, primary_name="groq:primary",
+                           secondary_name="mistral:secondary", kind="plan_search", min_samples=5)
+
+def test_fast_primary_is_not_hedged(tracker):
+    model = hedged(SlowModel(answer="primary"), SlowModel(answer="secondary"), tracker)
+    assert model.invoke("q").content == "primary"
+    assert tracker.stats == {"calls": 1, "hedged": 0, "hedge_wins": 0, "primary_errors": 0}
+
+@pytest.mark.parametrize("run", [
+    lambda model: model.invoke("q"),
+    lambda model: asyncio.run(model.ainvoke("q")),
+])
+def test_slow_primary_is_hedged_after_its_p95(tracker, run):
+    model = hedged(SlowModel(answer="primary", delay=1.0), SlowModel(answer="secondary"), tracker)
+    start = time.perf_counter()
+    assert run(model).content == "secondary"
+    assert time.perf_counter() - start < 0.5
+    assert tracker.stats == {"calls": 1, "hedged": 1, "hedge_wins": 1, "primary_errors": 0}
+
+def test_primary_error_falls_over_to_the_secondary(tracker):
+    model = hedged(SlowModel(error="503"), SlowModel(answer="secondary"), tracker)
+    assert asyncio.run(model.ainvoke("q")).content == "secondary"
+    assert model.invoke("q").content == "secondary"
+    assert tracker.stats["primary_errors"] == 2
+    assert tracker.stats["hedged"] == 0
+
+def test_no_hedging_before_min_samples(tracker):
+    model = HedgedChatModel(primary=SlowModel(answer="primary", delay=0.1), secondary=SlowModel(answer="secondary"),
+                            primary_name="groq:primary", secondary_name="mistral:secondary", min_samples=5)
+    assert model.invoke("q").content == "primary"
+    assert tracker.stats["hedged"] == 0
+
+def test_cancelled_primary_still_records_its_latency(tracker):
+    model = hedged(SlowModel(answer="primary", delay=1.0), SlowModel(answer="secondary"), tracker)
+    asyncio.run(model.ainvoke("q"))
+    key = latency_key("groq:primary", "plan_search")
+    assert tracker.summary()[key]["count"] == 6
+    assert tracker.quantile(key, 1.0) >= 0.05
+
+def test_latencies_are_kept_per_call_kind(tracker):
+    tracker.record(latency_key("groq:m", "plan_search"), 0.2)
+    tracker.record(latency_key("groq:m", "write_section"), 5.0)
+    assert tracker.quantile("groq:m/plan_search", 0.95) == 0.2
+    assert tracker.quantile("groq:m/write_section", 0.95) == 5.0
+
+def test_provider_name_follows_the_base_url():
+    from langchain_groq import ChatGroq
+
+    assert model_router.provider_name(ChatGroq(model="m", api_key="x")) == "groq:m"
+    standin = ChatGroq(model="m", api_key="x", base_url="http://127.0.0.1:8765")
+    assert model_router.provider_name(standin) == "127.0.0.1:8765:m"
@@ -0,0 +1,82 @@
+import http.client
+import json
+
+import pytest
+from pydantic import BaseModel
+
+import model_standin
+from replay import LatencyModel
+
+@pytest.fixture
+def serve():
+    servers = []
+
+    def start(**options) -> tuple[model_standin.StandIn, int]:
+        standin = model_standin.StandIn(LatencyModel("none"), tokens_per_second=0, **options)
+        server = model_standin.serve(standin, port=0)
+        servers.append(server)
+        return standin, server.server_address[1]
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+def post(port: int, body: dict) -> http.client.HTTPResponse:
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    connection.request("POST", "/openai/v1/chat/completions", json.dumps(body), {"Content-Type": "application/json"})
+    return connection.getresponse()
+
+def test_text_completion(serve):
+    _, port = serve(completion_tokens=20)
+    response = post(port, {"model": "m", "messages": [{"role": "user", "content": "How do LLMs affect jobs?"}]})
+    assert response.status == 200
+    body = json.loads(response.read())
+    assert body["choices"][0]["finish_reason"] == "stop"
+    content = body["choices"][0]["message"]["content"]
+    assert content.startswith("Stand-in answer to: How do LLMs affect jobs?")
+    assert len(content.split()) == 20
+    assert body["usage"]["total_tokens"] == body["usage"]["prompt_tokens"] + body["usage"]["completion_tokens"]
+
+class Analyst(BaseModel):
+    name: str
+    role: str
+
+class Perspectives(BaseModel):
+    analysts: list[Analyst]
+
+def test_forced_tool_call_validates_against_the_schema(serve):
+    from langchain_groq import ChatGroq
+
+    standin, port = serve()
+    model = ChatGroq(model="m", api_key="test", base_url=f"http://127.0.0.1:{port}", max_retries=0)
+    perspectives = model.with_structured_output(Perspectives).invoke("Create two analysts")
+    assert len(perspectives.analysts) == 2 and all(a.name and a.role for a in perspectives.analysts)
+    assert standin.stats["tool_calls"] == 1
+
+def test_requests_beyond_the_rate_limit_get_a_429(serve):
+    standin, port = serve(rpm=1)
+    request = {"model": "m", "messages": [{"role": "user", "content": "hi"}]}
+    assert post(port, request).status == 200
+    limited = post(port, request)
+    assert limited.status == 429
+    assert int(limited.getheader("Retry-After")) >= 1
+    assert json.loads(limited.read())["error"]["code"] == "rate_limit_exceeded"
+    # The limit is per model
+    assert post(port, {**request, "model": "other"}).status == 200
+    assert standin.stats["rate_limited"] == 1
+
+def test_stream_is_sent_as_server_sent_events(serve):
+    standin, port = serve(completion_tokens=10)
+    response = post(port, {"model": "m", "stream": True, "messages": [{"role": "user", "content": "hi"}]})
+    assert response.status == 200
+    assert response.getheader("Content-Type") == "text/event-stream"
+    events = [line[len("data: "):] for line in response.read().decode("utf-8").splitlines() if line.startswith("data: ")]
+    assert events[-1] == "[DONE]"
+    chunks = [json.loads(event) for event in events[:-1]]
+    assert chunks[0]["choices"][0]["delta"]["role"] == "assistant"
+    text = "".join(chunk["choices"][0]["delta"].get("content") or "" for chunk in chunks)
+    assert len(text.split()) == 10
+    assert chunks[-1]["choices"][0]["finish_reason"] == "stop"
+    assert chunks[-1]["x_groq"]["usage"]["completion_tokens"] > 0
+    assert standin.stats["streamed"] == 1
@@ -0,0 +1,106 @@
+import os
+
+from context_packing import parse_documents
+from passage_index import PassageIndex, format_passages, query_terms
+
+OFF_TOPIC = [
+    ("https://example.com/football", "Football", "Football is a team sport played between two teams of eleven players with a ball. The impact of the World Cup on the game is large."),
+    ("https://example.com/jazz", "Jazz", "Jazz is a music genre that originated in the African-American communities of New Orleans. It is known for swing and blue notes."),
+    ("https://example.com/rome", "Rome", "Rome is the capital city of Italy. It is the country's most populated city, and the economy of the region is based on services and tourism."),
+    ("https://example.com/volcano", "Volcano", "A volcano is a rupture in the crust of a planetary-mass object, such as Earth, that allows hot lava, ash and gases to escape."),
+    ("https://example.com/bread", "Bread", "Bread is a staple food prepared from a dough of flour and water, usually by baking. It is one of the oldest human-made foods."),
+]
+
+ON_TOPIC = [
+    ("https://example.com/llm-economy", "Large language models and the economy",
+     "Large language models are expected to have a large impact on the economy, changing the tasks of many workers and raising productivity."),
+    ("https://example.com/llm-labour", "Language models in the labour market",
+     "Studies of the economy find that language models affect writing, coding and customer support jobs the most."),
+]
+
+QUERY = "What is the impact of large language models on the economy?"
+
+def index_of(tmp_path, documents) -> PassageIndex:
+    index = PassageIndex(str(tmp_path / "passages"))
+    index.add({"source": source, "title": title, "content": content} for source, title, content in documents)
+    return index
+
+def test_stopwords_are_not_query_terms():
+    assert query_terms(QUERY) == ["economy", "impact", "language", "large", "models"]
+
+def test_off_topic_corpus_is_not_a_strong_match(tmp_path):
+    index = index_of(tmp_path, OFF_TOPIC)
+    hits = index.search(QUERY, k=1)
+    assert not index.is_strong(hits, k=1, min_coverage=0.6)
+    assert all(hit.coverage < 0.6 for hit in hits)
+    assert index.stats["strong_hits"] == 0
+
+def test_on_topic_passage_is_a_strong_match(tmp_path):
+    index = index_of(tmp_path, OFF_TOPIC + ON_TOPIC)
+    hits = index.search(QUERY, k=1)
+    assert hits[0].source == "https://example.com/llm-economy"
+    assert index.is_strong(hits, k=1, min_coverage=0.6)
+
+def test_index_is_reloaded_from_disk(tmp_path):
+    index_of(tmp_path, OFF_TOPIC + ON_TOPIC)
+    reloaded = PassageIndex(str(tmp_path / "passages"))
+    assert len(reloaded) == len(OFF_TOPIC + ON_TOPIC)
+    assert reloaded.search(QUERY, k=1)[0].source == "https://example.com/llm-economy"
+    assert reloaded.add([{"source": "https://example.com/jazz", "title": "Jazz", "content": "again"}]) == 0
+
+def topic(i: int) -> tuple[str, str, str]:
+    return (f"https://example.com/{i}", f"Topic {i}", f"Passage number {i} is about subject{i} and nothing else.")
+
+def test_adds_write_segments_and_merge_them_logarithmically(tmp_path):
+    index = PassageIndex(str(tmp_path / "passages"))
+    index.add([{"source": s, "title": t, "content": c} for s, t, c in OFF_TOPIC + ON_TOPIC])
+    first = index.segments[0].directory
+    index.add([{"source": "https://example.com/extra", "title": "Extra", "content": "One more short page."}])
+    # A small add does not rewrite the bigger segment before it
+    assert index.segments[0].directory == first and len(index.segments) == 2
+    for i in range(60):
+        index.add([dict(zip(("source", "title", "content"), topic(i)))])
+    assert len(index.segments) <= 7
+    assert index.stats["segments_merged"] > 0
+    assert index.search("subject42", k=1)[0].source == "https://example.com/42"
+    assert index.search(QUERY, k=1)[0].source == "https://example.com/llm-economy"
+    assert sorted(os.listdir(tmp_path / "passages")) == sorted(os.path.basename(s.directory) for s in index.segments)
+
+def test_merged_segments_rank_like_a_single_segment(tmp_path):
+    single = index_of(tmp_path / "single", OFF_TOPIC + ON_TOPIC)
+    merged = PassageIndex(str(tmp_path / "merged"))
+    for source, title, content in OFF_TOPIC + ON_TOPIC:
+        merged.add([{"source": source, "title": title, "content": content}])
+    assert [(p.source, p.score, p.coverage) for p in merged.search(QUERY, k=3)] == [
+        (p.source, p.score, p.coverage) for p in single.search(QUERY, k=3)
+    ]
+
+def test_oldest_segments_are_evicted_past_the_cap(tmp_path):
+    index = PassageIndex(str(tmp_path / "passages"), max_passages=16)
+    for i in range(40):
+        index.add([dict(zip(("source", "title", "content"), topic(i)))])
+    assert len(index) <= 16
+    assert index.stats["passages_evicted"] == 40 - len(index)
+    assert index.search("subject0", k=1) == []
+    # An evicted source can be indexed again
+    assert index.add([dict(zip(("source", "title", "content"), topic(0)))]) == 1
+    assert len(PassageIndex(str(tmp_path / "passages"), max_passages=16)) == len(index)
+
+def test_search_is_limited_to_one_kind(tmp_path):
+    index = PassageIndex(str(tmp_path / "passages"))
+    index.add([{"source": s, "title": t, "content": c} for s, t, c in ON_TOPIC[:1]], kind="web")
+    index.add([{"source": s, "title": t, "content": c} for s, t, c in ON_TOPIC[1:]], kind="wikipedia")
+    assert {p.source for p in index.search(QUERY, k=4, kind="web")} == {"https://example.com/llm-economy"}
+    assert {p.source for p in index.search(QUERY, k=4, kind="wikipedia")} == {"https://example.com/llm-labour"}
+    assert len(index.search(QUERY, k=4)) == 2
+    # The same page fetched by the other retriever is indexed for it too
+    assert index.add([{"source": ON_TOPIC[0][0], "title": "", "content": ON_TOPIC[0][2]}], kind="wikipedia") == 1
+
+def test_formatted_attributes_are_escaped(tmp_path):
+    index = PassageIndex(str(tmp_path / "passages"))
+    index.add([{"source": "https://example.com/q?a=1&b=2", "title": 'The "AI Act" <draft>', "content": "Obligations for providers."}])
+    docs = parse_documents([format_passages(index.search("obligations providers", k=1))])
+    assert len(docs) == 1
+    assert docs[0].attributes["title"] == 'The "AI Act" <draft>'
+    assert docs[0].source.startswith("https://example.com/q?a=1&b=2#")
+    assert docs[0].content == "Obligations for providers."
@@ -0,0 +1,46 @@
+import os
+
+import pytest
+
+import llm_factory
+import replay
+import research_assistant as ra
+from replay import ReplayMiss
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fixtures", "replay")
+# The recording was made against model_standin.py on its default port
+STANDIN = {"configurable": {"llm_base_url": "http://127.0.0.1:8765"}}
+
+@pytest.fixture
+def replaying(monkeypatch):
+    monkeypatch.setenv("LLM_REPLAY_MODE", "replay")
+    monkeypatch.setenv("LLM_REPLAY_DIR", FIXTURES)
+    monkeypatch.setenv("LLM_REPLAY_LATENCY", "none")
+    monkeypatch.setattr(replay, "_replay", None)
+    monkeypatch.setattr(llm_factory, "_models", {})
+
+def test_create_analysts_replays_the_recorded_call(replaying):
+    result = ra.create_analysts({"topic": "AI Ethics in Europe", "max_analysts": 2, "human_analyst_feedback": ""}, STANDIN)
+    assert len(result["analysts"]) == 2
+    assert all(isinstance(a, ra.Analyst) for a in result["analysts"])
+
+def test_an_unrecorded_call_fails_the_run(replaying):
+    with pytest.raises(ReplayMiss):
+        ra.create_analysts({"topic": "Quantum computing", "max_analysts": 2, "human_analyst_feedback": ""}, STANDIN)
+
+def test_interview_replay_miss_is_not_a_failed_interview(monkeypatch):
+    def missing(*args, **kwargs):
+        raise ReplayMiss("no fixture")
+    monkeypatch.setattr(ra, "run_interview", missing)
+    analyst = ra.Analyst(name="Ada", role="Economist", affiliation="LSE", description="Labour markets")
+    with pytest.raises(ReplayMiss):
+        ra.interview_analyst({"analyst": analyst, "topic": "LLMs and jobs"}, {})
+
+def test_other_interview_errors_only_drop_the_section(monkeypatch):
+    def broken(*args, **kwargs):
+        raise RuntimeError("search down")
+    monkeypatch.setattr(ra, "run_interview", broken)
+    analyst = ra.Analyst(name="Ada", role="Economist", affiliation="LSE", description="Labour markets")
+    assert ra.interview_analyst({"analyst": analyst, "topic": "LLMs and jobs"}, {}) == {
+        "sections": [], "failed_interviews": ["Ada"],
+    }
@@ -0,0 +1,181 @@
+import pytest
+from pydantic import ValidationError
+from langchain_core.exceptions import OutputParserException
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.runnables import RunnableLambda
+
+import research_assistant as ra
+
+class StructuredModel:
+    """get_model() double whose structured output returns or raises `answer`."""
+
+    def __init__(self, answer):
+        self.answer = answer
+        self.prompts = []
+
+    def with_structured_output(self, schema):
+        def respond(messages):
+            self.prompts.append(messages)
+            if isinstance(self.answer, Exception):
+                raise self.answer
+            return self.answer
+        return RunnableLambda(respond)
+
+@pytest.fixture
+def model(monkeypatch):
+    def install(answer):
+        double = StructuredModel(answer)
+        monkeypatch.setattr(ra, "get_model", lambda config=None, node=None: double)
+        return double
+    return install
+
+def interview_state() -> dict:
+    analyst = ra.Analyst(name="Ada", role="Economist", affiliation="LSE", description="Labour markets")
+    return {"analyst": analyst, "messages": [HumanMessage(content="How do LLMs affect jobs?"), AIMessage(content="Which jobs?")]}
+
+@pytest.mark.parametrize("answer", [
+    OutputParserException("not JSON"),
+    ValidationError.from_exception_data("SearchQueries", []),
+    ValueError("tool arguments must be a dict"),
+    None,
+])
+def test_plan_search_falls_back_when_the_answer_does_not_parse(model, answer):
+    model(answer)
+    assert ra.plan_search(interview_state(), {}) == {"search_queries": []}
+
+def test_plan_search_deduplicates_queries(model):
+    model(ra.SearchQueries(search_queries=["LLM jobs", "llm  JOBS?", "automation wages"]))
+    config = {"configurable": {"num_search_queries": 3}}
+    assert ra.plan_search(interview_state(), config) == {"search_queries": ["LLM jobs", "automation wages"]}
+
+def team() -> list:
+    return [
+        ra.Analyst(name="Ada", role="Economist", affiliation="LSE", description="Labour markets"),
+        ra.Analyst(name="Linus", role="Engineer", affiliation="Linux Foundation", description="Open source models"),
+    ]
+
+def feedback_state(feedback: str, rejected=None) -> dict:
+    return {"topic": "LLMs and jobs", "max_analysts": 2, "analysts": team(),
+            "human_analyst_feedback": feedback, "rejected_analysts": rejected or []}
+
+def test_rejected_analysts_are_excluded_from_the_next_prompt():
+    update = ra.human_feedback(feedback_state("reject 2: more policy"))
+    assert update["kept_analysts"] == team()[:1]
+    assert update["rejected_analysts"] == team()[1:]
+    prompt = ra.analysts_messages({**feedback_state(""), **update})[0].content
+    assert "rejected these analysts" in prompt
+    assert "Name: Linus" in prompt.split("rejected these analysts")[1]
+
+def test_rejecting_everyone_without_notes_changes_the_prompt():
+    original = ra.analysts_messages({"topic": "LLMs and jobs", "max_analysts": 2})[0].content
+    update = ra.human_feedback(feedback_state("reject 1,2"))
+    assert update["kept_analysts"] == [] and update["feedback_notes"] == ""
+    assert ra.analysts_messages({**feedback_state(""), **update})[0].content != original
+
+def test_rejections_accumulate_across_feedback_rounds():
+    earlier = ra.Analyst(name="Grace", role="Historian", affiliation="Yale", description="Computing history")
+    update = ra.human_feedback(feedback_state("keep 2", rejected=[earlier]))
+    assert update["rejected_analysts"] == [earlier, team()[0]]
+
+def test_free_text_feedback_does_not_add_exclusions():
+    update = ra.human_feedback(feedback_state("focus on developing countries"))
+    assert update["rejected_analysts"] == [] and update["kept_analysts"] == []
+
+class ChatDouble:
+    """get_model() double: plain calls answer "ok", structured calls plan one query."""
+
+    def invoke(self, messages):
+        return AIMessage(content="ok")
+
+    async def ainvoke(self, messages):
+        return self.invoke(messages)
+
+    def with_structured_output(self, schema):
+        return RunnableLambda(lambda messages: ra.SearchQueries(search_queries=["planned query"]))
+
+class CountingSearch:
+    def __init__(self):
+        self.queries = []
+
+    def search(self, query):
+        self.queries.append(query)
+        return []
+
+@pytest.fixture
+def interview_env(monkeypatch):
+    from prefetch import Prefetcher
+    web, wikipedia, prefetcher = CountingSearch(), CountingSearch(), Prefetcher(max_workers=1)
+    monkeypatch.setattr(ra, "get_model", lambda config=None, node=None: ChatDouble())
+    monkeypatch.setattr(ra, "get_web_search", lambda: web)
+    monkeypatch.setattr(ra, "get_wikipedia_retriever", lambda: wikipedia)
+    monkeypatch.setattr(ra, "get_prefetcher", lambda: prefetcher)
+    monkeypatch.setenv("USE_PASSAGE_INDEX", "false")
+    return web, wikipedia, prefetcher
+
+def interview_config(**overrides):
+    values = {"section_cache": False, "speculative_prefetch": True, "max_num_turns": 2, **overrides}
+    return ra.configuration.Configuration(**values)
+
+def test_prefetched_interview_skips_first_turn_retrieval(interview_env):
+    web, wikipedia, prefetcher = interview_env
+    analyst = team()[0]
+    warm = {"context": ['<Document href="https://a.example"/>\nwarm\n</Document>'], "sources": {}}
+    prefetcher.schedule(ra.prefetch_key("LLMs and jobs", analyst), lambda: warm)
+    ra.run_interview(analyst, "LLMs and jobs", interview_config())
+    # Two turns, only the second one retrieves
+    assert web.queries == ["planned query"] and wikipedia.queries == ["planned query"]
+    assert prefetcher.stats["used"] == 1
+
+def test_cold_interview_retrieves_every_turn(interview_env):
+    web, wikipedia, _ = interview_env
+    ra.run_interview(team()[0], "LLMs and jobs", interview_config())
+    assert web.queries == ["planned query"] * 2
+
+def test_section_cache_hit_discards_the_prefetch(interview_env, monkeypatch):
+    _, _, prefetcher = interview_env
+    analyst = team()[0]
+    cached = {"sections": ["cached"], "sources": {}}
+    monkeypatch.setattr(ra, "get_section_cache", lambda: type("Cache", (), {"get": lambda self, key: cached})())
+    prefetcher.schedule(ra.prefetch_key("LLMs and jobs", analyst), lambda: {"context": ["warm"]})
+    assert ra.run_interview(analyst, "LLMs and jobs", interview_config(section_cache=True)) == cached
+    assert prefetcher.stats["discarded"] == 1
+    assert prefetcher.take(ra.prefetch_key("LLMs and jobs", analyst)) is None
+
+def test_create_analysts_surfaces_final_model_errors(model):
+    model(ConnectionError("fallbacks exhausted"))
+    state = {"topic": "LLMs and jobs", "max_analysts": 2, "kept_analysts": team()[:1]}
+    with pytest.raises(ConnectionError):
+        ra.create_analysts(state)
+
+def test_create_analysts_keeps_reviewer_choices(model):
+    model(ra.Perspectives(analysts=team()[1:] + team()[:1]))
+    state = {"topic": "LLMs and jobs", "max_analysts": 2, "kept_analysts": team()[:1]}
+    update = ra.create_analysts(state)
+    assert update["analysts"] == [team()[0], team()[1]]
+    assert update["kept_analysts"] == [] and update["retry_count"] == 1
+
+def cache_key(**overrides) -> str:
+    return ra.interview_cache_key(team()[0], "LLMs and jobs", ra.configuration.Configuration(**overrides))
+
+@pytest.mark.parametrize("overrides", [
+    {"llm_base_url": "http://127.0.0.1:8765"},
+    {"model": "llama-3.1-8b-instant"},
+    {"num_search_queries": 3},
+    {"use_passage_index": False},
+    {"passage_top_k": 8},
+    {"context_token_budget": 1000},
+    {"section_token_budget": 2000},
+    {"max_num_turns": 3},
+    {"retrieval_snapshot": "2024-01-01"},
+])
+def test_section_cache_key_covers_what_changes_a_section(overrides):
+    assert cache_key(**overrides) != cache_key()
+
+def test_section_cache_key_is_stable_and_ignores_scheduling():
+    assert cache_key() == cache_key()
+    assert cache_key(interview_mode="serial", max_concurrent_interviews=1) == cache_key()
+
+def test_section_cache_key_follows_the_interview_prompts(monkeypatch):
+    before = cache_key()
+    monkeypatch.setattr(ra, "INTERVIEW_PROMPT_VERSION", "edited")
+    assert cache_key() != before
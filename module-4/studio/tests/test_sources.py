@@ -0,0 +1,42 @@
+from context_packing import document_tag
+from sources import collect_sources, format_source_list, renumber, source_id
+
+A, B, C = "https://a.example/page", "https://b.example/page", "https://c.example/page"
+REGISTRY = {source_id(url): {"url": url, "title": title} for url, title in ((A, "A"), (B, "B"), (C, "C"))}
+a, b, c = (source_id(url) for url in (A, B, C))
+
+def test_source_id_ignores_trailing_slash_case_and_fragment():
+    assert source_id("HTTPS://A.example/page/#intro") == source_id(A)
+    assert source_id(A) != source_id(B)
+
+def test_grouped_citations_get_one_number_each():
+    sections, cited = renumber([f"Claim [{b}, {a}]. Other [{a};{b}] and [ {c} ]."], REGISTRY)
+    assert sections == ["Claim [1][2]. Other [2][1] and [3]."]
+    assert [(s["n"], s["url"]) for s in cited] == [(1, B), (2, A), (3, C)]
+
+def test_repeated_id_in_a_group_is_cited_once():
+    sections, _ = renumber([f"Claim [{a}, {a}]."], REGISTRY)
+    assert sections == ["Claim [1]."]
+
+def test_cited_ids_missing_from_the_registry_are_dropped():
+    unknown = "src-00000000"
+    sections, cited = renumber([f"Invented [{unknown}]. Mixed [{unknown}, {c}]."], REGISTRY)
+    assert sections == ["Invented . Mixed [1]."]
+    assert [s["id"] for s in cited] == [c]
+
+def test_numbering_follows_section_order_and_is_stable():
+    sections = [f"First [{c}].", f"Second [{a}] then [{c}].", f"Third [{b}]."]
+    rewritten, cited = renumber(sections, REGISTRY)
+    assert rewritten == ["First [1].", "Second [2] then [1].", "Third [3]."]
+    assert [s["id"] for s in cited] == [c, a, b]
+    assert renumber(sections, dict(reversed(list(REGISTRY.items())))) == (rewritten, cited)
+    assert format_source_list(cited).splitlines() == [f"[1] {C}  ", f"[2] {A}  ", f"[3] {B}  "]
+
+def test_collect_sources_reads_every_formatted_document():
+    title = 'The "B" page'
+    context = [
+        f"{document_tag(href=A, id=a)}\nweb text\n</Document>",
+        f"{document_tag(source=B, title=title, id=b)}\nwiki text\n</Document>"
+        f"\n\n---\n\n{document_tag(href=A, id=a)}\nagain\n</Document>",
+    ]
+    assert collect_sources(context) == {a: {"url": A, "title": ""}, b: {"url": B, "title": 'The "B" page'}}
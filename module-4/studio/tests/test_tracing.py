@@ -0,0 +1,103 @@
+import asyncio
+import glob
+import os
+
+import pytest
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+import tracing
+from tracing import traced
+
+STUDIO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+USAGE = {"input_tokens": 10, "output_tokens": 5, "total_tokens": 15}
+
+class UsageModel(BaseChatModel):
+    """Chat model double answering with fixed token usage."""
+
+    @property
+    def _llm_type(self) -> str:
+        return "usage"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        message = AIMessage(content="answer", usage_metadata=USAGE, response_metadata={"model_name": "usage-model"})
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+@pytest.fixture(autouse=True)
+def sample_everything():
+    tracing.configure(sample_rate=1.0)
+    tracing.spans()
+    tracing.export_jsonl(path="/dev/null")
+    yield
+    tracing.configure(sample_rate=0.0)
+
+def last_span() -> dict:
+    return tracing.spans()[-1]
+
+def test_returned_model_message_is_counted_once():
+    @traced
+    def node(state):
+        return {"messages": [UsageModel().invoke("question")]}
+
+    node({})
+    attributes = last_span()["attributes"]
+    assert (attributes["llm.input_tokens"], attributes["llm.output_tokens"], attributes["llm.total_tokens"]) == (10, 5, 15)
+
+def test_async_node_usage_is_counted_once():
+    @traced
+    async def node(state):
+        return {"messages": [await UsageModel().ainvoke("question")]}
+
+    asyncio.run(node({}))
+    assert last_span()["attributes"]["llm.total_tokens"] == 15
+
+def test_error_is_recorded_on_the_span():
+    @traced
+    def node(state):
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        node({})
+    assert last_span()["status"] == {"code": "ERROR", "message": "ValueError: boom"}
+    assert tracing.summary()["node"]["count"] == 1
+
+def test_sample_rate_is_respected(monkeypatch):
+    @traced
+    def node(state):
+        return {}
+
+    draws = iter([0.1, 0.3, 0.6, 0.9] * 25)
+    monkeypatch.setattr(tracing.random, "random", lambda: next(draws))
+    tracing.configure(sample_rate=0.5)
+    for _ in range(100):
+        node({})
+    assert len(tracing.spans()) == 50
+
+    tracing.configure(sample_rate=0.0)
+    node({})
+    assert len(tracing.spans()) == 50
+
+def test_ring_buffer_keeps_the_latest_spans():
+    @traced
+    def node(state):
+        tracing.annotate(call=state["call"])
+        return {}
+
+    tracing.configure(buffer_size=5)
+    try:
+        for call in range(12):
+            node({"call": call})
+        assert [span["attributes"]["call"] for span in tracing.spans()] == [7, 8, 9, 10, 11]
+    finally:
+        tracing.configure(buffer_size=2048)
+
+def test_vendored_copies_match_this_one():
+    here = os.path.join(STUDIO, "tracing.py")
+    copies = glob.glob(os.path.join(STUDIO, "..", "..", "module-*", "*", "tracing.py"))
+    assert len(copies) == 6
+    with open(here, "rb") as f:
+        reference = f.read()
+    for copy in copies:
+        with open(copy, "rb") as f:
+            assert f.read() == reference, f"{os.path.relpath(copy, STUDIO)} differs from module-4/studio/tracing.py"
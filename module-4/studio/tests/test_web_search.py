@@ -0,0 +1,81 @@
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+
+import web_search
+from llm_cache import SQLiteBackend
+from web_search import CachedWebSearch, FixtureSearchProvider
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fixtures", "web_search.json")
+
+class ScriptedProvider:
+    """Returns the scripted answers in order, one per call."""
+
+    def __init__(self, *answers, delay: float = 0.0):
+        self.answers = list(answers)
+        self.delay = delay
+        self.calls = 0
+
+    def search(self, query):
+        time.sleep(self.delay)
+        self.calls += 1
+        return self.answers.pop(0)
+
+    async def asearch(self, query):
+        await asyncio.sleep(self.delay)
+        self.calls += 1
+        return self.answers.pop(0)
+
+@pytest.fixture(autouse=True)
+def no_replay(monkeypatch):
+    monkeypatch.setattr(web_search, "get_replay", lambda: None)
+
+def cached(tmp_path, provider) -> CachedWebSearch:
+    return CachedWebSearch(provider, SQLiteBackend(str(tmp_path / "web.sqlite"), table="web_search"))
+
+def test_results_are_cached_by_normalized_query(tmp_path):
+    search = cached(tmp_path, ScriptedProvider([{"url": "u", "content": "c"}]))
+    assert search.search("LangGraph?") == search.search("  langgraph ")
+    assert search.stats["provider_calls"] == 1
+    assert search.stats["cache_hits"] == 1
+
+def test_provider_error_string_is_not_cached(tmp_path, caplog):
+    results = [{"url": "u", "content": "c"}]
+    provider = ScriptedProvider("HTTPError('502 Server Error')", results)
+    search = cached(tmp_path, provider)
+    assert search.search("q") == []
+    assert "502 Server Error" in caplog.text
+    assert search.search("q") == results
+    assert search.stats["uncached_errors"] == 1
+
+def test_async_provider_error_string_is_not_cached(tmp_path):
+    results = [{"url": "u", "content": "c"}]
+    search = cached(tmp_path, ScriptedProvider("ConnectError()", results))
+    assert asyncio.run(search.asearch("q")) == []
+    assert asyncio.run(search.asearch("q")) == results
+
+def test_provider_error_string_gives_no_documents(tmp_path, monkeypatch):
+    import research_assistant as ra
+
+    search = cached(tmp_path, ScriptedProvider("HTTPError('502 Server Error')"))
+    monkeypatch.setattr(ra, "get_web_search", lambda: search)
+    assert ra.fetch_web("q") == []
+
+def test_concurrent_identical_queries_are_coalesced(tmp_path):
+    provider = ScriptedProvider([{"url": "u", "content": "c"}], delay=0.1)
+    search = cached(tmp_path, provider)
+    threads = [threading.Thread(target=search.search, args=("same query",)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert provider.calls == 1
+    assert search.stats["coalesced"] + search.stats["cache_hits"] == 3
+
+def test_fixture_provider_ranks_unknown_queries():
+    provider = FixtureSearchProvider(FIXTURES, max_results=2)
+    assert len(provider.search("langgraph agent orchestration graphs")) == 2
+    assert provider.search("zzz unrelated") == []
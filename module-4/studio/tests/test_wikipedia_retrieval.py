@@ -0,0 +1,115 @@
+import asyncio
+import os
+import shutil
+import threading
+import time
+
+import pytest
+from langchain_core.documents import Document
+
+import wikipedia_retrieval
+from wikipedia_retrieval import WikipediaRetriever, normalize_query
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fixtures", "wikipedia")
+
+def page(title: str, text: str = "") -> Document:
+    source = "https://en.wikipedia.org/wiki/" + title.replace(" ", "_")
+    return Document(page_content=text or f"{title} article.", metadata={"title": title, "source": source})
+
+class FakeLoader:
+    """WikipediaLoader double: returns `pages[query]` and tracks concurrent loads."""
+
+    pages: dict[str, list[Document]] = {}
+    delay = 0.0
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def __init__(self, query: str, load_max_docs: int):
+        self.query = query
+
+    @classmethod
+    def reset(cls, pages: dict, delay: float = 0.0) -> None:
+        cls.pages, cls.delay, cls.active, cls.peak = pages, delay, 0, 0
+
+    @classmethod
+    def _enter(cls) -> None:
+        with cls.lock:
+            cls.active += 1
+            cls.peak = max(cls.peak, cls.active)
+
+    @classmethod
+    def _exit(cls) -> None:
+        with cls.lock:
+            cls.active -= 1
+
+    def load(self) -> list[Document]:
+        self._enter()
+        time.sleep(self.delay)
+        self._exit()
+        return list(self.pages.get(self.query, []))
+
+    async def aload(self) -> list[Document]:
+        self._enter()
+        await asyncio.sleep(self.delay)
+        self._exit()
+        return list(self.pages.get(self.query, []))
+
+@pytest.fixture
+def loader(monkeypatch):
+    monkeypatch.setattr(wikipedia_retrieval, "WikipediaLoader", FakeLoader)
+    monkeypatch.setattr(wikipedia_retrieval, "get_replay", lambda: None)
+    return FakeLoader
+
+def test_normalize_query():
+    assert normalize_query("  Éthique de l'IA?! ") == "éthique de l ia"
+    assert normalize_query("Large   LANGUAGE models") == normalize_query("large language models")
+
+def test_offline_search_uses_fixture_corpus(tmp_path, monkeypatch):
+    monkeypatch.setattr(wikipedia_retrieval, "get_replay", lambda: None)
+    shutil.copytree(FIXTURES, tmp_path / "store")
+    retriever = WikipediaRetriever(str(tmp_path / "store"), offline=True)
+    docs = retriever.search("EU Artificial Intelligence Act regulation")
+    assert docs[0].metadata["title"] == "Artificial Intelligence Act"
+    assert retriever.stats["fetches"] == 0
+    assert retriever.stats["offline_lookups"] == 1
+
+def test_pages_are_deduplicated_by_source_url(tmp_path, loader):
+    llm, rag = page("Large language model"), page("Retrieval-augmented generation")
+    loader.reset({"llm": [llm, llm], "rag": [rag, page("Large language model", "another copy")]})
+    retriever = WikipediaRetriever(str(tmp_path))
+    assert [d.metadata["title"] for d in retriever.search("llm")] == ["Large language model"]
+    docs = retriever.search("rag")
+    # The page already stored by the first query is reused, not overwritten
+    assert docs[1].page_content == llm.page_content
+    assert retriever.stats["pages_deduplicated"] == 1
+    assert len(retriever.pages.all()) == 2
+
+def test_normalized_queries_hit_the_cache(tmp_path, loader):
+    loader.reset({"Large language model": [page("Large language model")]})
+    retriever = WikipediaRetriever(str(tmp_path))
+    retriever.search("Large language model")
+    retriever.search("  large LANGUAGE model? ")
+    assert retriever.stats == {"query_hits": 1, "fetches": 1, "pages_deduplicated": 0, "offline_lookups": 0}
+
+def test_fetch_concurrency_is_limited(tmp_path, loader):
+    loader.reset({f"q{i}": [page(f"Page {i}")] for i in range(6)}, delay=0.05)
+    retriever = WikipediaRetriever(str(tmp_path), max_concurrent_fetches=2)
+    threads = [threading.Thread(target=retriever.search, args=(f"q{i}",)) for i in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert retriever.stats["fetches"] == 6
+    assert loader.peak == 2
+
+def test_async_fetch_concurrency_is_limited(tmp_path, loader):
+    loader.reset({f"q{i}": [page(f"Page {i}")] for i in range(6)}, delay=0.05)
+    retriever = WikipediaRetriever(str(tmp_path), max_concurrent_fetches=2)
+
+    async def run():
+        await asyncio.gather(*(retriever.asearch(f"q{i}") for i in range(6)))
+
+    asyncio.run(run())
+    assert retriever.stats["fetches"] == 6
+    assert loader.peak == 2
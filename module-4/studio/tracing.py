@@ -0,0 +1,203 @@
+"""Low-overhead structured tracing for graph nodes.
+
+`@traced` replaces print-based node tracing. For a sampled call it records one
+span with wall-clock and CPU time, input / output state size and the LLM token
+usage of the calls made inside the node, and appends it to an in-memory ring
+buffer. Spans follow the OpenTelemetry JSON field names and can be exported as
+JSONL with `export_jsonl()`.
+
+Sampling is controlled by TRACE_SAMPLE_RATE (0 to 1, default 0). When it is 0
+the wrapper is a single float comparison before calling the node.
+
+Each studio directory is deployed on its own (langgraph.json dependencies:
+["."]), so this module is vendored into every one of them, like
+llm_factory.py and configuration.py. module-4/studio/tracing.py is the
+reference copy: edit it, copy it over the others, and module-4's
+tests/test_tracing.py fails while any copy differs.
+"""
+import asyncio
+import contextvars
+import functools
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from typing import Any, Optional
+
+try:
+    from langchain_core.callbacks import get_usage_metadata_callback
+except ImportError:  # older langchain-core: token usage is read from the node output instead
+    get_usage_metadata_callback = None
+
+_sample_rate = float(os.getenv("TRACE_SAMPLE_RATE", "0"))
+_buffer: deque = deque(maxlen=int(os.getenv("TRACE_BUFFER_SIZE", "2048")))
+_buffer_lock = threading.Lock()
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+
+def configure(sample_rate: Optional[float] = None, buffer_size: Optional[int] = None) -> None:
+    """Change the sampling rate and / or ring buffer size at runtime."""
+    global _sample_rate, _buffer
+    if sample_rate is not None:
+        _sample_rate = max(0.0, min(1.0, float(sample_rate)))
+    if buffer_size is not None:
+        with _buffer_lock:
+            _buffer = deque(_buffer, maxlen=buffer_size)
+
+def _state_size(value: Any) -> int:
+    try:
+        return len(json.dumps(value, default=str))
+    except (TypeError, ValueError):
+        return len(repr(value))
+
+def _output_tokens(result: Any) -> dict[str, int]:
+    """Token usage of the AI messages returned by a node."""
+    usage = {"input_tokens": 0, "output_tokens": 0, "total_tokens": 0}
+    values = result.values() if isinstance(result, dict) else []
+    for value in values:
+        for item in value if isinstance(value, list) else [value]:
+            metadata = getattr(item, "usage_metadata", None) or {}
+            for key in usage:
+                usage[key] += metadata.get(key, 0)
+    return usage
+
+class Span:
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_ns", "cpu_start_ns", "attributes", "status")
+
+    def __init__(self, name: str, parent: Optional["Span"]):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else f"{random.getrandbits(128):032x}"
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent.span_id if parent else None
+        self.attributes: dict[str, Any] = {}
+        self.status = {"code": "OK"}
+        self.start_ns = time.time_ns()
+        self.cpu_start_ns = time.thread_time_ns()
+
+    def finish(self, wall_ns: int, usage_handler: Any, result: Any) -> dict:
+        self.attributes["node.wall_ms"] = round(wall_ns / 1e6, 3)
+        if self.cpu_start_ns is not None:
+            self.attributes["node.cpu_ms"] = round((time.thread_time_ns() - self.cpu_start_ns) / 1e6, 3)
+        if result is not None:
+            self.attributes["state.output_bytes"] = _state_size(result)
+        # The callback sees every model call of the node, including the ones whose
+        # messages are also returned; the node output is only read without it
+        if usage_handler is not None:
+            usage = {key: 0 for key in ("input_tokens", "output_tokens", "total_tokens")}
+            for metadata in usage_handler.usage_metadata.values():
+                for key in usage:
+                    usage[key] += metadata.get(key, 0)
+        else:
+            usage = _output_tokens(result)
+        for key, value in usage.items():
+            if value:
+                self.attributes[f"llm.{key}"] = value
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id,
+            "name": self.name,
+            "kind": "SPAN_KIND_INTERNAL",
+            "startTimeUnixNano": self.start_ns,
+            "endTimeUnixNano": self.start_ns + wall_ns,
+            "attributes": self.attributes,
+            "status": self.status,
+        }
+
+def _start(name: str, state: Any) -> tuple[Span, contextvars.Token, Any, int]:
+    span = Span(name, _current_span.get())
+    span.attributes["state.input_bytes"] = _state_size(state)
+    token = _current_span.set(span)
+    usage = get_usage_metadata_callback() if get_usage_metadata_callback else nullcontext()
+    return span, token, usage, time.perf_counter_ns()
+
+def _end(span: Span, token: contextvars.Token, handler: Any, started: int, result: Any, error: Optional[BaseException]) -> None:
+    wall_ns = time.perf_counter_ns() - started
+    _current_span.reset(token)
+    if error is not None:
+        span.status = {"code": "ERROR", "message": f"{type(error).__name__}: {error}"}
+    record = span.finish(wall_ns, handler, result)
+    with _buffer_lock:
+        _buffer.append(record)
+
+def traced(func=None, *, name: Optional[str] = None):
+    """Trace a node function (sync or async). Usable as @traced or @traced(name=...)."""
+    if func is None:
+        return functools.partial(traced, name=name)
+    span_name = name or func.__name__
+
+    if asyncio.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(state, *args, **kwargs):
+            if _sample_rate <= 0 or random.random() >= _sample_rate:
+                return await func(state, *args, **kwargs)
+            span, token, usage, started = _start(span_name, state)
+            # Thread CPU time is shared with other coroutines, so it is not reported
+            span.cpu_start_ns = None
+            result, error = None, None
+            with usage as handler:
+                try:
+                    result = await func(state, *args, **kwargs)
+                    return result
+                except BaseException as e:
+                    error = e
+                    raise
+                finally:
+                    _end(span, token, handler, started, result, error)
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(state, *args, **kwargs):
+        if _sample_rate <= 0 or random.random() >= _sample_rate:
+            return func(state, *args, **kwargs)
+        span, token, usage, started = _start(span_name, state)
+        result, error = None, None
+        with usage as handler:
+            try:
+                result = func(state, *args, **kwargs)
+                return result
+            except BaseException as e:
+                error = e
+                raise
+            finally:
+                _end(span, token, handler, started, result, error)
+    return wrapper
+
+def annotate(**attributes: Any) -> None:
+    """Attach attributes to the span of the node currently running, if it is sampled."""
+    span = _current_span.get()
+    if span is not None:
+        span.attributes.update(attributes)
+
+def spans() -> list[dict]:
+    with _buffer_lock:
+        return list(_buffer)
+
+def export_jsonl(path: Optional[str] = None, clear: bool = True) -> int:
+    """Append buffered spans to a JSONL file (TRACE_EXPORT_PATH by default)."""
+    path = path or os.getenv("TRACE_EXPORT_PATH", "traces.jsonl")
+    with _buffer_lock:
+        records = list(_buffer)
+        if clear:
+            _buffer.clear()
+    with open(path, "a", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, default=str) + "\n")
+    return len(records)
+
+def summary() -> dict[str, dict[str, float]]:
+    """Per-node call count and p50 / p95 wall time (ms) over the buffered spans."""
+    by_name: dict[str, list[float]] = {}
+    for record in spans():
+        by_name.setdefault(record["name"], []).append(record["attributes"]["node.wall_ms"])
+    result = {}
+    for node, values in sorted(by_name.items()):
+        values.sort()
+        result[node] = {
+            "count": len(values),
+            "p50_ms": values[int(0.5 * (len(values) - 1))],
+            "p95_ms": values[int(0.95 * (len(values) - 1))],
+        }
+    return result
@@ -0,0 +1,200 @@
+"""Web search providers behind a persistent, coalescing result cache.
+
+`search_web` used to build a new `TavilySearchResults` and send one request per
+question. `CachedWebSearch` keeps results keyed by normalized query, and when
+several interviews ask for the same query at the same time only the first one
+reaches the provider; the others wait for its answer.
+
+`FixtureSearchProvider` answers from a local JSON index so the graphs can run
+without network access or a Tavily key.
+"""
+import asyncio
+import json
+import logging
+import os
+import threading
+from concurrent.futures import Future
+from typing import Optional, Protocol
+
+from llm_cache import SQLiteBackend
+from replay import get_replay
+from wikipedia_retrieval import normalize_query
+
+logger = logging.getLogger("web_search")
+
+class SearchProvider(Protocol):
+    """Returns results shaped like Tavily's: dicts with `url` and `content`."""
+
+    def search(self, query: str) -> list[dict]: ...
+
+    async def asearch(self, query: str) -> list[dict]: ...
+
+class TavilyProvider:
+    """Single shared TavilySearchResults tool."""
+
+    def __init__(self, max_results: int = 3):
+        from langchain_community.tools.tavily_search import TavilySearchResults
+
+        self.tool = TavilySearchResults(max_results=max_results)
+
+    def search(self, query: str) -> list[dict]:
+        return self.tool.invoke(query)
+
+    async def asearch(self, query: str) -> list[dict]:
+        return await self.tool.ainvoke(query)
+
+class FixtureSearchProvider:
+    """Local stand-in backed by a JSON index {query: [{url, content}, ...]}."""
+
+    def __init__(self, path: str, max_results: int = 3):
+        self.max_results = max_results
+        with open(path, encoding="utf-8") as f:
+            index = json.load(f)
+        self.index = {normalize_query(q): results for q, results in index.items()}
+
+    def search(self, query: str) -> list[dict]:
+        key = normalize_query(query)
+        if key in self.index:
+            return self.index[key][: self.max_results]
+        # Unknown query: rank every indexed result by term overlap
+        terms = set(key.split())
+        scored, seen = [], set()
+        for results in self.index.values():
+            for result in results:
+                if result["url"] in seen:
+                    continue
+                seen.add(result["url"])
+                score = len(terms & set(normalize_query(result["content"]).split()))
+                if score:
+                    scored.append((score, result["url"], result))
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return [result for _, _, result in scored[: self.max_results]]
+
+    async def asearch(self, query: str) -> list[dict]:
+        return self.search(query)
+
+class CachedWebSearch:
+    """Result cache plus in-flight request coalescing in front of a provider."""
+
+    def __init__(self, provider: SearchProvider, cache: SQLiteBackend, ttl: Optional[float] = 24 * 3600):
+        self.provider = provider
+        self.cache = cache
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._in_flight: dict[str, Future] = {}
+        self._async_in_flight: dict[tuple[int, str], asyncio.Future] = {}
+        self.stats = {"cache_hits": 0, "coalesced": 0, "provider_calls": 0, "uncached_errors": 0}
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] += 1
+
+    def _cached(self, key: str) -> Optional[list[dict]]:
+        value = self.cache.get(key)
+        if value is None:
+            return None
+        self._count("cache_hits")
+        return json.loads(value)
+
+    def _store(self, key: str, results) -> list[dict]:
+        """Cache a provider answer and return it as a list of results.
+
+        Tavily reports failures as a string (the exception repr), not a list;
+        those are logged, not cached, and answered with no results.
+        """
+        if isinstance(results, list):
+            self.cache.set(key, json.dumps(results), self.ttl)
+            return results
+        self._count("uncached_errors")
+        logger.warning("web search for %r failed: %s", key, results)
+        return []
+
+    def search(self, query: str) -> list[dict]:
+        replay = get_replay()
+        if replay is not None:
+            return replay.tools.call("web_search", normalize_query(query), lambda: self._search(query))
+        return self._search(query)
+
+    async def asearch(self, query: str) -> list[dict]:
+        replay = get_replay()
+        if replay is not None:
+            return await replay.tools.acall("web_search", normalize_query(query), lambda: self._asearch(query))
+        return await self._asearch(query)
+
+    def _search(self, query: str) -> list[dict]:
+        key = normalize_query(query)
+        results = self._cached(key)
+        if results is not None:
+            return results
+
+        with self._lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self._in_flight[key] = Future()
+            else:
+                self.stats["coalesced"] += 1
+        if not leader:
+            return future.result()
+
+        try:
+            self._count("provider_calls")
+            results = self._store(key, self.provider.search(query))
+            future.set_result(results)
+            return results
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    async def _asearch(self, query: str) -> list[dict]:
+        key = normalize_query(query)
+        results = self._cached(key)
+        if results is not None:
+            return results
+
+        loop = asyncio.get_running_loop()
+        flight_key = (id(loop), key)
+        future = self._async_in_flight.get(flight_key)
+        if future is not None:
+            self._count("coalesced")
+            return await asyncio.shield(future)
+
+        future = self._async_in_flight[flight_key] = loop.create_future()
+        try:
+            self._count("provider_calls")
+            results = self._store(key, await self.provider.asearch(query))
+            future.set_result(results)
+            return results
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else was waiting
+            future.exception()
+            raise
+        finally:
+            self._async_in_flight.pop(flight_key, None)
+
+def make_provider(name: str, max_results: int = 3) -> SearchProvider:
+    if name == "fixture":
+        return FixtureSearchProvider(os.getenv("WEB_SEARCH_FIXTURES", "fixtures/web_search.json"), max_results)
+    if name == "tavily":
+        return TavilyProvider(max_results)
+    raise ValueError(f"Unknown web search provider: {name}")
+
+_web_search: Optional[CachedWebSearch] = None
+_web_search_lock = threading.Lock()
+
+def get_web_search() -> CachedWebSearch:
+    """Process-wide cached search configured from the environment."""
+    global _web_search
+    with _web_search_lock:
+        if _web_search is None:
+            provider = make_provider(
+                os.getenv("WEB_SEARCH_PROVIDER", "tavily"),
+                int(os.getenv("WEB_SEARCH_MAX_RESULTS", "3")),
+            )
+            cache = SQLiteBackend(os.getenv("WEB_SEARCH_CACHE_PATH", ".cache/web_search.sqlite"), table="web_search")
+            _web_search = CachedWebSearch(provider, cache, ttl=float(os.getenv("WEB_SEARCH_TTL", "86400")) or None)
+        return _web_search
@@ -0,0 +1,210 @@
+"""Cached, rate-limited Wikipedia retrieval shared by the research graphs.
+
+`WikipediaLoader(...).load()` refetches the same pages for every analyst and
+every question turn. The retriever below sits in front of it:
+
+- queries are normalized and cached (query -> list of page URLs),
+- pages are deduplicated by source URL and kept in a local on-disk store,
+- network fetches go through a concurrency limit,
+- in offline mode nothing is fetched; queries are answered from the store,
+  which can be pre-filled with a fixture corpus for tests.
+
+fixtures/wikipedia holds such a corpus:
+
+    WIKIPEDIA_STORE_DIR=fixtures/wikipedia WIKIPEDIA_OFFLINE=1 langgraph dev
+"""
+import asyncio
+import hashlib
+import json
+import os
+import re
+import threading
+import unicodedata
+from typing import Optional
+
+from langchain_community.document_loaders import WikipediaLoader
+from langchain_core.documents import Document
+
+from llm_cache import SQLiteBackend
+from replay import get_replay
+
+def normalize_query(query: str) -> str:
+    """Case, accent-form, punctuation and whitespace insensitive query key."""
+    query = unicodedata.normalize("NFKC", query or "").lower()
+    query = re.sub(r"[^\w\s]", " ", query)
+    return " ".join(query.split())
+
+def _terms(text: str) -> set[str]:
+    return set(normalize_query(text).split())
+
+class PageStore:
+    """One JSON file per page, keyed by a hash of the page's source URL."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._pages: dict[str, Document] = {}
+
+    def _path(self, source: str) -> str:
+        return os.path.join(self.directory, hashlib.sha1(source.encode("utf-8")).hexdigest() + ".json")
+
+    def get(self, source: str) -> Optional[Document]:
+        with self._lock:
+            if source in self._pages:
+                return self._pages[source]
+        path = self._path(source)
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        doc = Document(page_content=data["page_content"], metadata=data["metadata"])
+        with self._lock:
+            return self._pages.setdefault(source, doc)
+
+    def put(self, doc: Document) -> Document:
+        """Store a page unless its source is already known; return the stored copy."""
+        source = doc.metadata.get("source", "")
+        existing = self.get(source)
+        if existing is not None:
+            return existing
+        with open(self._path(source), "w", encoding="utf-8") as f:
+            json.dump({"page_content": doc.page_content, "metadata": doc.metadata}, f, ensure_ascii=False)
+        with self._lock:
+            return self._pages.setdefault(source, doc)
+
+    def all(self) -> list[Document]:
+        docs = []
+        for name in sorted(os.listdir(self.directory)):
+            if not name.endswith(".json"):
+                continue
+            with open(os.path.join(self.directory, name), encoding="utf-8") as f:
+                data = json.load(f)
+            doc = Document(page_content=data["page_content"], metadata=data["metadata"])
+            with self._lock:
+                docs.append(self._pages.setdefault(doc.metadata.get("source", ""), doc))
+        return docs
+
+class WikipediaRetriever:
+    """Wikipedia search with a normalized query cache and a local page store."""
+
+    def __init__(
+        self,
+        store_dir: str,
+        load_max_docs: int = 2,
+        max_concurrent_fetches: int = 2,
+        offline: bool = False,
+        query_ttl: Optional[float] = 7 * 24 * 3600,
+    ):
+        self.load_max_docs = load_max_docs
+        self.offline = offline
+        self.query_ttl = query_ttl
+        self.pages = PageStore(os.path.join(store_dir, "pages"))
+        self.queries = SQLiteBackend(os.path.join(store_dir, "queries.sqlite"), table="wikipedia_queries")
+        self.max_concurrent_fetches = max_concurrent_fetches
+        self._fetch_slots = threading.BoundedSemaphore(max_concurrent_fetches)
+        self._async_fetch_slots: dict[int, asyncio.Semaphore] = {}
+        self._stats_lock = threading.Lock()
+        self.stats = {"query_hits": 0, "fetches": 0, "pages_deduplicated": 0, "offline_lookups": 0}
+
+    def _count(self, key: str, n: int = 1) -> None:
+        with self._stats_lock:
+            self.stats[key] += n
+
+    def _cached(self, key: str) -> Optional[list[Document]]:
+        sources = self.queries.get(key)
+        if sources is None:
+            return None
+        docs = [self.pages.get(source) for source in json.loads(sources)]
+        if any(doc is None for doc in docs):
+            return None
+        self._count("query_hits")
+        return docs
+
+    def _remember(self, key: str, docs: list[Document]) -> list[Document]:
+        stored, seen = [], set()
+        for doc in docs:
+            source = doc.metadata.get("source", "")
+            if source in seen:
+                continue
+            seen.add(source)
+            if self.pages.get(source) is not None:
+                self._count("pages_deduplicated")
+            stored.append(self.pages.put(doc))
+        self.queries.set(key, json.dumps([d.metadata.get("source", "") for d in stored]), self.query_ttl)
+        return stored
+
+    def search_local(self, query: str) -> list[Document]:
+        """Best matching stored pages by term overlap, used when offline."""
+        self._count("offline_lookups")
+        terms = _terms(query)
+        scored = []
+        for doc in self.pages.all():
+            title_terms = _terms(doc.metadata.get("title", ""))
+            score = 2 * len(terms & title_terms) + len(terms & _terms(doc.page_content))
+            if score:
+                scored.append((score, doc.metadata.get("source", ""), doc))
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return [doc for _, _, doc in scored[: self.load_max_docs]]
+
+    def search(self, query: str) -> list[Document]:
+        replay = get_replay()
+        if replay is not None:
+            return replay.tools.call("wikipedia", normalize_query(query), lambda: self._search(query))
+        return self._search(query)
+
+    async def asearch(self, query: str) -> list[Document]:
+        replay = get_replay()
+        if replay is not None:
+            return await replay.tools.acall("wikipedia", normalize_query(query), lambda: self._asearch(query))
+        return await self._asearch(query)
+
+    def _search(self, query: str) -> list[Document]:
+        key = normalize_query(query)
+        docs = self._cached(key)
+        if docs is not None:
+            return docs
+        if self.offline:
+            return self.search_local(query)
+        with self._fetch_slots:
+            # Another thread may have fetched the same query while we waited
+            docs = self._cached(key)
+            if docs is not None:
+                return docs
+            self._count("fetches")
+            docs = WikipediaLoader(query=query, load_max_docs=self.load_max_docs).load()
+        return self._remember(key, docs)
+
+    async def _asearch(self, query: str) -> list[Document]:
+        key = normalize_query(query)
+        docs = self._cached(key)
+        if docs is not None:
+            return docs
+        if self.offline:
+            return self.search_local(query)
+        loop_id = id(asyncio.get_running_loop())
+        if loop_id not in self._async_fetch_slots:
+            self._async_fetch_slots[loop_id] = asyncio.Semaphore(self.max_concurrent_fetches)
+        async with self._async_fetch_slots[loop_id]:
+            docs = self._cached(key)
+            if docs is not None:
+                return docs
+            self._count("fetches")
+            docs = await WikipediaLoader(query=query, load_max_docs=self.load_max_docs).aload()
+        return self._remember(key, docs)
+
+_retriever: Optional[WikipediaRetriever] = None
+_retriever_lock = threading.Lock()
+
+def get_wikipedia_retriever() -> WikipediaRetriever:
+    """Process-wide retriever configured from the environment."""
+    global _retriever
+    with _retriever_lock:
+        if _retriever is None:
+            _retriever = WikipediaRetriever(
+                store_dir=os.getenv("WIKIPEDIA_STORE_DIR", ".cache/wikipedia"),
+                load_max_docs=int(os.getenv("WIKIPEDIA_MAX_DOCS", "2")),
+                max_concurrent_fetches=int(os.getenv("WIKIPEDIA_MAX_FETCHES", "2")),
+                offline=os.getenv("WIKIPEDIA_OFFLINE", "").lower() in ("1", "true", "yes"),
+            )
+        return _retriever
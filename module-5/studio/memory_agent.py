@@ -19,6 +19,7 @@ from langgraph.store.base import BaseStore
 from langgraph.store.memory import InMemoryStore
 
 import configuration
+from tracing import traced
 
 ## Utilities 
 
@@ -129,14 +130,11 @@ class UpdateMemory(TypedDict):
 from langchain_groq import ChatGroq
 from dotenv import load_dotenv
 import os
+import llm_factory
 
 # Initialisation du modèle
 load_dotenv()
-model = ChatGroq(
-    model="meta-llama/llama-4-scout-17b-16e-instruct",
-    temperature=0,
-    api_key=os.getenv("GROQ_API_KEY")
-)
+model = llm_factory.get_llm()
 ## Create the Trustcall extractors for updating the user profile and ToDo list
 profile_extractor = create_extractor(
     model,
@@ -211,6 +209,7 @@ Your current instructions are:
 
 ## Node definitions
 
+@traced
 def task_mAIstro(state: MessagesState, config: RunnableConfig, store: BaseStore):
 
     """Load memories from the store and use them to personalize the chatbot's response."""
@@ -247,6 +246,7 @@ def task_mAIstro(state: MessagesState, config: RunnableConfig, store: BaseStore)
 
     return {"messages": [response]}
 
+@traced
 def update_profile(state: MessagesState, config: RunnableConfig, store: BaseStore):
 
     """Reflect on the chat history and update the memory collection."""
@@ -287,6 +287,7 @@ def update_profile(state: MessagesState, config: RunnableConfig, store: BaseStor
     # Return tool message with update verification
     return {"messages": [{"role": "tool", "content": "updated profile", "tool_call_id":tool_calls[0]['id']}]}
 
+@traced
 def update_todos(state: MessagesState, config: RunnableConfig, store: BaseStore):
 
     """Reflect on the chat history and update the memory collection."""
@@ -342,6 +343,7 @@ def update_todos(state: MessagesState, config: RunnableConfig, store: BaseStore)
     todo_update_msg = extract_tool_info(spy.called_tools, tool_name)
     return {"messages": [{"role": "tool", "content": todo_update_msg, "tool_call_id":tool_calls[0]['id']}]}
 
+@traced
 def update_instructions(state: MessagesState, config: RunnableConfig, store: BaseStore):
 
     """Reflect on the chat history and update the memory collection."""
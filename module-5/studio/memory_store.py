@@ -4,20 +4,18 @@ from langchain_openai import ChatOpenAI
 from langgraph.graph import StateGraph, MessagesState, START, END
 from langgraph.store.base import BaseStore
 import configuration
+from tracing import traced
 
 # Initialize the LLM
 #model = ChatOpenAI(model="gpt-4o", temperature=0) 
 from langchain_groq import ChatGroq
 from dotenv import load_dotenv
 import os
+import llm_factory
 
 # Initialisation du modèle
 load_dotenv()
-model = ChatGroq(
-    model="meta-llama/llama-4-scout-17b-16e-instruct",
-    temperature=0,
-    api_key=os.getenv("GROQ_API_KEY")
-)
+model = llm_factory.get_llm()
 
 # Chatbot instruction
 MODEL_SYSTEM_MESSAGE = """You are a helpful assistant with memory that provides information about the user. 
@@ -46,6 +44,7 @@ Remember: Only include factual information directly stated by the user. Do not m
 
 Based on the chat history below, please update the user information:"""
 
+@traced
 def call_model(state: MessagesState, config: RunnableConfig, store: BaseStore):
 
     """Load memory from the store and use it to personalize the chatbot's response."""
@@ -76,6 +75,7 @@ def call_model(state: MessagesState, config: RunnableConfig, store: BaseStore):
 
     return {"messages": response}
 
+@traced
 def write_memory(state: MessagesState, config: RunnableConfig, store: BaseStore):
 
     """Reflect on the chat history and save a memory to the store."""
@@ -8,20 +8,18 @@ from langchain_openai import ChatOpenAI
 from langgraph.graph import StateGraph, MessagesState, START, END
 from langgraph.store.base import BaseStore
 import configuration
+from tracing import traced
 
 # Initialize the LLM
 #model = ChatOpenAI(model="gpt-4o", temperature=0)
 from langchain_groq import ChatGroq
 from dotenv import load_dotenv
 import os
+import llm_factory
 
 # Initialisation du modèle
 load_dotenv()
-model = ChatGroq(
-    model="meta-llama/llama-4-scout-17b-16e-instruct",
-    temperature=0,
-    api_key=os.getenv("GROQ_API_KEY")
-) 
+model = llm_factory.get_llm()
 
 # Schema 
 class UserProfile(BaseModel):
@@ -45,6 +43,7 @@ Here is the memory (it may be empty): {memory}"""
 # Extraction instruction
 TRUSTCALL_INSTRUCTION = """Create or update the memory (JSON doc) to incorporate information from the following conversation:"""
 
+@traced
 def call_model(state: MessagesState, config: RunnableConfig, store: BaseStore):
 
     """Load memory from the store and use it to personalize the chatbot's response."""
@@ -78,6 +77,7 @@ def call_model(state: MessagesState, config: RunnableConfig, store: BaseStore):
 
     return {"messages": response}
 
+@traced
 def write_memory(state: MessagesState, config: RunnableConfig, store: BaseStore):
 
     """Reflect on the chat history and save a memory to the store."""
@@ -0,0 +1,211 @@
+"""Record / replay of model and tool calls for offline, reproducible runs.
+
+Set LLM_REPLAY_MODE=record and run a graph once against the real services:
+every chat model generation and every tool call (web search, Wikipedia
+fetch) is appended to JSONL fixtures in LLM_REPLAY_DIR together with its
+latency. With LLM_REPLAY_MODE=replay the same run needs no network and no
+API key: generations and tool results come from the fixtures, after a delay
+taken from LLM_REPLAY_LATENCY:
+
+- "recorded" (default): the latency measured when recording
+- "none": no delay
+- "fixed:200": 200 ms
+- "uniform:100,400": uniform between 100 and 400 ms
+- "lognormal:250,0.5": log-normal with a 250 ms median and sigma 0.5
+
+Sampled latencies are seeded by LLM_REPLAY_SEED, so a replayed benchmark is
+identical from run to run. A call missing from the fixtures raises
+`ReplayMiss` instead of silently reaching the network.
+
+Model calls are captured through LangChain's cache hook (`ReplayCache`),
+so llm_factory only has to attach it to the models it builds.
+"""
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.load import dumps, loads
+
+class ReplayMiss(LookupError):
+    """A replayed run made a call that was not recorded."""
+
+def fixture_key(*parts: str) -> str:
+    return hashlib.sha256("\x00".join(parts).encode("utf-8")).hexdigest()
+
+class LatencyModel:
+    """Delay applied to replayed calls, see LLM_REPLAY_LATENCY."""
+
+    def __init__(self, spec: str = "recorded", seed: int = 0):
+        self.kind, _, args = spec.partition(":")
+        self.args = [float(a) for a in args.split(",") if a]
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        if self.kind not in ("recorded", "none", "fixed", "uniform", "lognormal"):
+            raise ValueError(f"Unknown replay latency model: {spec}")
+
+    def seconds(self, recorded_ms: float) -> float:
+        with self._lock:
+            if self.kind == "recorded":
+                ms = recorded_ms
+            elif self.kind == "none":
+                ms = 0.0
+            elif self.kind == "fixed":
+                ms = self.args[0]
+            elif self.kind == "uniform":
+                ms = self._random.uniform(self.args[0], self.args[1])
+            else:
+                ms = self._random.lognormvariate(math.log(self.args[0]), self.args[1])
+        return max(0.0, ms) / 1000
+
+class FixtureStore:
+    """Append-only JSONL fixtures; repeated keys replay in recording order."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries: dict[str, list[dict]] = {}
+        self._cursor: dict[str, int] = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._entries.setdefault(entry["key"], []).append(entry)
+
+    def next(self, key: str) -> Optional[dict]:
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                return None
+            i = self._cursor.get(key, 0)
+            self._cursor[key] = i + 1
+            # Calls repeated more often than recorded reuse the last recording
+            return entries[min(i, len(entries) - 1)]
+
+    def append(self, entry: dict) -> None:
+        with self._lock:
+            self._entries.setdefault(entry["key"], []).append(entry)
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+class ReplayCache(BaseCache):
+    """LangChain cache that records generations or replays them from fixtures."""
+
+    def __init__(self, store: FixtureStore, mode: str, latency: LatencyModel):
+        self.store = store
+        self.mode = mode
+        self.latency = latency
+        self._started: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def _replay(self, prompt: str, llm_string: str) -> tuple[RETURN_VAL_TYPE, float]:
+        entry = self.store.next(fixture_key(llm_string, prompt))
+        if entry is None:
+            raise ReplayMiss(f"No recorded generation for this model call (fixtures: {self.store.path})")
+        return loads(entry["generations"]), self.latency.seconds(entry["latency_ms"])
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        if self.mode == "replay":
+            generations, delay = self._replay(prompt, llm_string)
+            time.sleep(delay)
+            return generations
+        # Recording: always a miss, remember when the real call started
+        with self._lock:
+            self._started[fixture_key(llm_string, prompt)] = time.perf_counter()
+        return None
+
+    async def alookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        if self.mode == "replay":
+            generations, delay = self._replay(prompt, llm_string)
+            await asyncio.sleep(delay)
+            return generations
+        return self.lookup(prompt, llm_string)
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        if self.mode != "record":
+            return
+        key = fixture_key(llm_string, prompt)
+        with self._lock:
+            started = self._started.pop(key, None)
+        latency_ms = (time.perf_counter() - started) * 1000 if started is not None else 0.0
+        self.store.append({"key": key, "generations": dumps(list(return_val)), "latency_ms": round(latency_ms, 1)})
+
+    async def aupdate(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        self.update(prompt, llm_string, return_val)
+
+    def clear(self, **kwargs: Any) -> None:
+        pass
+
+class ToolRecorder:
+    """Records or replays tool calls identified by a tool name and an argument string."""
+
+    def __init__(self, store: FixtureStore, mode: str, latency: LatencyModel):
+        self.store = store
+        self.mode = mode
+        self.latency = latency
+
+    def _replay(self, tool: str, argument: str) -> tuple[Any, float]:
+        entry = self.store.next(fixture_key(tool, argument))
+        if entry is None:
+            raise ReplayMiss(f"No recorded {tool} call for {argument!r} (fixtures: {self.store.path})")
+        return loads(entry["result"]), self.latency.seconds(entry["latency_ms"])
+
+    def _record(self, tool: str, argument: str, result: Any, started: float) -> None:
+        self.store.append({
+            "key": fixture_key(tool, argument),
+            "tool": tool,
+            "argument": argument,
+            "result": dumps(result),
+            "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+        })
+
+    def call(self, tool: str, argument: str, fn: Callable[[], Any]) -> Any:
+        if self.mode == "replay":
+            result, delay = self._replay(tool, argument)
+            time.sleep(delay)
+            return result
+        started = time.perf_counter()
+        result = fn()
+        self._record(tool, argument, result, started)
+        return result
+
+    async def acall(self, tool: str, argument: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        if self.mode == "replay":
+            result, delay = self._replay(tool, argument)
+            await asyncio.sleep(delay)
+            return result
+        started = time.perf_counter()
+        result = await fn()
+        self._record(tool, argument, result, started)
+        return result
+
+class Replay:
+    def __init__(self, directory: str, mode: str, latency: LatencyModel):
+        self.mode = mode
+        self.llm_cache = ReplayCache(FixtureStore(os.path.join(directory, "llm.jsonl")), mode, latency)
+        self.tools = ToolRecorder(FixtureStore(os.path.join(directory, "tools.jsonl")), mode, latency)
+
+_replay: Optional[Replay] = None
+_replay_lock = threading.Lock()
+
+def get_replay() -> Optional[Replay]:
+    """Process-wide record / replay harness, or None when LLM_REPLAY_MODE is unset / "off"."""
+    global _replay
+    mode = os.getenv("LLM_REPLAY_MODE", "off").lower()
+    if mode in ("", "off", "none"):
+        return None
+    if mode not in ("record", "replay"):
+        raise ValueError(f"Unknown LLM_REPLAY_MODE: {mode}")
+    with _replay_lock:
+        if _replay is None or _replay.mode != mode:
+            latency = LatencyModel(os.getenv("LLM_REPLAY_LATENCY", "recorded"), int(os.getenv("LLM_REPLAY_SEED", "0")))
+            _replay = Replay(os.getenv("LLM_REPLAY_DIR", "fixtures/replay"), mode, latency)
+        return _replay
@@ -0,0 +1,314 @@
+"""Retries, backoff, circuit breaking and model fallback for model API calls.
+
+The chat model SDKs each retry on their own (`max_retries` per constructor)
+with no shared view of how the API is doing. `ResilientTransport` sits under
+the pooled httpx clients of llm_factory instead, with the SDK retries turned
+off, and applies one policy to every model call of the process:
+
+- retryable failures (429, 408, 5xx, connection errors) are retried with
+  decorrelated-jitter backoff, waiting at least the server's Retry-After,
+- retries draw from a shared budget (a fraction of recent requests), so an
+  outage does not multiply the load on the API,
+- each model has a circuit breaker; after repeated failures its calls fail
+  fast until a probe request succeeds,
+- when a model is failing or its breaker is open, the request is sent to
+  its fallback models (the "model" field of the JSON body is rewritten).
+
+A failed call therefore costs a bounded amount of time instead of a full
+graph iteration.
+"""
+import asyncio
+import email.utils
+import json
+import random
+import threading
+import time
+from typing import Optional
+
+import httpx
+
+RETRYABLE_STATUS = frozenset({408, 409, 429, 500, 502, 503, 504})
+# Request header carrying the per-model retry count (llm_factory's max_retries);
+# consumed here, never sent to the API
+MAX_RETRIES_HEADER = "x-llm-max-retries"
+
+class RetryBudget:
+    """Token bucket: every request deposits `ratio` retry tokens, every retry spends one."""
+
+    def __init__(self, ratio: float = 0.2, min_per_second: float = 1.0, max_tokens: float = 20.0):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_tokens = max_tokens
+        self._tokens = max_tokens
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.max_tokens, self._tokens + (now - self._last) * self.min_per_second)
+        self._last = now
+
+    def deposit(self) -> None:
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+class CircuitBreaker:
+    """closed -> open after `failure_threshold` consecutive failures -> half-open after `reset_seconds`."""
+
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if time.monotonic() - self.opened_at >= self.reset_seconds else "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            # Half-open: let a single probe through
+            if state == "half_open" and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._probing or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._probing = False
+
+class Resilience:
+    """Retry / breaker / fallback policy shared by the sync and async transports."""
+
+    def __init__(
+        self,
+        max_retries: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 20.0,
+        budget: Optional[RetryBudget] = None,
+        failure_threshold: int = 5,
+        reset_seconds: float = 30.0,
+        fallbacks: Optional[dict[str, list[str]]] = None,
+    ):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget or RetryBudget()
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.fallbacks = fallbacks or {}
+        self.breakers: dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "retries": 0, "budget_exhausted": 0, "fallbacks": 0, "short_circuited": 0, "failures": 0}
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] += 1
+
+    def breaker(self, model: str) -> CircuitBreaker:
+        with self._lock:
+            if model not in self.breakers:
+                self.breakers[model] = CircuitBreaker(self.failure_threshold, self.reset_seconds)
+            return self.breakers[model]
+
+    def backoff(self, previous: float) -> float:
+        """Decorrelated jitter: uniform between the base delay and three times the previous delay."""
+        return min(self.max_delay, random.uniform(self.base_delay, max(self.base_delay, previous * 3)))
+
+    def delay(self, previous: float, response: Optional[httpx.Response]) -> float:
+        wait = self.backoff(previous)
+        retry_after = parse_retry_after(response) if response is not None else None
+        return max(wait, retry_after) if retry_after is not None else wait
+
+    def may_retry(self, attempt: int, max_retries: int, delay: float) -> bool:
+        if attempt >= max_retries or delay > self.max_delay:
+            return False
+        if not self.budget.withdraw():
+            self._count("budget_exhausted")
+            return False
+        self._count("retries")
+        return True
+
+def parse_retry_after(response: httpx.Response) -> Optional[float]:
+    value = response.headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = response.headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def request_model(request: httpx.Request) -> Optional[str]:
+    if request.method != "POST" or "json" not in request.headers.get("content-type", ""):
+        return None
+    try:
+        return json.loads(request.content).get("model")
+    except (ValueError, AttributeError, httpx.RequestNotRead):
+        return None
+
+def with_model(request: httpx.Request, model: str) -> httpx.Request:
+    """Copy of a JSON request whose body targets another model."""
+    body = json.loads(request.content)
+    body["model"] = model
+    headers = [(k, v) for k, v in request.headers.items() if k.lower() != "content-length"]
+    return httpx.Request(request.method, request.url, headers=headers, content=json.dumps(body).encode("utf-8"),
+                         extensions=request.extensions)
+
+def unavailable(request: httpx.Request, model: str) -> httpx.Response:
+    return httpx.Response(
+        503,
+        json={"error": {"message": f"Circuit open for model `{model}` and its fallbacks", "type": "circuit_open"}},
+        request=request,
+    )
+
+def _prepare(resilience: Resilience, request: httpx.Request) -> tuple[Optional[str], int, list[str]]:
+    max_retries = int(request.headers.get(MAX_RETRIES_HEADER, resilience.max_retries))
+    if MAX_RETRIES_HEADER in request.headers:
+        del request.headers[MAX_RETRIES_HEADER]
+    model = request_model(request)
+    resilience._count("requests")
+    resilience.budget.deposit()
+    return model, max_retries, ([model, *resilience.fallbacks.get(model, [])] if model else [])
+
+class ResilientTransport(httpx.BaseTransport):
+    def __init__(self, transport: httpx.BaseTransport, resilience: Resilience):
+        self.transport = transport
+        self.resilience = resilience
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        resilience = self.resilience
+        model, max_retries, candidates = _prepare(resilience, request)
+        if model is None:
+            return self.transport.handle_request(request)
+
+        response, error = None, None
+        for candidate in candidates:
+            breaker = resilience.breaker(candidate)
+            if not breaker.allow():
+                resilience._count("short_circuited")
+                continue
+            if candidate != model:
+                resilience._count("fallbacks")
+            attempt_request = request if candidate == model else with_model(request, candidate)
+            attempt, delay = 0, resilience.base_delay
+            while True:
+                if response is not None:
+                    # Drain the failed response so its connection goes back to the pool
+                    response.read()
+                    response.close()
+                response, error = None, None
+                try:
+                    response = self.transport.handle_request(attempt_request)
+                except httpx.TransportError as e:
+                    error = e
+                if error is None and response.status_code not in RETRYABLE_STATUS:
+                    # Client errors (400, 401, ...) are the request's fault, not the model's
+                    breaker.record_success()
+                    return response
+                breaker.record_failure()
+                resilience._count("failures")
+                delay = resilience.delay(delay, response)
+                if not breaker.allow() or not resilience.may_retry(attempt, max_retries, delay):
+                    break
+                attempt += 1
+                time.sleep(delay)
+        if response is not None:
+            return response
+        if error is not None:
+            raise error
+        return unavailable(request, model)
+
+    def close(self) -> None:
+        self.transport.close()
+
+class AsyncResilientTransport(httpx.AsyncBaseTransport):
+    def __init__(self, transport: httpx.AsyncBaseTransport, resilience: Resilience):
+        self.transport = transport
+        self.resilience = resilience
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        resilience = self.resilience
+        model, max_retries, candidates = _prepare(resilience, request)
+        if model is None:
+            return await self.transport.handle_async_request(request)
+
+        response, error = None, None
+        for candidate in candidates:
+            breaker = resilience.breaker(candidate)
+            if not breaker.allow():
+                resilience._count("short_circuited")
+                continue
+            if candidate != model:
+                resilience._count("fallbacks")
+            attempt_request = request if candidate == model else with_model(request, candidate)
+            attempt, delay = 0, resilience.base_delay
+            while True:
+                if response is not None:
+                    await response.aread()
+                    await response.aclose()
+                response, error = None, None
+                try:
+                    response = await self.transport.handle_async_request(attempt_request)
+                except httpx.TransportError as e:
+                    error = e
+                if error is None and response.status_code not in RETRYABLE_STATUS:
+                    breaker.record_success()
+                    return response
+                breaker.record_failure()
+                resilience._count("failures")
+                delay = resilience.delay(delay, response)
+                if not breaker.allow() or not resilience.may_retry(attempt, max_retries, delay):
+                    break
+                attempt += 1
+                await asyncio.sleep(delay)
+        if response is not None:
+            return response
+        if error is not None:
+            raise error
+        return unavailable(request, model)
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+def parse_fallbacks(spec: str) -> dict[str, list[str]]:
+    """Parse "model=fallback1,fallback2;other=fallback" into {model: [fallbacks]}."""
+    fallbacks = {}
+    for entry in spec.split(";"):
+        model, _, targets = entry.partition("=")
+        if model.strip() and targets.strip():
+            fallbacks[model.strip()] = [t.strip() for t in targets.split(",") if t.strip()]
+    return fallbacks
@@ -19,6 +19,7 @@ from langgraph.store.base import BaseStore
 from langgraph.store.memory import InMemoryStore
 
 import configuration
+from tracing import traced
 
 ## Utilities 
 
@@ -141,6 +142,7 @@ class UpdateMemory(TypedDict):
 from dotenv import load_dotenv
 from langchain_groq import ChatGroq
 import os
+import llm_factory
 
 # Charge les variables d'environnement depuis le fichier .env
 load_dotenv()
@@ -148,12 +150,8 @@ load_dotenv()
 # Récupère ta clé d'API Groq
 api_key = os.getenv("GROQ_API_KEY")
 
-# Initialisation du modèle ChatGroq avec ton modèle préféré
-model = ChatGroq(
-    model="meta-llama/llama-4-scout-17b-16e-instruct",
-    temperature=0,
-    api_key=api_key
-) 
+# Modèle partagé (pool HTTP et rate limit communs aux graphes du serveur)
+model = llm_factory.get_llm()
 
 ## Create the Trustcall extractors for updating the user profile and ToDo list
 profile_extractor = create_extractor(
@@ -227,6 +225,7 @@ Your current instructions are:
 
 ## Node definitions
 
+@traced
 def task_mAIstro(state: MessagesState, config: RunnableConfig, store: BaseStore):
 
     """Load memories from the store and use them to personalize the chatbot's response."""
@@ -265,6 +264,7 @@ def task_mAIstro(state: MessagesState, config: RunnableConfig, store: BaseStore)
 
     return {"messages": [response]}
 
+@traced
 def update_profile(state: MessagesState, config: RunnableConfig, store: BaseStore):
 
     """Reflect on the chat history and update the memory collection."""
@@ -306,6 +306,7 @@ def update_profile(state: MessagesState, config: RunnableConfig, store: BaseStor
     # Return tool message with update verification
     return {"messages": [{"role": "tool", "content": "updated profile", "tool_call_id":tool_calls[0]['id']}]}
 
+@traced
 def update_todos(state: MessagesState, config: RunnableConfig, store: BaseStore):
 
     """Reflect on the chat history and update the memory collection."""
@@ -362,6 +363,7 @@ def update_todos(state: MessagesState, config: RunnableConfig, store: BaseStore)
     todo_update_msg = extract_tool_info(spy.called_tools, tool_name)
     return {"messages": [{"role": "tool", "content": todo_update_msg, "tool_call_id":tool_calls[0]['id']}]}
 
+@traced
 def update_instructions(state: MessagesState, config: RunnableConfig, store: BaseStore):
 
     """Reflect on the chat history and update the memory collection."""